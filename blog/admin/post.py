@@ -5,4 +5,4 @@ from blog.models.post import Post
 
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
-    list_display = ['title', 'user_id']
+    list_display = ['title', 'user_id', 'comment_count']
@@ -0,0 +1,69 @@
+from functools import update_wrapper
+from typing import Tuple
+
+from asgiref.sync import sync_to_async
+
+
+class AsyncReadMixin:
+    """
+    Async views of a `ModelViewSet`, for ASGI: the reads of `async_actions` are handled by their `a<action>`
+    methods (e.g. `alist` of `ValuesReadMixin`, wrapped by `ConditionalGetMixin`), whose queries are awaited
+    with the async ORM, so that a worker serves other requests meanwhile. Authentication and permissions are
+    checked in a thread (since they may query the DB), and all the other actions (e.g. writes) run the sync
+    view in a thread, as Django does for any sync view.
+
+    On WSGI (e.g. `runserver` and the test client) the same views run in an event loop of each request.
+    """
+
+    async_actions: Tuple[str, ...] = ('list', 'retrieve')
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        async_actions = initkwargs.get('async_actions', cls.async_actions)
+        if not set(view.actions.values()) & set(async_actions):
+            return view
+        sync_view = sync_to_async(view)
+
+        async def async_view(request, *args, **kwargs):
+            # As the view of `ViewSetMixin.as_view` does
+            actions = view.actions
+            if 'get' in actions and 'head' not in actions:
+                actions['head'] = actions['get']
+            if actions.get(request.method.lower()) not in async_actions:
+                return await sync_view(request, *args, **kwargs)
+
+            self = cls(**initkwargs)
+            self.action_map = actions
+            for method, action in actions.items():
+                setattr(self, method, getattr(self, action))
+            self.request = request
+            self.args = args
+            self.kwargs = kwargs
+            return await self.adispatch(request, *args, **kwargs)
+
+        # The name, the docstring, and the attributes which the router, the schema and Django use (e.g. `cls`,
+        # `actions` and `csrf_exempt`)
+        update_wrapper(async_view, view)
+        del async_view.__wrapped__
+        return async_view
+
+    async def adispatch(self, request, *args, **kwargs):
+        """
+        `dispatch` with an async handler.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = getattr(self, f'a{self.action}')
+            response = await handler(request, *args, **kwargs)
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,55 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt import serializers
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from blog.auth_cache import cache_user, get_cached_user
+from blog.models.token import TokenVersion
+
+# The claim of the tokens with the version of the tokens of the user, when they are issued (see `TokenVersion`)
+TOKEN_VERSION_CLAIM = 'token_version'
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    `JWTAuthentication`, which resolves the user of a token (and the version of its tokens, see `TokenVersion`)
+    from the cache (for `JWT_USER_CACHE_TIMEOUT` seconds), so that authenticated requests don't query the DB. The
+    cached user is invalidated whenever the user is saved or deleted, and the tokens which were issued before the
+    password of the user changed are rejected (by their `token_version` claim, see `blog.signals`).
+
+    With a cache of each process (the default `LocMemCache`), other processes see changes of users (including
+    revoked tokens) once their entries expire.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        cached = get_cached_user(user_id)
+        if cached is None:
+            # Inactive (and unknown) users are rejected, and not cached
+            user = super().get_user(validated_token)
+            token_version = TokenVersion.current(user.pk)
+            cache_user(user, token_version)
+        else:
+            user, token_version = cached
+
+        # Tokens issued before this claim was added have none
+        if validated_token.get(TOKEN_VERSION_CLAIM, 0) != token_version:
+            raise AuthenticationFailed(_('The password of the user has changed'), code='password_changed')
+        return user
+
+
+class TokenObtainPairSerializer(serializers.TokenObtainPairSerializer):
+    """
+    Issues tokens with the `token_version` claim (which the access tokens of a refresh token copy).
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token[TOKEN_VERSION_CLAIM] = TokenVersion.current(user.pk)
+        return token
@@ -0,0 +1,183 @@
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from django.db import transaction
+from rest_framework import serializers, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from blog.models.outbox import batch_change_tracking
+
+BULK_MAX_ITEMS = 1000
+
+
+def _int_or_none(value) -> Optional[int]:
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class _PrefetchedQuerySet:
+    """
+    Stands in for the queryset of a related field, with the related objects which are fetched at once
+    (see `BulkListSerializer.prefetch_related_objects`), so that each item is not validated with a query.
+    """
+
+    def __init__(self, model_class, objects: Dict):
+        self.model = model_class
+        self.objects = objects
+
+    def get(self, pk):
+        try:
+            return self.objects[int(pk)]
+        except (KeyError, TypeError, ValueError):
+            raise self.model.DoesNotExist
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    """
+    Validates each item of a list on its own, so that the valid items can be saved while the invalid
+    ones are reported, and saves them with one `bulk_create`/`bulk_update_values` (which record the
+    outbox entries in bulk as well).
+    """
+
+    def prefetch_related_objects(self, data: list):
+        """
+        Fetch the objects of the (primary key) related fields of all the items with one query per field.
+        """
+        for name, field in self.child.fields.items():
+            if field.read_only or not isinstance(field, serializers.PrimaryKeyRelatedField):
+                continue
+            queryset = field.get_queryset()
+            pks = {_int_or_none(item.get(name)) for item in data if isinstance(item, dict)} - {None}
+            field.queryset = _PrefetchedQuerySet(queryset.model, queryset.in_bulk(pks))
+
+    def validate_items(self, data: list) -> Tuple[List[Optional[dict]], List[Optional[dict]]]:
+        """
+        The validated data and the errors of each item, one of which is `None`.
+        """
+        self.prefetch_related_objects(data)
+        validated_data, errors = [], []
+        for item in data:
+            try:
+                validated_data.append(self.child.run_validation(item))
+                errors.append(None)
+            except ValidationError as e:
+                validated_data.append(None)
+                errors.append(e.detail)
+        return validated_data, errors
+
+    def create(self, validated_data: List[dict]) -> list:
+        model_class = self.child.Meta.model
+        return model_class.objects.bulk_create([model_class(**attrs) for attrs in validated_data])
+
+    def update(self, instances: list, validated_data: List[dict]) -> list:
+        model_class = self.child.Meta.model
+        fields = set()
+        for instance, attrs in zip(instances, validated_data):
+            for field, value in attrs.items():
+                setattr(instance, field, value)
+            fields.update(attrs)
+        if fields:
+            model_class.objects.bulk_update_values(instances, fields)
+        return instances
+
+
+class BulkMixin:
+    """
+    Batch endpoints for a `ModelViewSet` (whose serializer has a `BulkListSerializer`), at `<list URL>/bulk/`:
+
+        - POST: create the given items.
+        - PATCH: update the given items (each with its `id`), with the given fields.
+        - DELETE: delete the items with the given IDs.
+
+    Each takes a list of up to `bulk_max_items` items, and runs in one transaction. The valid items are
+    saved with one query, and the result of each item (its status, and its data or errors) is returned
+    in the order of the items.
+    """
+    bulk_max_items = BULK_MAX_ITEMS
+
+    def bulk_items(self) -> list:
+        items = self.request.data
+        if not isinstance(items, list):
+            raise ValidationError({'non_field_errors': ['Expected a list of items.']})
+        if len(items) > self.bulk_max_items:
+            raise ValidationError({'non_field_errors': [f'Ensure there are at most {self.bulk_max_items} items.']})
+        return items
+
+    @staticmethod
+    def error_result(status_code: int, errors) -> dict:
+        return {'status': status_code, 'errors': errors}
+
+    @action(detail=False, methods=['post'], url_path='bulk', url_name='bulk')
+    def bulk_create(self, request, *args, **kwargs):
+        items = self.bulk_items()
+        serializer = self.get_serializer(many=True)
+        validated_data, errors = serializer.validate_items(items)
+
+        with transaction.atomic():
+            instances = iter(serializer.create([attrs for attrs in validated_data if attrs is not None]))
+
+        results = [
+            self.error_result(status.HTTP_400_BAD_REQUEST, item_errors) if item_errors is not None
+            else {'status': status.HTTP_201_CREATED, 'data': serializer.child.to_representation(next(instances))}
+            for item_errors in errors
+        ]
+        return Response({'results': results})
+
+    @bulk_create.mapping.patch
+    def bulk_update(self, request, *args, **kwargs):
+        items = self.bulk_items()
+        ids = [_int_or_none(item.get('id')) if isinstance(item, dict) else None for item in items]
+        # Which of the updates of an item would win in `UPDATE ... FROM (VALUES ...)` is undefined
+        duplicate_ids = sorted(item_id for item_id, count in Counter(ids).items() if item_id is not None and count > 1)
+        if duplicate_ids:
+            raise ValidationError({'non_field_errors': [f'Duplicate IDs: {", ".join(map(str, duplicate_ids))}.']})
+        serializer = self.get_serializer(many=True, partial=True)
+        validated_data, errors = serializer.validate_items(items)
+
+        with transaction.atomic():
+            instances = self.get_queryset().select_for_update().in_bulk({item_id for item_id in ids} - {None})
+            results = []
+            updates = []
+            for item_id, attrs, item_errors in zip(ids, validated_data, errors):
+                if item_id is None:
+                    results.append(self.error_result(status.HTTP_400_BAD_REQUEST, {'id': ['A valid ID is required.']}))
+                elif item_errors is not None:
+                    results.append(self.error_result(status.HTTP_400_BAD_REQUEST, item_errors))
+                elif item_id not in instances:
+                    results.append(self.error_result(status.HTTP_404_NOT_FOUND, {'id': ['Not found.']}))
+                else:
+                    results.append({'status': status.HTTP_200_OK, 'data': instances[item_id]})
+                    updates.append((instances[item_id], attrs))
+
+            if updates:
+                serializer.update(*zip(*updates))
+
+        for result in results:
+            if 'data' in result:
+                result['data'] = serializer.child.to_representation(result['data'])
+        return Response({'results': results})
+
+    @bulk_create.mapping.delete
+    def bulk_delete(self, request, *args, **kwargs):
+        ids = [_int_or_none(item_id) for item_id in self.bulk_items()]
+
+        # One `DELETE ... WHERE id = ANY(...)` per table (e.g. for the comments of deleted posts), and one
+        # insert of the outbox entries
+        with transaction.atomic(), batch_change_tracking():
+            existing_ids = set(self.get_queryset().delete_ids({item_id for item_id in ids} - {None}))
+
+        results = []
+        for item_id in ids:
+            if item_id is None:
+                results.append(self.error_result(status.HTTP_400_BAD_REQUEST, {'id': ['A valid ID is required.']}))
+            elif item_id not in existing_ids:
+                results.append(self.error_result(status.HTTP_404_NOT_FOUND, {'id': ['Not found.']}))
+            else:
+                results.append({'status': status.HTTP_204_NO_CONTENT})
+        return Response({'results': results})
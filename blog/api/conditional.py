@@ -0,0 +1,148 @@
+from typing import Awaitable, Callable, List, Optional, Tuple
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from blog.models.version import CollectionVersion
+
+
+class ConditionalGetMixin:
+    """
+    Strong ETags and `Last-Modified` headers for the reads of a `ModelViewSet`, so that a client which
+    polls them gets a `304 Not Modified` (to `If-None-Match` or `If-Modified-Since`) without the rows
+    being loaded or serialized:
+
+        - A list depends on the version of its collection (see `CollectionVersion`), and on the ones of
+          the collections which it embeds (see `etag_collections`).
+        - An item depends on its fingerprint (the hash of its content) and the other `etag_fields` (e.g.
+          counters which the DB maintains), which are the only columns loaded to check it, and on the
+          versions of the collections which it embeds (if any, otherwise it has no `Last-Modified`).
+
+    Both depend on the host, the query string and the renderer as well, since they change the representation.
+    """
+
+    # The columns of an item which its representation depends on, the fingerprint first
+    etag_fields: Tuple[str, ...] = ('fingerprint',)
+
+    def etag_collections(self) -> List[str]:
+        """
+        The collections whose versions the representation depends on.
+        """
+        return [self.queryset.model._meta.model_name]
+
+    def conditional(
+            self,
+            get_response: Callable,
+            fingerprint: Optional[str] = None,
+            collections: Optional[List[str]] = None,
+    ):
+        if collections is None:
+            collections = self.etag_collections()
+        versions = CollectionVersion.current(collections) if collections else {}
+        etag, last_modified = self.validators(fingerprint, versions)
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = get_response()
+            if response.status_code != 200:
+                return response
+        return self.set_validators(response, etag, last_modified)
+
+    async def aconditional(
+            self,
+            get_response: Callable[[], Awaitable],
+            fingerprint: Optional[str] = None,
+            collections: Optional[List[str]] = None,
+    ):
+        """
+        `conditional` with the async ORM (and a response which is awaited).
+        """
+        if collections is None:
+            collections = self.etag_collections()
+        versions = await CollectionVersion.acurrent(collections) if collections else {}
+        etag, last_modified = self.validators(fingerprint, versions)
+        response = get_conditional_response(self.request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = await get_response()
+            if response.status_code != 200:
+                return response
+        return self.set_validators(response, etag, last_modified)
+
+    def validators(self, fingerprint: Optional[str], versions: dict) -> Tuple[str, Optional[int]]:
+        """
+        The ETag and the `Last-Modified` timestamp (if any) of the representation.
+        """
+        request = self.request
+        etag_source = '|'.join([
+            # Links (e.g. to the next page) are absolute
+            request.get_host(),
+            request.path,
+            request.META.get('QUERY_STRING', ''),
+            request.accepted_renderer.format,
+            fingerprint or '',
+            *(f'{name}={version}' for name, (version, updated_at) in sorted(versions.items())),
+        ])
+        etag = f'"{hashlib.sha256(etag_source.encode()).hexdigest()[:32]}"'
+        modified_times = [updated_at for version, updated_at in versions.values() if updated_at is not None]
+        last_modified = int(max(modified_times).timestamp()) if modified_times else None
+        return etag, last_modified
+
+    @staticmethod
+    def set_validators(response, etag: str, last_modified: Optional[int]):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.aconditional(lambda: super(ConditionalGetMixin, self).alist(request, *args, **kwargs))
+
+    def fingerprint_queryset(self):
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        return (
+            self.get_queryset()
+            .filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+            .values_list(*self.etag_fields)
+        )
+
+    @staticmethod
+    def item_fingerprint(row: Optional[tuple]) -> Optional[str]:
+        # `None` if the item is not found (or not fingerprinted yet)
+        if not row or not row[0]:
+            return None
+        return '|'.join(map(str, row))
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            fingerprint = self.item_fingerprint(self.fingerprint_queryset().first())
+        except (TypeError, ValueError):
+            fingerprint = None
+        if not fingerprint:
+            # Not found (or not fingerprinted yet)
+            return super().retrieve(request, *args, **kwargs)
+
+        # Changes of other items of its own collection do not change the item
+        model_name = self.queryset.model._meta.model_name
+        return self.conditional(
+            lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs),
+            fingerprint=fingerprint,
+            collections=[name for name in self.etag_collections() if name != model_name],
+        )
+
+    async def aretrieve(self, request, *args, **kwargs):
+        try:
+            fingerprint = self.item_fingerprint(await self.fingerprint_queryset().afirst())
+        except (TypeError, ValueError):
+            fingerprint = None
+        if not fingerprint:
+            return await super().aretrieve(request, *args, **kwargs)
+
+        model_name = self.queryset.model._meta.model_name
+        return await self.aconditional(
+            lambda: super(ConditionalGetMixin, self).aretrieve(request, *args, **kwargs),
+            fingerprint=fingerprint,
+            collections=[name for name in self.etag_collections() if name != model_name],
+        )
@@ -0,0 +1,107 @@
+from gzip import GzipFile
+from typing import AsyncIterator, Iterator
+import re
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.http import StreamingHttpResponse
+from django.utils.text import StreamingBuffer, compress_sequence
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+
+from blog.api.filters import parse_bigint
+from blog.api.renderers import NDJSONRenderer
+
+DEFAULT_EXPORT_CHUNK_SIZE = 2000
+
+ACCEPTS_GZIP = re.compile(r'\bgzip\b')
+
+
+async def acompress_sequence(sequence: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    `compress_sequence` of an async iterator.
+    """
+    buf = StreamingBuffer()
+    with GzipFile(mode='wb', compresslevel=6, fileobj=buf, mtime=0) as zfile:
+        # The header
+        yield buf.read()
+        async for item in sequence:
+            zfile.write(item)
+            data = buf.read()
+            if data:
+                yield data
+    yield buf.read()
+
+
+class ExportMixin:
+    """
+    Streams all the items of a `ModelViewSet` (with `ValuesReadMixin`), or the ones after `?since_id=` (to resume
+    an interrupted export), as newline delimited JSON, in order of their IDs, at `<list URL>/export/`. The items
+    are read from the DB with a server side cursor, and written in chunks of `export_chunk_size` items, so memory
+    use does not grow with the number of items. The filters and `?fields=` of the list apply as well.
+
+    The response is gzip compressed if the client accepts it (`Accept-Encoding: gzip`).
+
+    On ASGI the items are read with the async ORM while the response is streamed (Django would read a sync
+    iterator to the end before sending anything).
+    """
+    export_chunk_size = DEFAULT_EXPORT_CHUNK_SIZE
+
+    @action(detail=False, url_path='export', url_name='export', renderer_classes=[NDJSONRenderer])
+    def export(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset()).order_by('id')
+        since_id = request.query_params.get('since_id')
+        if since_id is not None:
+            try:
+                queryset = queryset.filter(id__gt=parse_bigint(since_id))
+            except ValueError:
+                raise ValidationError({'since_id': [f'Invalid value {since_id!r}.']})
+
+        asynchronous = isinstance(request._request, ASGIRequest)
+        content = self.aexport_chunks(queryset) if asynchronous else self.export_chunks(queryset)
+        gzipped = bool(ACCEPTS_GZIP.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+        if gzipped:
+            # Each chunk is compressed as it is written (at level 6)
+            content = acompress_sequence(content) if asynchronous else compress_sequence(content)
+        response = StreamingHttpResponse(content, content_type=NDJSONRenderer.media_type)
+        response['Vary'] = 'Accept-Encoding'
+        if gzipped:
+            response['Content-Encoding'] = 'gzip'
+        return response
+
+    def export_chunks(self, queryset) -> Iterator[bytes]:
+        renderer = NDJSONRenderer()
+        mapper = self.get_values_mapper()
+        rows = queryset.values(*mapper.columns) if mapper is not None else queryset
+        chunk = []
+        for row in rows.iterator(chunk_size=self.export_chunk_size):
+            chunk.append(row)
+            if len(chunk) == self.export_chunk_size:
+                yield renderer.render(self.export_items(mapper, chunk))
+                chunk = []
+        if chunk:
+            yield renderer.render(self.export_items(mapper, chunk))
+
+    async def aexport_chunks(self, queryset) -> AsyncIterator[bytes]:
+        renderer = NDJSONRenderer()
+        mapper = self.get_values_mapper()
+        rows = queryset.values(*mapper.columns) if mapper is not None else queryset
+        chunk = []
+        async for row in rows.aiterator(chunk_size=self.export_chunk_size):
+            chunk.append(row)
+            if len(chunk) == self.export_chunk_size:
+                yield renderer.render(await self.aexport_items(mapper, chunk))
+                chunk = []
+        if chunk:
+            yield renderer.render(await self.aexport_items(mapper, chunk))
+
+    def export_items(self, mapper, rows: list) -> list:
+        if mapper is not None:
+            return mapper.map_rows(rows)
+        return self.get_serializer(rows, many=True).data
+
+    async def aexport_items(self, mapper, rows: list) -> list:
+        if mapper is not None:
+            return await mapper.amap_rows(rows)
+        return await sync_to_async(self.export_items)(mapper, rows)
+
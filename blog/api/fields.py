@@ -0,0 +1,86 @@
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+from rest_framework.exceptions import ValidationError
+
+
+@lru_cache(maxsize=None)
+def readable_field_names(serializer_class) -> Tuple[str, ...]:
+    return tuple(name for name, field in serializer_class().fields.items() if not field.write_only)
+
+
+class SparseFieldsMixin:
+    """
+    Sparse fieldsets for the reads of a `ModelViewSet`: `?fields=id,title` keeps only the given fields of
+    the items, and `?exclude=body` leaves out the given ones (in the order of the serializer's fields either
+    way). Only the columns of the fields which are kept are queried, so e.g. large bodies are not read at all.
+    """
+
+    def get_field_names(self) -> Optional[List[str]]:
+        """
+        The names of the fields to keep, or `None` to keep them all.
+        """
+        request = getattr(self, 'request', None)
+        if request is None or request.method != 'GET':
+            return None
+        fields = request.query_params.get('fields')
+        exclude = request.query_params.get('exclude')
+        if fields is None and exclude is None:
+            return None
+
+        names = readable_field_names(self.get_serializer_class())
+        selected = set(names)
+        for param, value in (('fields', fields), ('exclude', exclude)):
+            if value is None:
+                continue
+            given = {name for name in value.split(',') if name}
+            if not given <= set(names):
+                raise ValidationError({param: [f'Must be some of: {", ".join(names)}.']})
+            selected = selected & given if param == 'fields' else selected - given
+        return [name for name in names if name in selected]
+
+    def get_values_mapper(self):
+        # Of `ValuesReadMixin`
+        mapper = super().get_values_mapper()
+        names = self.get_field_names()
+        if mapper is None or names is None:
+            return mapper
+        return mapper.restrict(names)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        names = self.get_field_names()
+        serializer_class = self.get_serializer_class()
+        if names is None or queryset.model is not serializer_class.Meta.model:
+            return queryset
+
+        # Only if each of the fields which are kept has a column of its own (or is an embedded list)
+        serializer_fields = serializer_class().fields
+        columns = [queryset.model._meta.pk.name]
+        for name in names:
+            field = serializer_fields[name]
+            if isinstance(field, serializers.ListSerializer):
+                continue
+            try:
+                model_field = queryset.model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                return queryset
+            if not model_field.concrete:
+                return queryset
+            columns.append(model_field.name)
+        return queryset.only(*columns)
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        names = self.get_field_names()
+        if names is not None:
+            if isinstance(serializer, serializers.ListSerializer):
+                fields = serializer.child.fields
+            else:
+                fields = serializer.fields
+            for name in list(fields):
+                if name not in names:
+                    del fields[name]
+        return serializer
@@ -0,0 +1,116 @@
+from typing import Callable, Dict, Tuple
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connection
+from django.db.models import F
+from rest_framework.compat import coreapi, coreschema
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+# The text search configuration of the search vectors (see migration 0008)
+SEARCH_CONFIG = 'english'
+
+# The range of the (bigint) ID columns, which the values of the integer query parameters must be within
+MIN_BIGINT, MAX_BIGINT = connection.ops.integer_field_range('BigIntegerField')
+
+
+def parse_bigint(value: str) -> int:
+    """
+    `int`, which also rejects the values out of the range of the ID columns (e.g. `?post=99999999999999999999`),
+    which Postgres would fail to compare.
+    """
+    parsed = int(value)
+    if not MIN_BIGINT <= parsed <= MAX_BIGINT:
+        raise ValueError(f'{value!r} is out of range')
+    return parsed
+
+
+class QueryParamFilter(BaseFilterBackend):
+    """
+    Filters a list by the exact values of the query parameters, which are declared by the view as
+    `filter_params = {param: (lookup, parse)}`, e.g. `{'post': ('post_id', parse_bigint)}` for `?post=1`.
+    The lookups should be backed by indexes.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        filter_params: Dict[str, Tuple[str, Callable]] = getattr(view, 'filter_params', {})
+        lookups = {}
+        for param, (lookup, parse) in filter_params.items():
+            value = request.query_params.get(param)
+            if value is None:
+                continue
+            try:
+                lookups[lookup] = parse(value)
+            except ValueError:
+                raise ValidationError({param: [f'Invalid value {value!r}.']})
+        return queryset.filter(**lookups)
+
+    def get_schema_fields(self, view):
+        # Documents the query parameters in the API docs
+        return [
+            coreapi.Field(
+                name=param,
+                required=False,
+                location='query',
+                schema=coreschema.Integer() if parse in (int, parse_bigint) else coreschema.String(),
+            )
+            for param, (lookup, parse) in getattr(view, 'filter_params', {}).items()
+        ]
+
+
+class FullTextSearchFilter(BaseFilterBackend):
+    """
+    Filters a list by a full text search of `?search=` (in the syntax of web search engines, e.g.
+    `"exact phrase" -excluded or other`) in the `search_vector` of the model, which is backed by a GIN index.
+    The matches are ranked (best first, then in order of their IDs), except with cursor pagination, which
+    walks them in order of their IDs.
+    """
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.search_param, '').strip()
+        if not value:
+            return queryset
+
+        query = SearchQuery(value, search_type='websearch', config=SEARCH_CONFIG)
+        return (
+            queryset
+            .filter(search_vector=query)
+            .annotate(search_rank=SearchRank(F('search_vector'), query))
+            .order_by('-search_rank', 'id')
+        )
+
+    def get_schema_fields(self, view):
+        return [
+            coreapi.Field(name=self.search_param, required=False, location='query', schema=coreschema.String()),
+        ]
+
+
+class OrderingFilter(BaseFilterBackend):
+    """
+    Sorts a list by `?ordering=<field>` (or `-<field>` for descending order), one of the `ordering_fields` of the
+    view, with the ID as the tie breaker in the same direction, so that a page is read from a `(<field>, id)` index
+    in order. Cursor pagination walks the IDs regardless.
+    """
+    ordering_param = 'ordering'
+
+    def filter_queryset(self, request, queryset, view):
+        value = request.query_params.get(self.ordering_param)
+        if not value:
+            return queryset
+
+        fields = getattr(view, 'ordering_fields', ())
+        prefix = '-' if value.startswith('-') else ''
+        name = value[len(prefix):]
+        if name not in fields:
+            raise ValidationError({
+                self.ordering_param: [f'Must be one of: {", ".join(fields)} (prefixed with - for descending order).'],
+            })
+        if name == 'id':
+            return queryset.order_by(f'{prefix}id')
+        return queryset.order_by(f'{prefix}{name}', f'{prefix}id')
+
+    def get_schema_fields(self, view):
+        return [
+            coreapi.Field(name=self.ordering_param, required=False, location='query', schema=coreschema.String()),
+        ]
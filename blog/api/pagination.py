@@ -0,0 +1,176 @@
+from django.core.paginator import InvalidPage
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import CursorPagination, PageNumberPagination, _reverse_ordering
+
+
+class IdCursorPagination(CursorPagination):
+    """
+    Keyset pagination on the primary key: each page is fetched with `WHERE id > <cursor> ORDER BY id LIMIT n`,
+    so it takes the same time at any depth, and no total count is computed. `?order=desc` walks the IDs in
+    reverse order.
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    order_query_param = 'order'
+
+    def get_ordering(self, request, queryset, view):
+        # Always the primary key (even if the view can be sorted otherwise), since it is unique and indexed
+        order = request.query_params.get(self.order_query_param, 'asc')
+        if order not in ('asc', 'desc'):
+            raise ValidationError({self.order_query_param: ['Must be asc or desc.']})
+        return ('-id',) if order == 'desc' else ('id',)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.paginate_results(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        `paginate_queryset` with the async ORM.
+        """
+        queryset = self.page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self.paginate_results([item async for item in queryset])
+
+    def page_queryset(self, queryset, request, view=None):
+        """
+        The queryset of the page (and of the first item after it), or `None` if pagination is not configured for
+        the view (the first part of `CursorPagination.paginate_queryset`, which is split at the query).
+        """
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            self.position = (0, False, None)
+        else:
+            self.position = self.cursor
+        offset, reverse, current_position = self.position
+
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        if current_position is not None:
+            order = self.ordering[0]
+            order_attr = order.lstrip('-')
+            # (cursor reversed) XOR (queryset reversed)
+            if self.cursor.reverse != order.startswith('-'):
+                queryset = queryset.filter(**{order_attr + '__lt': current_position})
+            else:
+                queryset = queryset.filter(**{order_attr + '__gt': current_position})
+
+        # An extra item, to determine if there is a page following on from this one
+        return queryset[offset:offset + self.page_size + 1]
+
+    def paginate_results(self, results: list) -> list:
+        """
+        The page of the results of `page_queryset` (the second part of `CursorPagination.paginate_queryset`).
+        """
+        offset, reverse, current_position = self.position
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+        return self.page
+
+
+class BlogPagination(PageNumberPagination):
+    """
+    Page number pagination (with a total count) by default, or cursor pagination (see `IdCursorPagination`)
+    with `?pagination=cursor`, which is selected as well whenever a `?cursor=` is given (e.g. by following
+    a `next` link).
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    pagination_query_param = 'pagination'
+    cursor_pagination_class = IdCursorPagination
+
+    def get_mode(self, request) -> str:
+        mode = request.query_params.get(self.pagination_query_param)
+        if mode is None:
+            mode = 'cursor' if self.cursor_pagination_class.cursor_query_param in request.query_params else 'page'
+        if mode not in ('page', 'cursor'):
+            raise ValidationError({self.pagination_query_param: ['Must be page or cursor.']})
+        return mode
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_paginator = None
+        if self.get_mode(request) == 'page':
+            return super().paginate_queryset(queryset, request, view)
+
+        self.cursor_paginator = self.cursor_pagination_class()
+        page = self.cursor_paginator.paginate_queryset(queryset, request, view)
+        self.display_page_controls = self.cursor_paginator.display_page_controls
+        return page
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        `paginate_queryset` with the async ORM.
+        """
+        self.cursor_paginator = None
+        if self.get_mode(request) == 'cursor':
+            self.cursor_paginator = self.cursor_pagination_class()
+            page = await self.cursor_paginator.apaginate_queryset(queryset, request, view)
+            self.display_page_controls = self.cursor_paginator.display_page_controls
+            return page
+
+        # Like `PageNumberPagination.paginate_queryset`, with the count and the page queried in turn
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        paginator = self.django_paginator_class(queryset, page_size)
+        paginator.count = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [item async for item in self.page.object_list]
+
+        if paginator.num_pages > 1 and self.template is not None:
+            self.display_page_controls = True
+        self.request = request
+        return list(self.page)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def to_html(self):
+        if self.cursor_paginator is not None:
+            return self.cursor_paginator.to_html()
+        return super().to_html()
@@ -0,0 +1,52 @@
+import orjson
+from rest_framework.renderers import JSONRenderer
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Renders the same (compact, UTF-8) JSON as `JSONRenderer`, with `orjson`, which is several times faster
+    than `json.dumps` with an encoder class. Indented or ASCII-only JSON, and data which `orjson` can not
+    encode (e.g. integers of more than 64 bits), are rendered by `JSONRenderer`.
+
+    Floats are written in the shortest form which `orjson` finds, e.g. `1e16` rather than `1e+16`, and `NaN`
+    as `null` (no field of the API is a float).
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if (
+            self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {}) is not None
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        try:
+            ret = orjson.dumps(
+                data,
+                # Dates, times and dataclasses are encoded like `JSONEncoder` does
+                default=self.encoder_class().default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS,
+            )
+        except TypeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Escaped like `JSONRenderer` does, so that the JSON is a strict subset of JavaScript
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class NDJSONRenderer(FastJSONRenderer):
+    """
+    Newline delimited JSON: a line for each item of a list (or one line for anything else, e.g. errors).
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        items = data if isinstance(data, list) else [data]
+        return b''.join(super(NDJSONRenderer, self).render(item) + b'\n' for item in items)
@@ -1,5 +1,6 @@
 from rest_framework import serializers
 
+from blog.api.bulk import BulkListSerializer
 from blog.models.comment import Comment
 
 
@@ -8,3 +9,4 @@ class CommentSerializer(serializers.ModelSerializer):
     class Meta:
         model = Comment
         fields = ('id', 'post', 'name', 'email', 'body')
+        list_serializer_class = BulkListSerializer
@@ -1,9 +1,30 @@
 from rest_framework.viewsets import ModelViewSet
 
+from blog.api.asynchronous import AsyncReadMixin
+from blog.api.bulk import BulkMixin
+from blog.api.conditional import ConditionalGetMixin
+from blog.api.export import ExportMixin
+from blog.api.fields import SparseFieldsMixin
+from blog.api.filters import FullTextSearchFilter, QueryParamFilter, parse_bigint
+from blog.api.values import ValuesReadMixin
 from blog.models.comment import Comment
 from blog.api.v1.comment.serializers import CommentSerializer
 
 
-class CommentView(ModelViewSet):
-    queryset = Comment.objects.all()
+class CommentView(
+        AsyncReadMixin, ConditionalGetMixin, SparseFieldsMixin, ValuesReadMixin, ExportMixin, BulkMixin, ModelViewSet,
+):
+    queryset = Comment.objects.order_by('id')
     serializer_class = CommentSerializer
+    filter_backends = [QueryParamFilter, FullTextSearchFilter]
+    filter_params = {
+        'post': ('post_id', parse_bigint),
+        'email': ('email', str),
+        'user_id': ('post__user_id', parse_bigint),
+    }
+
+    def etag_collections(self):
+        # `?user_id=` filters by a column of the posts, so the list changes along with them as well
+        if 'user_id' in self.request.query_params:
+            return ['comment', 'post']
+        return ['comment']
@@ -1,6 +1,8 @@
 from rest_framework import serializers
 
+from blog.api.bulk import BulkListSerializer
 from blog.models.post import Post
+from blog.api.v1.comment.serializers import CommentSerializer
 
 
 class PostSerializer(serializers.ModelSerializer):
@@ -8,10 +10,19 @@ class PostSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Post
-        fields = ('id', 'title', 'body', 'user_id')
+        fields = ('id', 'title', 'body', 'user_id', 'comment_count')
         ref_name = 'V1PostSerializer'
+        list_serializer_class = BulkListSerializer
 
     def validate(self, attrs):
-        if self.context['view'].action == 'create':
+        if self.context['view'].action in ('create', 'bulk_create'):
             attrs['user_id'] = 99999942
         return attrs
+
+
+class PostWithCommentsSerializer(PostSerializer):
+    comments = CommentSerializer(source='comment_set', many=True, read_only=True)
+
+    class Meta(PostSerializer.Meta):
+        fields = PostSerializer.Meta.fields + ('comments',)
+        ref_name = 'V1PostWithCommentsSerializer'
@@ -1,9 +1,69 @@
+from django.db.models import Prefetch
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.viewsets import ModelViewSet
 
+from blog.api.asynchronous import AsyncReadMixin
+from blog.api.bulk import BulkMixin
+from blog.api.conditional import ConditionalGetMixin
+from blog.api.export import ExportMixin
+from blog.api.fields import SparseFieldsMixin
+from blog.api.filters import FullTextSearchFilter, OrderingFilter, QueryParamFilter, parse_bigint
+from blog.api.values import ValuesReadMixin
 from blog.models.post import Post
-from blog.api.v1.post.serializers import PostSerializer
+from blog.models.comment import Comment
+from blog.api.v1.comment.serializers import CommentSerializer
+from blog.api.v1.post.serializers import PostSerializer, PostWithCommentsSerializer
 
+INCLUDES = ('comments',)
 
-class PostView(ModelViewSet):
-    queryset = Post.objects.all()
+
+class PostView(
+        AsyncReadMixin, ConditionalGetMixin, SparseFieldsMixin, ValuesReadMixin, ExportMixin, BulkMixin, ModelViewSet,
+):
+    queryset = Post.objects.order_by('id')
     serializer_class = PostSerializer
+    filter_backends = [QueryParamFilter, FullTextSearchFilter, OrderingFilter]
+    filter_params = {
+        'user_id': ('user_id', parse_bigint),
+    }
+    # Each backed by an `(…, id)` index
+    ordering_fields = ('id', 'comment_count')
+    etag_fields = ('fingerprint', 'comment_count')
+
+    def includes(self) -> set:
+        """
+        The related items to embed in the posts, given as `?include=comments`.
+        """
+        includes = {name for name in self.request.query_params.get('include', '').split(',') if name}
+        if not includes <= set(INCLUDES):
+            raise ValidationError({'include': [f'Must be one of: {", ".join(INCLUDES)}.']})
+        return includes
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in ('list', 'retrieve') and 'comments' in self.includes():
+            # The comments of a whole page of posts are fetched with one query
+            queryset = queryset.prefetch_related(Prefetch('comment_set', queryset=Comment.objects.order_by('id')))
+        return queryset
+
+    def etag_collections(self):
+        if self.action == 'comments' or 'comments' in self.includes():
+            return ['post', 'comment']
+        return ['post']
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve') and 'comments' in self.includes():
+            return PostWithCommentsSerializer
+        return super().get_serializer_class()
+
+    @action(detail=True, serializer_class=CommentSerializer, filter_backends=[])
+    def comments(self, request, pk=None):
+        """
+        The comments of a post (paginated like the comments list).
+        """
+        def get_response():
+            post = self.get_object()
+            return self.list_response(Comment.objects.filter(post_id=post.id).order_by('id'))
+
+        return self.conditional(get_response)
@@ -0,0 +1,264 @@
+from collections import defaultdict
+from functools import lru_cache
+from operator import itemgetter
+from typing import Callable, Iterable, List, Optional, Tuple
+
+from asgiref.sync import sync_to_async
+from django.core.exceptions import FieldDoesNotExist, ValidationError as DjangoValidationError
+from django.db import models
+from django.http import Http404
+from rest_framework import serializers
+from rest_framework.generics import get_object_or_404
+from rest_framework.response import Response
+
+# Serializer fields whose representation of an integer or a string is the value itself (exactly these classes,
+# since subclasses may override `to_representation`), and the model fields whose values are integers or strings
+PLAIN_FIELDS = (serializers.IntegerField, serializers.CharField, serializers.EmailField)
+PLAIN_MODEL_FIELDS = (models.IntegerField, models.CharField, models.TextField)
+
+
+def tuple_getter(keys: List[str]) -> Callable[[dict], tuple]:
+    """
+    `itemgetter(*keys)`, which returns a tuple for any number of keys.
+    """
+    if len(keys) == 1:
+        key = keys[0]
+        return lambda row: (row[key],)
+    return itemgetter(*keys) if keys else lambda row: ()
+
+
+class ValuesMapper:
+    """
+    Maps the rows of `queryset.values(*columns)` to the representations of a model serializer (with the same
+    keys in the same order), without the serializer, with a function which is built once per serializer.
+
+    Embedded lists of related items (e.g. `comments = CommentSerializer(source='comment_set', many=True)`)
+    are fetched with one query per list of rows, in order of their primary keys.
+    """
+
+    def __init__(
+            self,
+            model_class,
+            fields: List[Tuple[str, Optional[str]]],
+            embedded: List[Tuple[str, models.ForeignKey, 'ValuesMapper']],
+    ):
+        self.model_class = model_class
+        self.fields = fields
+        self.embedded = embedded
+        # The primary key is always queried (e.g. for the position of a cursor), and the embedded items are
+        # grouped by the value which their foreign key refers to
+        columns = [model_class._meta.pk.attname]
+        columns += [column for key, column in fields if column is not None]
+        columns += [field.target_field.attname for key, field, mapper in embedded]
+        self.columns = tuple(dict.fromkeys(columns))
+        self._restricted = {}
+
+        embedded_keys = {key for key, field, mapper in embedded}
+        keys = tuple(key for key, column in fields if key not in embedded_keys)
+        get_values = tuple_getter([column for key, column in fields if key not in embedded_keys])
+        if embedded_keys:
+            # The embedded lists are filled in by `embed`, in the position of their keys
+            template = dict.fromkeys(key for key, column in fields)
+
+            def map_row(row: dict) -> dict:
+                item = template.copy()
+                item.update(zip(keys, get_values(row)))
+                return item
+        else:
+            def map_row(row: dict) -> dict:
+                return dict(zip(keys, get_values(row)))
+        self.map_row = map_row
+
+    def restrict(self, keys: Iterable[str]) -> 'ValuesMapper':
+        """
+        The mapper of only the given keys (e.g. of a sparse fieldset), which queries only their columns.
+        """
+        keys = frozenset(keys)
+        if keys not in self._restricted:
+            self._restricted[keys] = ValuesMapper(
+                self.model_class,
+                [(key, column) for key, column in self.fields if key in keys],
+                [(key, field, mapper) for key, field, mapper in self.embedded if key in keys],
+            )
+        return self._restricted[keys]
+
+    def map_rows(self, rows: Iterable[dict]) -> List[dict]:
+        rows = list(rows)
+        items = list(map(self.map_row, rows))
+        for key, field, mapper in self.embedded:
+            queryset = self.related_queryset(rows, field, mapper)
+            related_rows = list(queryset) if queryset is not None else []
+            self.embed(rows, items, key, field, related_rows, mapper.map_rows(related_rows))
+        return items
+
+    async def amap_rows(self, rows: List[dict]) -> List[dict]:
+        """
+        `map_rows` with the async ORM.
+        """
+        items = list(map(self.map_row, rows))
+        for key, field, mapper in self.embedded:
+            queryset = self.related_queryset(rows, field, mapper)
+            related_rows = [row async for row in queryset] if queryset is not None else []
+            self.embed(rows, items, key, field, related_rows, await mapper.amap_rows(related_rows))
+        return items
+
+    @staticmethod
+    def related_queryset(rows: List[dict], field: models.ForeignKey, mapper: 'ValuesMapper'):
+        """
+        The rows of the items which refer to the given rows with the foreign key, or `None` if there are none.
+        """
+        values = {row[field.target_field.attname] for row in rows}
+        if not values:
+            return None
+        return (
+            field.model._default_manager
+            .filter(**{f'{field.attname}__in': values})
+            .order_by('pk')
+            .values(*dict.fromkeys(mapper.columns + (field.attname,)))
+        )
+
+    @staticmethod
+    def embed(
+            rows: List[dict],
+            items: List[dict],
+            key: str,
+            field: models.ForeignKey,
+            related_rows: List[dict],
+            related_items: List[dict],
+    ):
+        related = defaultdict(list)
+        for related_row, related_item in zip(related_rows, related_items):
+            related[related_row[field.attname]].append(related_item)
+        target = field.target_field.attname
+        for row, item in zip(rows, items):
+            item[key] = related.get(row[target], [])
+
+
+def _reverse_foreign_key(model_class, accessor: str) -> Optional[models.ForeignKey]:
+    for relation in model_class._meta.related_objects:
+        if relation.one_to_many and relation.get_accessor_name() == accessor:
+            return relation.field
+    return None
+
+
+@lru_cache(maxsize=None)
+def values_mapper(serializer_class) -> Optional[ValuesMapper]:
+    """
+    The mapper of a model serializer, or `None` if any of its fields is not a plain column (or a primary key
+    related field, or a list of related items whose serializer has a mapper as well).
+    """
+    if not issubclass(serializer_class, serializers.ModelSerializer):
+        return None
+    model_class = serializer_class.Meta.model
+    fields = []
+    embedded = []
+    for key, field in serializer_class().fields.items():
+        if field.write_only:
+            continue
+        if isinstance(field, serializers.ListSerializer):
+            foreign_key = _reverse_foreign_key(model_class, field.source)
+            mapper = values_mapper(type(field.child)) if foreign_key is not None else None
+            if mapper is None:
+                return None
+            fields.append((key, None))
+            embedded.append((key, foreign_key, mapper))
+            continue
+
+        try:
+            model_field = model_class._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+        if type(field) is serializers.PrimaryKeyRelatedField and field.pk_field is None and model_field.many_to_one:
+            # The representation is the primary key of the related item, i.e. the value of the foreign key
+            fields.append((key, model_field.attname))
+        elif type(field) in PLAIN_FIELDS and isinstance(model_field, PLAIN_MODEL_FIELDS):
+            fields.append((key, model_field.attname))
+        else:
+            return None
+    return ValuesMapper(model_class, fields, embedded)
+
+
+class ValuesReadMixin:
+    """
+    Reads of a `ModelViewSet` without its serializer: the rows are queried with `values()`, and mapped to
+    the same representations by the `ValuesMapper` of the serializer class, which is several times cheaper
+    for a page of items. Views whose serializer has no mapper (see `values_mapper`) use it as usual.
+    """
+
+    # Whether reads use the mapper (e.g. disabled to compare both paths)
+    values_read = True
+
+    def get_values_mapper(self) -> Optional[ValuesMapper]:
+        if not self.values_read:
+            return None
+        return values_mapper(self.get_serializer_class())
+
+    def list_response(self, queryset) -> Response:
+        """
+        The (paginated) response to a list of the items of the given queryset.
+        """
+        mapper = self.get_values_mapper()
+        if mapper is None:
+            page = self.paginate_queryset(queryset)
+            if page is not None:
+                return self.get_paginated_response(self.get_serializer(page, many=True).data)
+            return Response(self.get_serializer(queryset, many=True).data)
+
+        # Related items are fetched by the mapper instead
+        queryset = queryset.prefetch_related(None).values(*mapper.columns)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(mapper.map_rows(page))
+        return Response(mapper.map_rows(queryset))
+
+    async def alist_response(self, queryset) -> Response:
+        """
+        `list_response` with the async ORM.
+        """
+        mapper = self.get_values_mapper()
+        if mapper is None:
+            return await sync_to_async(self.list_response)(queryset)
+
+        queryset = queryset.prefetch_related(None).values(*mapper.columns)
+        page = await self.apaginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(await mapper.amap_rows(page))
+        return Response(await mapper.amap_rows([row async for row in queryset]))
+
+    async def apaginate_queryset(self, queryset):
+        if self.paginator is None:
+            return None
+        return await self.paginator.apaginate_queryset(queryset, self.request, view=self)
+
+    def list(self, request, *args, **kwargs):
+        return self.list_response(self.filter_queryset(self.get_queryset()))
+
+    async def alist(self, request, *args, **kwargs):
+        return await self.alist_response(self.filter_queryset(self.get_queryset()))
+
+    def retrieve(self, request, *args, **kwargs):
+        mapper = self.get_values_mapper()
+        if mapper is None:
+            return super().retrieve(request, *args, **kwargs)
+
+        # Like `get_object`, but the object permissions are checked with the row
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).values(*mapper.columns)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        row = get_object_or_404(queryset, **{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        self.check_object_permissions(request, row)
+        return Response(mapper.map_rows([row])[0])
+
+    async def aretrieve(self, request, *args, **kwargs):
+        mapper = self.get_values_mapper()
+        if mapper is None:
+            return await sync_to_async(super().retrieve)(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related(None).values(*mapper.columns)
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            row = await queryset.aget(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        except (queryset.model.DoesNotExist, TypeError, ValueError, DjangoValidationError):
+            # As `get_object_or_404` does
+            raise Http404
+        self.check_object_permissions(request, row)
+        return Response((await mapper.amap_rows([row]))[0])
@@ -0,0 +1,36 @@
+from typing import Optional, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from blog.models.token import TokenVersion
+
+USER_CACHE_KEY = 'blog.jwt_user.{}'
+
+
+def invalidate_user(user_id):
+    """
+    Drops the cached user (of `CachedJWTAuthentication`), e.g. once it is deactivated or its password changes.
+    """
+    cache.delete(USER_CACHE_KEY.format(user_id))
+
+
+def get_cached_user(user_id) -> Optional[Tuple[object, int]]:
+    """
+    The cached user and the version of its tokens (see `TokenVersion`), or `None` if they are not cached.
+    """
+    return cache.get(USER_CACHE_KEY.format(user_id))
+
+
+def cache_user(user, token_version: int):
+    cache.set(USER_CACHE_KEY.format(user.pk), (user, token_version), settings.JWT_USER_CACHE_TIMEOUT)
+
+
+def revoke_tokens(user_id):
+    """
+    Rejects all the tokens which are issued to the user so far, by bumping the version of its tokens in the DB.
+
+    The cached user of this process is dropped, other processes see the new version once their entries expire.
+    """
+    TokenVersion.bump(user_id)
+    invalidate_user(user_id)
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.outbox import suppress_change_tracking
+from blog.sync.utils import chunk_list
+
+
+class Command(BaseCommand):
+    help = 'Compute the content fingerprints of posts and comments, which do not have one yet'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute the fingerprints of all the records, not only the missing ones',
+        )
+        parser.add_argument(
+            '--mark-synced',
+            action='store_true',
+            help='Consider the current records to be in sync with the external API',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        fields = ['fingerprint', 'synced_fingerprint'] if options['mark_synced'] else ['fingerprint']
+
+        for model_class in (Post, Comment):
+            items = model_class.objects.order_by('pk')
+            if not options['all']:
+                items = items.filter(fingerprint='')
+
+            count = 0
+            # Only the fingerprints change, so nothing is recorded in the outbox
+            with suppress_change_tracking():
+                for chunk in chunk_list(items.iterator(chunk_size=batch_size), batch_size):
+                    for item in chunk:
+                        item.set_fingerprint(synced=options['mark_synced'])
+                    model_class.objects.bulk_update(chunk, fields)
+                    count += len(chunk)
+
+            self.stdout.write(f'Backfilled fingerprints of {count} {model_class._meta.verbose_name_plural}')
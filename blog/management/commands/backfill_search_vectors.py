@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+
+# The same vectors as the triggers of migration 0008 (which only set the ones of the rows written since)
+BACKFILL = {
+    Post: '''
+        UPDATE blog_post SET search_vector =
+            setweight(to_tsvector('english', coalesce(title, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(body, '')), 'B')
+        WHERE id BETWEEN %s AND %s AND (search_vector IS NULL OR %s)
+    ''',
+    Comment: '''
+        UPDATE blog_comment SET search_vector =
+            setweight(to_tsvector('english', coalesce(name, '')), 'A')
+            || setweight(to_tsvector('english', coalesce(body, '')), 'B')
+        WHERE id BETWEEN %s AND %s AND (search_vector IS NULL OR %s)
+    ''',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compute the full text search vectors of posts and comments, which do not have one yet (the rows written '
+        'before migration 0008), in batches'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recompute the search vectors of all the records, not only the missing ones',
+        )
+        parser.add_argument('--batch-size', type=int, default=10000, help='Number of IDs per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        for model_class, backfill in BACKFILL.items():
+            last_id = model_class.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+            count = 0
+            with connection.cursor() as cursor:
+                # One short transaction per batch, so that the rows are only locked while their batch is updated
+                for low in range(1, last_id + 1, batch_size):
+                    with transaction.atomic():
+                        cursor.execute(backfill, [low, low + batch_size - 1, options['all']])
+                        count += cursor.rowcount
+
+            self.stdout.write(f'Backfilled search vectors of {count} {model_class._meta.verbose_name_plural}')
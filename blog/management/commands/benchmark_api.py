@@ -0,0 +1,122 @@
+from itertools import cycle
+from typing import List
+import json
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from blog.api.v1.comment.views import CommentView
+from blog.api.v1.post.views import PostView
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.sync.ingest import CopyWriter
+from blog.testing.upstream import make_comment, make_post
+
+# `(name, view class, action, query parameters)`, where `{post_id}` is replaced by the ID of a post
+ENDPOINTS = (
+    ('posts', PostView, 'list', {}),
+    ('posts?include=comments', PostView, 'list', {'include': 'comments'}),
+    ('posts?pagination=cursor', PostView, 'list', {'pagination': 'cursor'}),
+    ('comments', CommentView, 'list', {}),
+    ('posts/{id}', PostView, 'retrieve', {}),
+    ('posts/{id}?include=comments', PostView, 'retrieve', {'include': 'comments'}),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark the reads of the API with the serializers and with the values mappers (see `ValuesReadMixin`), '
+        'in a separate (test) DB'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=10000)
+        parser.add_argument('--comments-per-post', type=int, default=5)
+        parser.add_argument('--page-size', type=int, default=100)
+        parser.add_argument('--requests', type=int, default=200, help='Number of requests per endpoint and path')
+        parser.add_argument('--output', default=None, help='Write the results as JSON to this file')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the benchmark DB between runs')
+
+    def handle(self, *args, **options):
+        old_db_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        try:
+            self.populate(options['posts'], options['comments_per_post'])
+            results = self.benchmark(options)
+        finally:
+            connection.creation.destroy_test_db(old_db_name, verbosity=0, keepdb=options['keepdb'])
+
+        self.stdout.write(f'{"endpoint":<30} {"path":<10} {"CPU ms/page":>12} {"ms/page":>9} {"CPU speedup":>12}')
+        for result in results:
+            speedup = f'{result["cpu_speedup"]:.1f}x' if 'cpu_speedup' in result else ''
+            self.stdout.write(
+                f'{result["endpoint"]:<30} {result["path"]:<10} {result["cpu_ms"]:>12.2f} '
+                f'{result["elapsed_ms"]:>9.2f} {speedup:>12}'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(results, output_file, indent=2)
+
+    @staticmethod
+    def populate(posts: int, comments_per_post: int):
+        with connection.cursor() as cursor:
+            cursor.execute(f'TRUNCATE {Comment._meta.db_table}, {Post._meta.db_table}')
+        with transaction.atomic():
+            with CopyWriter(Post) as writer:
+                writer.write_rows(Post.external_row(make_post(post_id)) for post_id in range(1, posts + 1))
+            with CopyWriter(Comment) as writer:
+                writer.write_rows(
+                    Comment.external_row(make_comment(comment_id, comments_per_post))
+                    for comment_id in range(1, posts * comments_per_post + 1)
+                )
+
+    def benchmark(self, options: dict) -> List[dict]:
+        user, _ = get_user_model().objects.get_or_create(username='benchmark_api')
+        factory = APIRequestFactory()
+        pages = max(1, options['posts'] // options['page_size'])
+        results = []
+        for name, view_class, view_action, params in ENDPOINTS:
+            by_path = {}
+            for path, values_read in (('serializer', False), ('values', True)):
+                # The sync views, which are called directly
+                view = view_class.as_view({'get': view_action}, values_read=values_read, async_actions=())
+                # Different pages (or posts), so that the ETags and the DB caches do not favour either path
+                numbers = cycle(range(1, pages + 1))
+                requests = []
+                for _ in range(options['requests']):
+                    number = next(numbers)
+                    kwargs = {'pk': number} if view_action == 'retrieve' else {}
+                    query = {'page_size': options['page_size'], **params}
+                    if view_action == 'list' and 'pagination' not in params:
+                        query['page'] = number
+                    request = factory.get(f'/{name}', query, HTTP_HOST='localhost')
+                    force_authenticate(request, user)
+                    requests.append((request, kwargs))
+
+                by_path[path] = self.measure(view, requests[:10], requests)
+                results.append({'endpoint': name, 'path': path, **by_path[path]})
+
+            if by_path['values']['cpu_ms']:
+                results[-1]['cpu_speedup'] = by_path['serializer']['cpu_ms'] / by_path['values']['cpu_ms']
+        return results
+
+    @staticmethod
+    def measure(view, warmup: list, requests: list) -> dict:
+        for request, kwargs in warmup:
+            view(request, **kwargs).render()
+
+        started_at = time.perf_counter()
+        cpu_started_at = time.process_time()
+        for request, kwargs in requests:
+            response = view(request, **kwargs).render()
+            if response.status_code != 200:
+                raise AssertionError(f'{request.get_full_path()} got {response.status_code}: {response.content[:200]}')
+        return {
+            'requests': len(requests),
+            'cpu_ms': (time.process_time() - cpu_started_at) * 1000 / len(requests),
+            'elapsed_ms': (time.perf_counter() - started_at) * 1000 / len(requests),
+        }
@@ -0,0 +1,164 @@
+from io import StringIO
+from typing import List
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Value
+from django.db.models.functions import Concat
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.outbox import OutboxEntry
+from blog.sync.utils import peak_memory_mb
+from blog.testing.upstream import FakeUpstream, serve_in_thread
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark bootstrap_blog and synchronize against a local fake external API, with datasets of the '
+        'given sizes, in a separate (test) DB'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            default='10000,100000,1000000',
+            help='Comma separated numbers of posts, a benchmark is run for each of them',
+        )
+        parser.add_argument('--comments-per-post', type=int, default=5)
+        parser.add_argument('--latency', type=float, default=0.0, help='Average latency of the fake API, in seconds')
+        parser.add_argument('--error-rate', type=float, default=0.0, help='Ratio of requests failing with 503')
+        parser.add_argument(
+            '--change-ratio',
+            type=float,
+            default=0.01,
+            help='Ratio of the posts and comments, which are changed locally before synchronize',
+        )
+        parser.add_argument('--bootstrap-args', default='', help='Extra arguments of bootstrap_blog')
+        parser.add_argument('--synchronize-args', default='', help='Extra arguments of synchronize')
+        parser.add_argument('--output', default=None, help='Write the results as JSON to this file')
+        parser.add_argument('--keepdb', action='store_true', help='Keep the benchmark DB between runs')
+        # Internal: measure a single command, in a separate process (so that its peak memory is its own)
+        parser.add_argument('--measure', default=None, help='(internal) Measure the given command')
+        parser.add_argument('--measure-args', default='', help='(internal) Arguments of the measured command')
+
+    def handle(self, *args, **options):
+        if options['measure']:
+            self.measure(options['measure'], shlex.split(options['measure_args']))
+            return
+
+        try:
+            sizes = [int(size) for size in options['sizes'].split(',')]
+        except ValueError:
+            raise CommandError(f'Invalid --sizes {options["sizes"]!r}, e.g. 10000,100000')
+
+        old_db_name = connection.settings_dict['NAME']
+        db_name = connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=options['keepdb'])
+        results = []
+        try:
+            for size in sizes:
+                results += self.benchmark(size, db_name, options)
+        finally:
+            connection.creation.destroy_test_db(old_db_name, verbosity=0, keepdb=options['keepdb'])
+
+        self.stdout.write(
+            f'{"posts":>9} {"command":<36} {"seconds":>9} {"items/s":>10} {"requests":>9} {"queries":>8} {"MB":>7}'
+        )
+        for result in results:
+            self.stdout.write(
+                f'{result["posts"]:>9} {result["command"]:<36} {result["elapsed"]:>9.2f} '
+                f'{result["items_per_second"]:>10.0f} {result["requests"]:>9} {result["queries"]:>8} '
+                f'{result["peak_memory_mb"]:>7.1f}'
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                json.dump(results, output_file, indent=2)
+
+    def benchmark(self, size: int, db_name: str, options: dict) -> List[dict]:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'TRUNCATE {Comment._meta.db_table}, {Post._meta.db_table}, {OutboxEntry._meta.db_table}'
+            )
+
+        upstream = FakeUpstream(
+            posts=size,
+            comments_per_post=options['comments_per_post'],
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+        )
+        total_items = size * (1 + options['comments_per_post'])
+        changed_items = int(size * options['change_ratio'])
+        with serve_in_thread(upstream) as base_url:
+            environment = {**os.environ, 'EXTERNAL_API_URL': base_url, 'DB_NAME': db_name}
+
+            def run(command: str, command_args: str, items: int) -> dict:
+                requests_before = sum(upstream.request_counts.values())
+                result = self.run_measured(command, command_args, environment)
+                return {
+                    'posts': size,
+                    'command': f'{command} {command_args}'.strip(),
+                    **result,
+                    'items': items,
+                    'items_per_second': items / result['elapsed'] if result['elapsed'] else 0.0,
+                    'requests': sum(upstream.request_counts.values()) - requests_before,
+                }
+
+            results = [run('bootstrap_blog', options['bootstrap_args'], total_items)]
+
+            # Recorded in the outbox, like any other local change
+            Post.objects.filter(id__lte=changed_items).update(title=Concat('title', Value(' (edited)')))
+            Comment.objects.filter(id__lte=changed_items).update(body=Concat('body', Value(' (edited)')))
+            results.append(run('synchronize', options['synchronize_args'], changed_items * 2))
+
+            results.append(run('synchronize', f'--full {options["synchronize_args"]}', total_items))
+        return results
+
+    @staticmethod
+    def run_measured(command: str, command_args: str, environment: dict) -> dict:
+        process = subprocess.run(
+            [
+                sys.executable, '-m', 'django', 'benchmark_sync',
+                '--settings', settings.SETTINGS_MODULE,
+                '--measure', command,
+                '--measure-args', command_args,
+            ],
+            cwd=settings.BASE_DIR,
+            env=environment,
+            capture_output=True,
+            text=True,
+        )
+        if process.returncode != 0:
+            raise CommandError(f'{command} {command_args} failed:\n{process.stderr}')
+        # The measurements are the last line of the output
+        return json.loads(process.stdout.strip().splitlines()[-1])
+
+    def measure(self, command: str, command_args: List[str]):
+        queries = 0
+
+        def count_queries(execute, sql, params, many, context):
+            nonlocal queries
+            queries += 1
+            return execute(sql, params, many, context)
+
+        output = StringIO()
+        started_at = time.monotonic()
+        # `COPY` statements are not counted, since they do not go through `execute`
+        with connection.execute_wrapper(count_queries):
+            call_command(command, *command_args, stdout=output)
+        elapsed = time.monotonic() - started_at
+
+        self.stdout.write(output.getvalue())
+        self.stdout.write(json.dumps({
+            'elapsed': elapsed,
+            'queries': queries,
+            'peak_memory_mb': peak_memory_mb(children=True),
+        }))
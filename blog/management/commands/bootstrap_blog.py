@@ -1,102 +1,349 @@
-from itertools import islice
-from typing import List
+from contextlib import closing
+from typing import Awaitable, Callable, List, Set
 import asyncio
-import io
+import logging
 
-from django.db import connection
 from django.core.management.base import BaseCommand, CommandError
 from django.core.management import call_command
 from django.db import transaction
 from django.conf import settings
-import requests
-import aiohttp
 
 from blog.models.post import Post
 from blog.models.comment import Comment
+from blog.models.checkpoint import ImportCheckpoint
+from blog.sync.fetch import DEFAULT_PAGE_SIZE, aiter_pages, fetch_list
+from blog.sync.http import HttpEngine, add_http_arguments
+from blog.sync.ingest import DEFAULT_COPY_BATCH_SIZE, CopyWriter, PageProgress, reset_sequences
+from blog.sync.pipeline import DEFAULT_QUEUE_SIZE, FetchPipeline, gather_all
+from blog.sync.utils import peak_memory_mb
 
+COMMENTS_SOURCES = ('auto', 'bulk', 'per-post')
 
-def chunk_list(lst, chunk_size):
-    it = iter(lst)
-    chunk = list(islice(it, chunk_size))
-    while chunk:
-        yield chunk
-        chunk = list(islice(it, chunk_size))
+CHECKPOINT_NAME = 'bootstrap_blog'
 
+DEFAULT_COMMIT_SIZE = 50000
 
-async def fetch_json(session, url):
-    async with session.get(url) as response:
-        return await response.json()
+logger = logging.getLogger(__name__)
 
+Put = Callable[[tuple], Awaitable]
 
-async def process_item(session, post: Post) -> List[Comment]:
-    url = settings.COMMENTS_BY_POST_URL.format(post.id)
-    comments_data = await fetch_json(session, url)
-    return [
-        Comment(
-            post=post,
-            id=comment_data['id'],
-            name=comment_data['name'],
-            email=comment_data['email'],
-            body=comment_data['body']
-        ) for comment_data in comments_data
-    ]
 
+async def process_item(session, post_id: int) -> List[tuple]:
+    url = settings.COMMENTS_BY_POST_URL.format(post_id)
+    comments_data = await fetch_list(session, url)
+    return [Comment.external_row(comment_data, post_id=post_id) for comment_data in comments_data]
 
-async def process_items(chunk: List[Post]):
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(verify_ssl=False)) as session:
-        tasks = [process_item(session, post) for post in chunk]
-        results = await asyncio.gather(*tasks)
-        return results
+
+async def process_items(engine: HttpEngine, post_ids: List[int]) -> List[List[tuple]]:
+    # The number of concurrent requests is bounded by the engine
+    tasks = [engine.call(process_item, post_id) for post_id in post_ids]
+    results = await asyncio.gather(*tasks)
+    return results
+
+
+async def supports_bulk_comments(engine: HttpEngine) -> bool:
+    """
+    Whether the bulk comments listing can be fetched page by page, otherwise it would be fetched
+    (and held in memory) all at once, so the comments are rather fetched post by post.
+    """
+    try:
+        comments_data = await engine.call(fetch_list, settings.COMMENTS_URL, {'_start': 0, '_limit': 1})
+    except Exception as e:
+        logger.warning(f'The bulk comments listing is not available: {e!r}')
+        return False
+    return len(comments_data) <= 1
+
+
+async def fetch_posts(
+        engine: HttpEngine,
+        put: Put,
+        page_size: int,
+        fetchers: int,
+        comments_per_post: bool,
+        start: int = 0,
+):
+    """
+    Fetch the posts page by page (from the `start`th one), and (if `comments_per_post`) the comments
+    of each page of posts, with one request per post, for up to `fetchers` pages at once.
+
+    Each page is put along with its offset in the posts listing (the comments of a page as well).
+    """
+    pages = aiter_pages(engine, settings.POSTS_URL, page_size=page_size, start=start)
+    pages_in_flight = asyncio.Semaphore(fetchers)
+    tasks: Set[asyncio.Task] = set()
+
+    async def fetch_comments(post_ids: List[int], page_start: int):
+        try:
+            comment_chunks = await process_items(engine, post_ids)
+            await put((Comment, [row for comment_rows in comment_chunks for row in comment_rows], page_start))
+        finally:
+            pages_in_flight.release()
+
+    try:
+        async for posts_data in pages:
+            page_start = start
+            start += page_size
+            await put((Post, [Post.external_row(post_data) for post_data in posts_data], page_start))
+            if not comments_per_post:
+                continue
+
+            await pages_in_flight.acquire()
+            for task in [task for task in tasks if task.done()]:
+                tasks.remove(task)
+                task.result()  # Raises if the comments of a page could not be fetched
+            tasks.add(asyncio.ensure_future(fetch_comments([post_data['id'] for post_data in posts_data], page_start)))
+
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def fetch_bulk_comments(engine: HttpEngine, put: Put, page_size: int, fetchers: int, start: int = 0):
+    """
+    Fetch the bulk comments listing (from the `start`th comment), up to `fetchers` pages at once,
+    until a page is not full. Each page is put along with its offset.
+    """
+    next_start = start
+    done = False
+
+    async def fetch_pages():
+        nonlocal next_start, done
+        while not done:
+            start = next_start
+            next_start += page_size
+            comments_data = await engine.call(
+                fetch_list, settings.COMMENTS_URL, {'_start': start, '_limit': page_size}
+            )
+            if len(comments_data) < page_size:
+                done = True
+            if comments_data:
+                await put((Comment, [Comment.external_row(comment_data) for comment_data in comments_data], start))
+
+    await gather_all(*(fetch_pages() for _ in range(fetchers)))
+
+
+async def fetch_all(engine: HttpEngine, put: Put, options: dict, posts_start: int = 0, comments_start: int = 0):
+    comments_source = options['comments_source']
+    if comments_source == 'auto':
+        comments_source = 'bulk' if await supports_bulk_comments(engine) else 'per-post'
+    await put(('source', comments_source, None))
+
+    if comments_source == 'per-post':
+        # The comments are fetched along with their posts, so the posts are fetched again from the
+        # first page whose comments are not imported yet
+        await fetch_posts(
+            engine,
+            put,
+            page_size=options['page_size'],
+            fetchers=options['fetchers'],
+            comments_per_post=True,
+            start=comments_start,
+        )
+        return
+
+    # All the posts are fetched before the comments, so that each committed chunk of comments
+    # refers to committed posts
+    await fetch_posts(
+        engine,
+        put,
+        page_size=options['page_size'],
+        fetchers=options['fetchers'],
+        comments_per_post=False,
+        start=posts_start,
+    )
+    await fetch_bulk_comments(
+        engine, put, page_size=options['page_size'], fetchers=options['fetchers'], start=comments_start
+    )
 
 
 class Command(BaseCommand):
+    help = 'Import posts and comments from the external API, into an empty DB (or resume an interrupted import)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=DEFAULT_PAGE_SIZE,
+            help='Number of posts to fetch (and import along with their comments) at once',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_COPY_BATCH_SIZE,
+            help='Number of rows to write to the DB at once (with COPY)',
+        )
+        parser.add_argument(
+            '--commit-size',
+            type=int,
+            default=DEFAULT_COMMIT_SIZE,
+            help='Number of rows to commit at once, along with a checkpoint of the progress',
+        )
+        parser.add_argument(
+            '--resume',
+            action='store_true',
+            help='Resume an interrupted import from its last checkpoint',
+        )
+        parser.add_argument(
+            '--snapshot',
+            default=None,
+            help='Import a snapshot file (written by export_blog, or - for stdin) instead of the external API',
+        )
+        parser.add_argument(
+            '--comments-source',
+            choices=COMMENTS_SOURCES,
+            default='auto',
+            help='Fetch the comments from the bulk /comments listing, or with one request per post, '
+                 'by default the bulk listing is used if it supports pagination',
+        )
+        parser.add_argument(
+            '--fetchers',
+            type=int,
+            default=4,
+            help='Number of pages to fetch at once',
+        )
+        parser.add_argument(
+            '--queue-size',
+            type=int,
+            default=DEFAULT_QUEUE_SIZE,
+            help='Number of fetched pages, which may wait to be written to the DB',
+        )
+        add_http_arguments(parser)
 
     def handle(self, *args, **options):
-        # With the current amount of data, in the external API,
-        # it is possible to just make two sync calls and create records in DB, using two
-        # django-ORM's `bulk_create` calls (for `Post` & `Comment`)
-
-        # But this approach might fail, if the amount of data in external API is huge,
-        # We need to fetch records, in chunks (using pagination) from external API, and then
-        # create them in chunks in local DB, that is the reason I chose this approach:
-        # Fetch posts (in pagination if it was available in external API) in chunks, for each chunk:
-        #    1- Create all posts in the local DB
-        #    2- Fetch all comments for the chunk of posts (using asyncio to improve performance)
-        #    3- Create all comments in local DB
+        # Fetching and writing overlap:
+        #    - Fetchers (on the engine's event loop, in a background thread) fetch the pages of posts,
+        #      and the comments either from the bulk listing or with one request per post, and put
+        #      them into a bounded queue.
+        #    - The writer (this thread) streams the queued rows into the local DB (with COPY).
+        # Rows are written in batches of `--batch-size` rows, without building model instances,
+        # and at most `--queue-size` pages wait in the queue, so memory use does not grow with the dataset.
+        # Rows are written with COPY, so they are neither recorded in the outbox (since they already
+        # exist in the external API) nor sent any model signals.
+        # Rows are committed in chunks of (about) `--commit-size` rows, each along with a checkpoint
+        # of the pages imported so far, so an interrupted import can be resumed with `--resume`.
+
+        if options['snapshot']:
+            self.import_snapshot(options)
+            return
+
+        checkpoint = self.start_checkpoint(options)
+        # Pages of a resumed import may be fetched again, since pages are written out of order (and the
+        # checkpoint only covers the ones before the first page which was not written)
+        ignore_conflicts = options['resume']
+        progress = {
+            Post: PageProgress(checkpoint.posts_start, checkpoint.page_size),
+            Comment: PageProgress(checkpoint.comments_start, checkpoint.page_size),
+        }
+
+        with HttpEngine.from_options(options) as engine:
+            pipeline = FetchPipeline(
+                engine,
+                lambda put: fetch_all(
+                    engine,
+                    put,
+                    options,
+                    posts_start=checkpoint.posts_start,
+                    comments_start=checkpoint.comments_start,
+                ),
+                queue_size=options['queue_size'],
+            )
+            batch_size = options['batch_size']
+            with (
+                CopyWriter(Post, batch_size, ignore_conflicts) as posts,
+                CopyWriter(Comment, batch_size, ignore_conflicts) as comments,
+                closing(iter(pipeline)) as items,
+            ):
+                writers = {Post: posts, Comment: comments}
+                finished = False
+                while not finished:
+                    with transaction.atomic():
+                        finished = self.write_chunk(items, writers, progress, checkpoint, options['commit_size'])
+
+            with transaction.atomic():
+                reset_sequences()
+                checkpoint.finished = True
+                checkpoint.save()
+
+        self.stdout.write(f'Imported {posts.count} posts and {comments.count} comments')
+        self.stdout.write(pipeline.summary())
+        self.stdout.write(engine.stats.summary())
+        self.stdout.write(f'Peak memory usage: {peak_memory_mb():.1f} MB')
+
+    def import_snapshot(self, options: dict):
+        if options['resume']:
+            raise CommandError('A snapshot is imported at once, so it can not be resumed')
+        call_command('import_blog', options['snapshot'], batch_size=options['batch_size'], stdout=self.stdout)
+
+    def start_checkpoint(self, options: dict) -> ImportCheckpoint:
+        """
+        The checkpoint of the interrupted import to resume (whose page size and comments source are
+        used), or a new one, if the DB is empty.
+        """
+        checkpoint = ImportCheckpoint.objects.filter(name=CHECKPOINT_NAME).first()
+        if options['resume']:
+            if checkpoint is None or checkpoint.finished:
+                raise CommandError('There is no interrupted import to resume')
+
+            options['page_size'] = checkpoint.page_size
+            options['comments_source'] = checkpoint.comments_source
+            self.stdout.write(
+                f'Resuming the import after post {checkpoint.last_post_id or 0}, '
+                f'at page {checkpoint.comments_page + 1} of comments'
+            )
+            return checkpoint
 
         if Post.objects.exists():
-            raise CommandError('Can not import records from external API, since there are existing ones in DB')
-
-        posts_response = requests.get(settings.POSTS_URL)
-        posts_data = posts_response.json()
-        posts_bulk = [
-            Post(
-                id=post_data['id'],
-                user_id=post_data['userId'],
-                title=post_data['title'],
-                body=post_data['body'],
-            ) for post_data in posts_data
-        ]
-
-        with transaction.atomic():
-            posts = Post.objects.bulk_create(posts_bulk)
-            comments_bulk: List[Comment] = []
-            for chunk in chunk_list(posts, chunk_size=20):
-                comment_chunks: List[List[Comment]] = asyncio.run(process_items(chunk))
-                for comment_chunk in comment_chunks:
-                    comments_bulk.extend(comment_chunk)
-
-            Comment.objects.bulk_create(comments_bulk)
-
-            # Since we created records and added the IDs manually, we need to
-            # sync primary keys for related tables in DB
-            app_name = 'blog'
-            # Get SQL commands from sqlsequencereset
-            output = io.StringIO()
-            call_command('sqlsequencereset', app_name, stdout=output, no_color=True)
-            sql = output.getvalue()
-
-            with connection.cursor() as cursor:
-                cursor.execute(sql)
-
-            output.close()
+            message = 'Can not import records from external API, since there are existing ones in DB'
+            if checkpoint is not None and not checkpoint.finished:
+                message += ' (use --resume to continue the interrupted import)'
+            raise CommandError(message)
+
+        checkpoint, _ = ImportCheckpoint.objects.update_or_create(
+            name=CHECKPOINT_NAME,
+            defaults={
+                'comments_source': options['comments_source'],
+                'page_size': options['page_size'],
+                'posts_start': 0,
+                'comments_start': 0,
+                'last_post_id': None,
+                'finished': False,
+            },
+        )
+        return checkpoint
+
+    def write_chunk(
+            self,
+            items,
+            writers: dict,
+            progress: dict,
+            checkpoint: ImportCheckpoint,
+            commit_size: int,
+    ) -> bool:
+        """
+        Write the next (about) `commit_size` rows, and save the checkpoint of what is written so far
+        (in the same transaction). Returns whether all of the items are written.
+        """
+        finished = True
+        rows = 0
+        for kind, value, start in items:
+            if kind == 'source':
+                self.stdout.write(f'Fetching comments from the {value} listing')
+                checkpoint.comments_source = value
+                continue
+
+            writers[kind].write_rows(value)
+            progress[kind].done(start)
+            if kind is Post and value:
+                checkpoint.last_post_id = max(checkpoint.last_post_id or 0, max(row[0] for row in value))
+            rows += len(value)
+            if rows >= commit_size:
+                finished = False
+                break
+
+        for writer in writers.values():
+            writer.flush()
+        checkpoint.posts_start = progress[Post].next_start
+        checkpoint.comments_start = progress[Comment].next_start
+        checkpoint.save()
+        return finished
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from blog.sync.snapshot import open_snapshot, write_snapshot
+from blog.sync.utils import peak_memory_mb
+
+
+class Command(BaseCommand):
+    help = 'Export the posts and comments into a snapshot file (gzip compressed newline delimited JSON)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the snapshot file (e.g. blog.ndjson.gz), or - for stdout')
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=2000,
+            help='Number of rows to fetch from the DB at once',
+        )
+
+    def handle(self, *args, **options):
+        started_at = time.monotonic()
+        # A single repeatable read transaction, so that the queries of the posts and of the comments see the same
+        # snapshot of the DB, and the snapshot is consistent (e.g. no comments of posts, which are created meanwhile)
+        with open_snapshot(options['path'], 'wt') as snapshot_file, transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute('SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY')
+            counts = write_snapshot(snapshot_file, chunk_size=options['chunk_size'])
+
+        if options['path'] != '-':
+            self.stdout.write(
+                f'Exported {counts["post"]} posts and {counts["comment"]} comments '
+                f'in {time.monotonic() - started_at:.2f}s'
+            )
+            self.stdout.write(f'Peak memory usage: {peak_memory_mb():.1f} MB')
@@ -0,0 +1,35 @@
+from aiohttp import web
+from django.core.management.base import BaseCommand
+
+from blog.testing.upstream import FakeUpstream, create_app
+
+
+class Command(BaseCommand):
+    help = (
+        'Serve a local stand-in for the external (JSONPlaceholder) API, e.g. for benchmarks, '
+        'point the commands at it with EXTERNAL_API_URL=http://<host>:<port>'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=3000)
+        parser.add_argument('--posts', type=int, default=100, help='Number of posts')
+        parser.add_argument('--comments-per-post', type=int, default=5, help='Number of comments of each post')
+        parser.add_argument('--latency', type=float, default=0.0, help='Average latency of responses, in seconds')
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0.0,
+            help='Ratio of requests which fail with 503, between 0 and 1',
+        )
+        parser.add_argument('--seed', type=int, default=None, help='Seed of the simulated latencies and errors')
+
+    def handle(self, *args, **options):
+        upstream = FakeUpstream(
+            posts=options['posts'],
+            comments_per_post=options['comments_per_post'],
+            latency=options['latency'],
+            error_rate=options['error_rate'],
+            seed=options['seed'],
+        )
+        web.run_app(create_app(upstream), host=options['host'], port=options['port'], access_log=None)
@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from blog.models.post import Post
+from blog.sync.ingest import DEFAULT_COPY_BATCH_SIZE, reset_sequences
+from blog.sync.snapshot import SnapshotError, import_snapshot, open_snapshot
+from blog.sync.utils import peak_memory_mb
+
+
+class Command(BaseCommand):
+    help = 'Import the posts and comments of a snapshot file (written by export_blog), into an empty DB'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path of the snapshot file, or - for stdin')
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_COPY_BATCH_SIZE,
+            help='Number of rows to write to the DB at once (with COPY)',
+        )
+
+    def handle(self, *args, **options):
+        if Post.objects.exists():
+            raise CommandError('Can not import records from a snapshot, since there are existing ones in DB')
+
+        started_at = time.monotonic()
+        try:
+            # Rows are written with COPY, and the secondary indexes are built once all of them are written
+            with open_snapshot(options['path']) as snapshot_file, transaction.atomic():
+                counts = import_snapshot(snapshot_file, batch_size=options['batch_size'])
+                reset_sequences()
+        except (OSError, EOFError, ValueError, SnapshotError) as e:
+            raise CommandError(f'Can not import snapshot {options["path"]}: {e}')
+
+        self.stdout.write(
+            f'Imported {counts["post"]} posts and {counts["comment"]} comments '
+            f'in {time.monotonic() - started_at:.2f}s'
+        )
+        self.stdout.write(f'Peak memory usage: {peak_memory_mb():.1f} MB')
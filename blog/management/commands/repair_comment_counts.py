@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Max
+
+from blog.models.post import Post
+
+# The posts of the batch are locked first, so that a comment which is written meanwhile is either counted, or
+# counted by its trigger once the batch is committed
+LOCK_POSTS = 'SELECT id FROM blog_post WHERE id BETWEEN %s AND %s FOR UPDATE'
+
+REPAIR_COUNTS = '''
+UPDATE blog_post SET comment_count = counts.count
+FROM (
+    SELECT post.id, count(comment.id) AS count
+    FROM blog_post AS post LEFT JOIN blog_comment AS comment ON comment.post_id = post.id
+    WHERE post.id BETWEEN %s AND %s
+    GROUP BY post.id
+) AS counts
+WHERE blog_post.id = counts.id AND blog_post.comment_count <> counts.count
+'''
+
+
+class Command(BaseCommand):
+    help = (
+        'Recompute the comment counts of posts (which are maintained by DB triggers), e.g. after the triggers '
+        'were disabled for a bulk load'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=10000, help='Number of post IDs per transaction')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = Post.objects.aggregate(last_id=Max('id'))['last_id'] or 0
+
+        repaired = 0
+        with connection.cursor() as cursor:
+            for low in range(1, last_id + 1, batch_size):
+                high = low + batch_size - 1
+                with transaction.atomic():
+                    cursor.execute(LOCK_POSTS, [low, high])
+                    cursor.execute(REPAIR_COUNTS, [low, high])
+                    repaired += cursor.rowcount
+
+        self.stdout.write(f'Repaired the comment counts of {repaired} posts')
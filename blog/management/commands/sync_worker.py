@@ -0,0 +1,160 @@
+from typing import Optional
+import logging
+import select
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import InterfaceError, OperationalError, connection
+
+from blog.models.outbox import NOTIFY_CHANNEL
+from blog.sync.http import HttpEngine, add_http_arguments
+from blog.sync.outbox import DEFAULT_MAX_ATTEMPTS
+from blog.sync.push import push_pending_changes
+from blog.sync.ratelimit import backoff_delay
+
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+logger = logging.getLogger(__name__)
+
+
+class Command(BaseCommand):
+    help = (
+        'Keep pushing the local changes of posts and comments to the external API, as soon as they are '
+        'recorded in the outbox (woken up by Postgres NOTIFY)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--window',
+            type=float,
+            default=0.5,
+            help='Seconds to wait after a notification, so that the changes made meanwhile are pushed together '
+                 '(and e.g. an item created and deleted within the window is not sent at all)',
+        )
+        parser.add_argument(
+            '--catch-up-interval',
+            type=float,
+            default=60.0,
+            help='Seconds after which the outbox is drained even without a notification, '
+                 'e.g. for the failed changes which are left for a retry',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of items to handle at once, when pushing the recorded changes',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=DEFAULT_MAX_ATTEMPTS,
+            help='Number of cycles, which may fail to push a change, before it is moved to the dead letters',
+        )
+        parser.add_argument(
+            '--max-cycles',
+            type=int,
+            default=None,
+            help='Stop after draining the outbox this many times (runs until SIGTERM/SIGINT by default)',
+        )
+        add_http_arguments(parser)
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        previous_handlers = {
+            signum: signal.signal(signum, self.stop) for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            # A single engine for the whole lifetime of the worker, so connections are kept alive
+            with HttpEngine.from_options(options) as engine:
+                self.run(engine, options)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+        self.stdout.write(engine.stats.summary())
+
+    def stop(self, signum, frame):
+        logger.info(f'Received signal {signum}, stopping after the current cycle')
+        self.stopping = True
+
+    def run(self, engine: HttpEngine, options: dict):
+        cycles = 0
+        failures = 0
+        listening = False
+        while not self.stopping:
+            try:
+                if not listening:
+                    # Listen before draining, so that no change recorded meanwhile is missed
+                    self.listen()
+                    listening = True
+
+                handled = push_pending_changes(
+                    engine, batch_size=options['batch_size'], max_attempts=options['max_attempts']
+                )
+                if handled:
+                    logger.info(f'Pushed {handled} pending changes')
+                failures = 0
+
+                cycles += 1
+                if options['max_cycles'] and cycles >= options['max_cycles']:
+                    return
+
+                if self.wait_for_notification(timeout=options['catch_up_interval']):
+                    self.sleep(options['window'])
+                    self.consume_notifications()
+            except (OperationalError, InterfaceError) as e:
+                # The DB connection is lost (e.g. Postgres restarted), so reconnect and listen again
+                logger.warning(f'Lost the DB connection: {e!r}, reconnecting')
+                connection.close()
+                listening = False
+                self.sleep(backoff_delay(failures, base=1.0))
+                failures += 1
+            except Exception:
+                # e.g. an unexpected response, which must not stop the worker, so the cycle is retried later
+                logger.exception('Failed to push the pending changes, retrying')
+                cycles += 1
+                if options['max_cycles'] and cycles >= options['max_cycles']:
+                    return
+                self.sleep(backoff_delay(failures, base=1.0))
+                failures += 1
+
+    @staticmethod
+    def listen():
+        with connection.cursor() as cursor:
+            cursor.execute(f'LISTEN {connection.ops.quote_name(NOTIFY_CHANNEL)}')
+
+    def wait_for_notification(self, timeout: float) -> bool:
+        """
+        Wait until a notification is received (and return `True`), or the timeout expires, or the worker stops.
+        """
+        db_connection = connection.connection
+        deadline = time.monotonic() + timeout
+        while not self.stopping:
+            # Notifications may already be buffered by libpq (e.g. received along with a commit),
+            # so they are consumed before waiting for the socket
+            with connection.wrap_database_errors:
+                db_connection.poll()
+            if db_connection.notifies:
+                return True
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+
+            # Wake up at least every second to check whether the worker is stopping
+            select.select([db_connection], [], [], min(1.0, remaining))
+
+        return False
+
+    @staticmethod
+    def consume_notifications():
+        db_connection = connection.connection
+        with connection.wrap_database_errors:
+            db_connection.poll()
+        db_connection.notifies.clear()
+
+    def sleep(self, seconds: Optional[float]):
+        deadline = time.monotonic() + (seconds or 0)
+        while not self.stopping and (remaining := deadline - time.monotonic()) > 0:
+            time.sleep(min(1.0, remaining))
@@ -1,145 +1,171 @@
-from typing import Union, Type
+from typing import Tuple
+import json
 import logging
-import asyncio
+import time
 
-from django.core.management.base import BaseCommand
-import requests
-import aiohttp
+from django.core.management.base import BaseCommand, CommandError
 
 from blog.models.post import Post
 from blog.models.comment import Comment
+from blog.sync.fetch import DEFAULT_PAGE_SIZE
+from blog.sync.http import HttpEngine, RequestStats, add_http_arguments
+from blog.sync.outbox import DEFAULT_MAX_ATTEMPTS, requeue_dead_letters
+from blog.sync.metrics import SyncMetrics
+from blog.sync.partition import max_item_id, parse_partition, partition_ranges, run_partitions
+from blog.sync.push import push_all_changes, push_partition, push_pending_changes
+from blog.sync.utils import peak_memory_mb
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-
-async def send_patch_request(session: aiohttp.ClientSession, url: str, data: dict):
-    """
-    Send a PATCH request to the specified URL with the provided data using the given session.
-    """
-    async with session.patch(url, json=data) as response:
-        if response.status != 200:
-            logger.warning(f'Update request to {url=} with {data=} got {response.status=}')
-        else:
-            logger.info(f'Update request to {url=} succeeded')
-
-
-async def send_delete_request(session: aiohttp.ClientSession, url: str):
-    """
-    Send a DELETE request to the specified URL using the given session.
-    """
-    async with session.delete(url) as response:
-        if response.status != 200:
-            logger.warning(f'Delete request to {url=} got {response.status=}')
-        else:
-            logger.info(f'Delete request to {url=} succeeded')
-
-
-async def process_update_and_delete(
-        model_class: Union[Type[Post], Type[Comment]],
-        external_items,
-        internal_items
-):
-    """
-    Process update and delete operations for the specified model class using the provided external
-    and internal items.
-    """
-    tasks = []
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(verify_ssl=False)) as session:
-        for external_item in external_items:
-            item_id = external_item['id']
-            if internal_item := internal_items.get(item_id):
-                # Check to see if there is a diff
-                for key, value in internal_item.serialized_value.items():
-                    if external_item[key] != value:  # If `True` then there is a diff
-                        task = asyncio.ensure_future(
-                            send_patch_request(
-                                session=session,
-                                url=internal_item.update_delete_url(item_id),
-                                data=internal_item.serialized_value
-                            )
-                        )
-
-                        tasks.append(task)
-                        break
-
-            else:
-                # Mean item exist in external DB but not in internal DB, so it should be also deleted
-                # from the external DB
-                tasks.append(
-                    asyncio.ensure_future(
-                        send_delete_request(session, model_class.update_delete_url(item_id))
-                    )
-                )
-
-        await asyncio.gather(*tasks)
 
-
-async def send_post_request(session, url, data):
-    """
-    Send a POST request to the specified URL with the provided data using the given session.
-    """
-    async with session.post(url, json=data) as response:
-
-        if response.status != 201:
-            logger.warning(f'Create request to {url=} with {data=} got {response.status=}')
-        else:
-            logger.info(f'Create request to {url=} succeeded')
-
-
-async def process_create_items(items):
-    """
-    Process create operations for the specified items.
-    """
-    tasks = []
-    async with aiohttp.ClientSession(connector=aiohttp.TCPConnector(verify_ssl=False)) as session:
-        for item in items:
-            data = item.serialized_value
-            url = item.list_create_url()
-            tasks.append(
-                asyncio.ensure_future(
-                    send_post_request(session, url, data)
-                )
-            )
-
-        await asyncio.gather(*tasks)
+logger = logging.getLogger(__name__)
 
 
 class Command(BaseCommand):
+    help = 'Push the local changes (recorded in the outbox) of posts and comments to the external API'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Compare all the records with the external API, instead of only pushing the recorded changes',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Number of items to handle at once, when pushing the recorded changes',
+        )
+        parser.add_argument(
+            '--max-attempts',
+            type=int,
+            default=DEFAULT_MAX_ATTEMPTS,
+            help='Number of runs, which may fail to push a recorded change, before it is moved to the dead letters',
+        )
+        parser.add_argument(
+            '--requeue-dead-letters',
+            action='store_true',
+            help='Retry the changes in the dead letters (e.g. once their cause is fixed)',
+        )
+        parser.add_argument(
+            '--page-size',
+            type=int,
+            default=DEFAULT_PAGE_SIZE,
+            help='Number of external items to fetch (and compare) at once, with --full',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only print the plan (the number and size of the changes to push), without pushing anything',
+        )
+        parser.add_argument(
+            '--summary-json',
+            default=None,
+            help='Write a JSON summary of the run (phase timings, changes, request latencies and errors) '
+                 'to this file, or to stdout with "-"',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=1,
+            help='Number of processes, which push the changes of separate ID ranges in parallel',
+        )
+        parser.add_argument(
+            '--partition',
+            type=parse_partition,
+            default=(1, 1),
+            help='Only push the changes of the k-th of N ID ranges, e.g. 2/3 (to split a run between hosts)',
+        )
+        parser.add_argument(
+            '--max-post-id',
+            type=int,
+            default=None,
+            help='Highest post ID to split into ranges (by default the highest local or external one), which all '
+                 'the partitions of a run must be given (required with --partition)',
+        )
+        parser.add_argument(
+            '--max-comment-id',
+            type=int,
+            default=None,
+            help='Highest comment ID to split into ranges, like --max-post-id',
+        )
+        add_http_arguments(parser)
 
     def handle(self, *args, **options):
+        if options['partition'][1] > 1 and (options['max_post_id'] is None or options['max_comment_id'] is None):
+            # Otherwise each host would split the IDs up to the highest ones when it starts, so that the ranges of
+            # the hosts might overlap or leave gaps
+            raise CommandError('--partition requires --max-post-id and --max-comment-id, the same for all the hosts')
+
+        if options['requeue_dead_letters'] and not options['dry_run']:
+            self.stdout.write(f'Requeued {requeue_dead_letters()} dead letters')
+
+        if options['workers'] == 1 and options['partition'] == (1, 1):
+            with HttpEngine.from_options(options) as engine:
+                if options['full']:
+                    push_all_changes(engine, page_size=options['page_size'], dry_run=options['dry_run'])
+                else:
+                    push_pending_changes(
+                        engine,
+                        batch_size=options['batch_size'],
+                        dry_run=options['dry_run'],
+                        max_attempts=options['max_attempts'],
+                    )
+            stats, metrics = engine.stats, engine.metrics
+        else:
+            stats, metrics = self.push_partitions(options)
+
+        if options['dry_run']:
+            self.stdout.write(f'Plan (dry run):\n{metrics.plan()}')
+        self.stdout.write(stats.summary())
+        self.stdout.write(metrics.summary())
+        self.stdout.write(f'Peak memory usage: {peak_memory_mb(children=True):.1f} MB')
+
+        if options['summary_json']:
+            summary = json.dumps({
+                'full': options['full'],
+                'dry_run': options['dry_run'],
+                'workers': options['workers'],
+                'partition': '/'.join(map(str, options['partition'])),
+                **metrics.to_dict(),
+                'requests': stats.to_dict(),
+                'peak_memory_mb': peak_memory_mb(children=True),
+            }, indent=2)
+            if options['summary_json'] == '-':
+                self.stdout.write(summary)
+            else:
+                with open(options['summary_json'], 'w') as summary_file:
+                    summary_file.write(summary)
+
+    @staticmethod
+    def push_partitions(options: dict) -> Tuple[RequestStats, SyncMetrics]:
+        """
+        Split the IDs of each model into ranges, and push the changes of this partition's ranges
+        in parallel (one process per range), merging the request stats and metrics of the processes.
+        """
+        workers = options['workers']
+        # The `--rate` of the external API is shared by all the processes of all the partitions
+        processes = workers * options['partition'][1]
+        options = {**options, 'rate': options['rate'] / processes, 'max_rate': options['max_rate'] / processes}
+
+        stats, metrics = RequestStats(), SyncMetrics()
+        max_ids = {Post: options['max_post_id'], Comment: options['max_comment_id']}
+        if None in max_ids.values():
+            # The engine is closed before the worker processes are forked
+            with HttpEngine.from_options(options) as engine:
+                for model_class, max_id in max_ids.items():
+                    if max_id is None:
+                        max_ids[model_class] = max_item_id(engine, model_class)
+            stats.merge(engine.stats)
+
+        # Posts are pushed before comments, so that new posts exist in the external API before their comments
         for model_class in (Post, Comment):
-            # Get the external items
-
-            # Here we can also fetch items from external resource by pagination
-            # To prevent loading all items into memory at once.
-            external_posts_response = requests.get(model_class.list_create_url())
-            external_items_json = external_posts_response.json()
-            external_items_ids = [external_post['id'] for external_post in external_items_json]
-
-            # Get the internal items
-            internal_items = model_class.objects.filter(id__in=external_items_ids)
-            internal_items_by_id = {
-                internal_post.id: internal_post for internal_post in internal_items
-            }
-
-            # Process update and delete operations
-            asyncio.run(
-                process_update_and_delete(
-                    model_class=model_class,
-                    external_items=external_items_json,
-                    internal_items=internal_items_by_id,
-                )
-            )
-
-            # After processing all update|delete operations (with or without pagination)
-            # Now we know fo sure, that which items (IDs), exist in external DB,
-            # So by performing `exclude` query, we can find that which items needed
-            # to be created in the external DB.
-            # To prevent loading all items in memory, We can also fetch new items from DB, in chunks.
-
-            # Get new items that need to be created
-            new_items = model_class.objects.exclude(id__in=external_items_ids)
-
-            # Process create operations
-            asyncio.run(process_create_items(list(new_items)))
+            ranges = partition_ranges(max_ids[model_class], options['partition'], workers)
+            logger.info(f'Pushing {model_class._meta.verbose_name_plural} in ID ranges {ranges}')
+            for partition_stats, partition_metrics in run_partitions(
+                    push_partition, model_class, ranges, options, workers
+            ):
+                stats.merge(partition_stats)
+                metrics.merge(partition_metrics)
+
+        stats.finished_at = time.monotonic()
+        return stats, metrics
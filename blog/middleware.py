@@ -0,0 +1,52 @@
+import asyncio
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    `WhiteNoiseMiddleware`, which is async capable as well, so that it does not make Django run the whole middleware
+    chain (and the views) in a thread of each request on ASGI. Static files are looked up and served in a thread,
+    any other request is passed on as it is.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve)(static_file, request)
+        return await self.get_response(request)
+
+
+class ConcurrencyLimitMiddleware:
+    """
+    ASGI middleware, which serves at most `limit` HTTP requests of the application at once (from the start of each
+    request until its response is sent, e.g. the end of an export stream). Each request which Django serves uses
+    a DB connection of its own, so this bounds the connections of a worker; further requests wait for their turn,
+    which only costs their sockets.
+    """
+
+    def __init__(self, app, limit: int):
+        self.app = app
+        self.semaphore = asyncio.Semaphore(limit)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        async with self.semaphore:
+            return await self.app(scope, receive, send)
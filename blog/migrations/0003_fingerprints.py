@@ -0,0 +1,44 @@
+# Generated by Django 4.2.1 on 2026-10-17 19:52
+
+from django.db import migrations, models
+
+# Schema only: the fingerprints of the existing rows are computed by the `backfill_fingerprints` command, in
+# batches of separate transactions, rather than while this migration holds the locks of the tables.
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0002_outboxentry'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='fingerprint',
+            field=models.CharField(default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='comment',
+            name='synced_fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='fingerprint',
+            field=models.CharField(default='', editable=False, max_length=64),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='synced_fingerprint',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='comment',
+            index=models.Index(condition=models.Q(('fingerprint', models.F('synced_fingerprint')), _negated=True), fields=['id'], name='blog_comment_unsynced_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(condition=models.Q(('fingerprint', models.F('synced_fingerprint')), _negated=True), fields=['id'], name='blog_post_unsynced_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 4.2.1 on 2026-10-17 19:55
+
+from django.db import migrations
+
+from blog.models.outbox import NOTIFY_CHANNEL
+
+# A statement level trigger, so that a bulk insert of outbox entries sends a single notification,
+# and notifications of the same transaction are folded by Postgres into one (delivered on commit)
+CREATE_TRIGGER = f'''
+CREATE FUNCTION blog_outbox_notify() RETURNS trigger AS $$
+BEGIN
+    PERFORM pg_notify('{NOTIFY_CHANNEL}', '');
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER blog_outbox_notify
+AFTER INSERT ON blog_outboxentry
+FOR EACH STATEMENT EXECUTE FUNCTION blog_outbox_notify();
+'''
+
+DROP_TRIGGER = '''
+DROP TRIGGER IF EXISTS blog_outbox_notify ON blog_outboxentry;
+DROP FUNCTION IF EXISTS blog_outbox_notify();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_fingerprints'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGER, reverse_sql=DROP_TRIGGER),
+    ]
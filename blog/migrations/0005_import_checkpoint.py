@@ -0,0 +1,27 @@
+# Generated by Django 4.2.1 on 2026-10-17 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_outbox_notify'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ImportCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('comments_source', models.CharField(max_length=16)),
+                ('page_size', models.PositiveIntegerField()),
+                ('posts_start', models.PositiveBigIntegerField(default=0)),
+                ('comments_start', models.PositiveBigIntegerField(default=0)),
+                ('last_post_id', models.BigIntegerField(null=True)),
+                ('finished', models.BooleanField(default=False)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
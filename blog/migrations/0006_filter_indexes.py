@@ -0,0 +1,35 @@
+# Generated by Django 4.2.1 on 2026-10-17 20:18
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+    # Indexes are built without locking the tables against writes, which needs to run outside of a transaction
+    atomic = False
+
+    dependencies = [
+        ('blog', '0005_import_checkpoint'),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(fields=['post', 'id'], name='blog_comment_post_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='comment',
+            index=models.Index(fields=['email', 'id'], name='blog_comment_email_id_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['user_id', 'id'], name='blog_post_user_id_id_idx'),
+        ),
+        # Covered by the `(post_id, id)` index
+        migrations.AlterField(
+            model_name='comment',
+            name='post',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to='blog.post'),
+        ),
+    ]
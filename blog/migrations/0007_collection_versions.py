@@ -0,0 +1,52 @@
+# Generated by Django 4.2.1 on 2026-10-17 20:23
+
+from django.db import migrations, models
+
+# Statement level triggers, so that a bulk write bumps the version once. Updates only bump it when they
+# set columns, which the API shows (not e.g. the fingerprints, which are set by the synchronization).
+# The version is bumped in the writing transaction, so it is visible along with the changed rows.
+CREATE_TRIGGERS = '''
+CREATE FUNCTION blog_bump_collection_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO blog_collectionversion (name, version, updated_at)
+    VALUES (TG_ARGV[0], 1, clock_timestamp())
+    ON CONFLICT (name) DO UPDATE
+    SET version = blog_collectionversion.version + 1, updated_at = EXCLUDED.updated_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER blog_post_version
+AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF user_id, title, body ON blog_post
+FOR EACH STATEMENT EXECUTE FUNCTION blog_bump_collection_version('post');
+
+CREATE TRIGGER blog_comment_version
+AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF post_id, name, email, body ON blog_comment
+FOR EACH STATEMENT EXECUTE FUNCTION blog_bump_collection_version('comment');
+'''
+
+DROP_TRIGGERS = '''
+DROP TRIGGER IF EXISTS blog_post_version ON blog_post;
+DROP TRIGGER IF EXISTS blog_comment_version ON blog_comment;
+DROP FUNCTION IF EXISTS blog_bump_collection_version();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0006_filter_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CollectionVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=32, unique=True)),
+                ('version', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, reverse_sql=DROP_TRIGGERS),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.1 on 2026-10-17 20:35
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.db import migrations
+
+# Row level triggers, so that the search vectors are up to date however the rows are written (including `COPY`,
+# bulk and raw SQL writes). The text search configuration must be the same as `blog.api.filters.SEARCH_CONFIG`.
+CREATE_TRIGGERS = '''
+CREATE FUNCTION blog_post_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.title, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(NEW.body, '')), 'B');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER blog_post_search_vector
+BEFORE INSERT OR UPDATE OF title, body ON blog_post
+FOR EACH ROW EXECUTE FUNCTION blog_post_search_vector();
+
+CREATE FUNCTION blog_comment_search_vector() RETURNS trigger AS $$
+BEGIN
+    NEW.search_vector :=
+        setweight(to_tsvector('english', coalesce(NEW.name, '')), 'A')
+        || setweight(to_tsvector('english', coalesce(NEW.body, '')), 'B');
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER blog_comment_search_vector
+BEFORE INSERT OR UPDATE OF name, body ON blog_comment
+FOR EACH ROW EXECUTE FUNCTION blog_comment_search_vector();
+'''
+
+DROP_TRIGGERS = '''
+DROP TRIGGER IF EXISTS blog_post_search_vector ON blog_post;
+DROP TRIGGER IF EXISTS blog_comment_search_vector ON blog_comment;
+DROP FUNCTION IF EXISTS blog_post_search_vector();
+DROP FUNCTION IF EXISTS blog_comment_search_vector();
+'''
+
+
+class Migration(migrations.Migration):
+    # Indexes are built without locking the tables against writes, which needs to run outside of a transaction
+    atomic = False
+
+    dependencies = [
+        ('blog', '0007_collection_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='comment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, reverse_sql=DROP_TRIGGERS),
+        # The vectors of the existing rows are not computed here (which would lock and rewrite every row), but
+        # in batches by `backfill_search_vectors`
+        AddIndexConcurrently(
+            model_name='comment',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='blog_comment_search_idx'),
+        ),
+        AddIndexConcurrently(
+            model_name='post',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='blog_post_search_idx'),
+        ),
+    ]
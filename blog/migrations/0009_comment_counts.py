@@ -0,0 +1,144 @@
+# Generated by Django 4.2.1 on 2026-10-17 20:55
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+# A default in the DB as well, for the rows which are written without the column (e.g. by `COPY`)
+SET_DEFAULT = 'ALTER TABLE blog_post ALTER COLUMN comment_count SET DEFAULT 0'
+
+# Statement level triggers with transition tables, so that a bulk write (including `COPY`) updates each post once.
+# The comments which are written before their post (e.g. by an import, in the same transaction) are counted when
+# the post is inserted. Deleted posts have their comments deleted first (by Django's cascade). Posts are only
+# updated when a count changes, since any update of their counts bumps the version of the posts.
+#
+# Transition tables can't be combined with a column list, so that comments which are moved to another post are
+# counted by a row level trigger, which only fires when the post of a comment changes (e.g. not when the
+# synchronization sets its fingerprints).
+CREATE_TRIGGERS = '''
+CREATE FUNCTION blog_count_comments() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP = 'INSERT' THEN
+        IF EXISTS (SELECT FROM new_comments) THEN
+            UPDATE blog_post SET comment_count = comment_count + counts.count
+            FROM (SELECT post_id, count(*) AS count FROM new_comments GROUP BY post_id) AS counts
+            WHERE blog_post.id = counts.post_id;
+        END IF;
+    ELSIF TG_OP = 'DELETE' THEN
+        IF EXISTS (SELECT FROM old_comments) THEN
+            UPDATE blog_post SET comment_count = comment_count - counts.count
+            FROM (SELECT post_id, count(*) AS count FROM old_comments GROUP BY post_id) AS counts
+            WHERE blog_post.id = counts.post_id;
+        END IF;
+    ELSIF EXISTS (SELECT FROM blog_post WHERE comment_count <> 0) THEN
+        UPDATE blog_post SET comment_count = 0 WHERE comment_count <> 0;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION blog_move_comment() RETURNS trigger AS $$
+BEGIN
+    UPDATE blog_post SET comment_count = comment_count + CASE WHEN id = NEW.post_id THEN 1 ELSE -1 END
+    WHERE id IN (OLD.post_id, NEW.post_id);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER blog_comment_count_insert
+AFTER INSERT ON blog_comment REFERENCING NEW TABLE AS new_comments
+FOR EACH STATEMENT EXECUTE FUNCTION blog_count_comments();
+
+CREATE TRIGGER blog_comment_count_delete
+AFTER DELETE ON blog_comment REFERENCING OLD TABLE AS old_comments
+FOR EACH STATEMENT EXECUTE FUNCTION blog_count_comments();
+
+CREATE TRIGGER blog_comment_count_update
+AFTER UPDATE OF post_id ON blog_comment
+FOR EACH ROW WHEN (OLD.post_id IS DISTINCT FROM NEW.post_id) EXECUTE FUNCTION blog_move_comment();
+
+CREATE TRIGGER blog_comment_count_truncate
+AFTER TRUNCATE ON blog_comment
+FOR EACH STATEMENT EXECUTE FUNCTION blog_count_comments();
+
+CREATE FUNCTION blog_count_earlier_comments() RETURNS trigger AS $$
+BEGIN
+    UPDATE blog_post SET comment_count = counts.count
+    FROM (
+        SELECT post_id, count(*) AS count FROM blog_comment
+        WHERE post_id IN (SELECT id FROM new_posts)
+        GROUP BY post_id
+    ) AS counts
+    WHERE blog_post.id = counts.post_id;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER blog_post_comment_count
+AFTER INSERT ON blog_post REFERENCING NEW TABLE AS new_posts
+FOR EACH STATEMENT EXECUTE FUNCTION blog_count_earlier_comments();
+'''
+
+DROP_TRIGGERS = '''
+DROP TRIGGER IF EXISTS blog_comment_count_insert ON blog_comment;
+DROP TRIGGER IF EXISTS blog_comment_count_delete ON blog_comment;
+DROP TRIGGER IF EXISTS blog_comment_count_update ON blog_comment;
+DROP TRIGGER IF EXISTS blog_comment_count_truncate ON blog_comment;
+DROP TRIGGER IF EXISTS blog_post_comment_count ON blog_post;
+DROP FUNCTION IF EXISTS blog_count_comments();
+DROP FUNCTION IF EXISTS blog_move_comment();
+DROP FUNCTION IF EXISTS blog_count_earlier_comments();
+'''
+
+# The version of the posts (see `0007_collection_versions`) is bumped when their counts change, since the API
+# shows them
+VERSION_TRIGGER = '''
+DROP TRIGGER blog_post_version ON blog_post;
+CREATE TRIGGER blog_post_version
+AFTER INSERT OR DELETE OR TRUNCATE OR UPDATE OF user_id, title, body{} ON blog_post
+FOR EACH STATEMENT EXECUTE FUNCTION blog_bump_collection_version('post');
+'''
+
+# The existing posts, once the triggers are created. The writes of comments are blocked meanwhile (the `SHARE`
+# lock waits for the ones in progress, and lets reads through), since an increment by the trigger of a comment
+# which the backfill's snapshot misses would be overwritten.
+LOCK_COMMENTS = 'LOCK TABLE blog_comment IN SHARE MODE'
+
+BACKFILL = '''
+UPDATE blog_post SET comment_count = counts.count
+FROM (SELECT post_id, count(*) AS count FROM blog_comment GROUP BY post_id) AS counts
+WHERE blog_post.id = counts.post_id AND blog_post.comment_count <> counts.count;
+'''
+
+
+def backfill_comment_counts(apps, schema_editor):
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(LOCK_COMMENTS)
+        cursor.execute(BACKFILL)
+
+
+class Migration(migrations.Migration):
+    # The index is built without locking the table against writes, which needs to run outside of a transaction
+    atomic = False
+
+    dependencies = [
+        ('blog', '0008_search_vectors'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(SET_DEFAULT, reverse_sql=migrations.RunSQL.noop),
+        migrations.RunSQL(
+            VERSION_TRIGGER.format(', comment_count'),
+            reverse_sql=VERSION_TRIGGER.format(''),
+        ),
+        migrations.RunSQL(CREATE_TRIGGERS, reverse_sql=DROP_TRIGGERS),
+        migrations.RunPython(backfill_comment_counts, migrations.RunPython.noop, atomic=True),
+        AddIndexConcurrently(
+            model_name='post',
+            index=models.Index(fields=['comment_count', 'id'], name='blog_post_comment_count_idx'),
+        ),
+    ]
@@ -0,0 +1,76 @@
+# Generated by Django 4.2.1 on 2026-10-17 22:05
+
+from django.db import migrations
+
+# The version of a collection used to be bumped by each writing statement, which locked the row of the collection
+# until the end of the transaction, so that all the transactions writing to a collection were serialized (e.g. API
+# writes behind the chunks of an import). The statements now only queue a bump (an insert, which locks nothing),
+# and the bumps are applied by a deferred trigger, when the transaction commits, so the row is only locked while
+# the transaction commits. The version is visible along with the changed rows, as before.
+#
+# The number of bumps queued by a transaction is counted in a transaction local setting, and only the last one
+# updates the version, so that the row is locked after the other deferred checks (e.g. of the foreign keys) of the
+# transaction. Bumps of rolled back savepoints are discarded along with their count.
+CREATE_TRIGGERS = '''
+CREATE UNLOGGED TABLE blog_collectionversionbump (
+    id bigserial PRIMARY KEY,
+    name varchar(32) NOT NULL
+);
+
+CREATE OR REPLACE FUNCTION blog_bump_collection_version() RETURNS trigger AS $$
+DECLARE
+    setting text := 'blog.pending_version_bumps_' || TG_ARGV[0];
+BEGIN
+    PERFORM set_config(setting, (coalesce(nullif(current_setting(setting, true), ''), '0')::integer + 1)::text, true);
+    INSERT INTO blog_collectionversionbump (name) VALUES (TG_ARGV[0]);
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE FUNCTION blog_apply_collection_version_bump() RETURNS trigger AS $$
+DECLARE
+    setting text := 'blog.pending_version_bumps_' || NEW.name;
+    pending integer := current_setting(setting)::integer - 1;
+BEGIN
+    PERFORM set_config(setting, pending::text, true);
+    DELETE FROM blog_collectionversionbump WHERE id = NEW.id;
+    IF pending = 0 THEN
+        INSERT INTO blog_collectionversion (name, version, updated_at)
+        VALUES (NEW.name, 1, clock_timestamp())
+        ON CONFLICT (name) DO UPDATE
+        SET version = blog_collectionversion.version + 1, updated_at = EXCLUDED.updated_at;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE CONSTRAINT TRIGGER blog_collectionversionbump_apply
+AFTER INSERT ON blog_collectionversionbump DEFERRABLE INITIALLY DEFERRED
+FOR EACH ROW EXECUTE FUNCTION blog_apply_collection_version_bump();
+'''
+
+DROP_TRIGGERS = '''
+DROP TABLE IF EXISTS blog_collectionversionbump;
+DROP FUNCTION IF EXISTS blog_apply_collection_version_bump();
+
+CREATE OR REPLACE FUNCTION blog_bump_collection_version() RETURNS trigger AS $$
+BEGIN
+    INSERT INTO blog_collectionversion (name, version, updated_at)
+    VALUES (TG_ARGV[0], 1, clock_timestamp())
+    ON CONFLICT (name) DO UPDATE
+    SET version = blog_collectionversion.version + 1, updated_at = EXCLUDED.updated_at;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0009_comment_counts'),
+    ]
+
+    operations = [
+        migrations.RunSQL(CREATE_TRIGGERS, reverse_sql=DROP_TRIGGERS),
+    ]
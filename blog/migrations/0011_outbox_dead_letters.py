@@ -0,0 +1,23 @@
+# Generated by Django 4.2.1 on 2026-10-17 21:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0010_deferred_collection_versions'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxentry',
+            name='attempts',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='outboxentry',
+            name='dead_lettered_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,2 +1,6 @@
 from blog.models.post import Post
 from blog.models.comment import Comment
+from blog.models.outbox import OutboxEntry
+from blog.models.checkpoint import ImportCheckpoint
+from blog.models.version import CollectionVersion
+from blog.models.token import TokenVersion
@@ -0,0 +1,229 @@
+from typing import Dict, Iterable, List
+import hashlib
+import json
+
+from django.db import connections, models, transaction
+
+from blog.models.outbox import (
+    OutboxEntry,
+    change_tracking_enabled,
+    record_changes,
+    suppress_change_tracking,
+)
+from blog.sync.utils import chunk_list
+
+
+def compute_fingerprint(serialized_value: dict) -> str:
+    """
+    SHA-256 of the canonical JSON form of an item, as it is sent to (or received from) the external API.
+    """
+    canonical = json.dumps(serialized_value, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+def _delete_returning(cursor, model_class, field, values: List) -> List[int]:
+    """
+    Delete the rows of the model whose `field` is one of the given values (and, in turn, the rows which
+    refer to them with `on_delete=CASCADE`), and return their IDs.
+    """
+    if not values:
+        return []
+
+    quote_name = cursor.db.ops.quote_name
+    cursor.execute(
+        f'DELETE FROM {quote_name(model_class._meta.db_table)} WHERE {quote_name(field.column)} = ANY(%s) '
+        f'RETURNING {quote_name(model_class._meta.pk.column)}',
+        [values],
+    )
+    deleted_ids = [row[0] for row in cursor.fetchall()]
+    if issubclass(model_class, SyncedModel):
+        record_changes(model_class, deleted_ids, OutboxEntry.Operation.DELETE)
+
+    # The foreign keys refer to the primary keys
+    for relation in model_class._meta.related_objects:
+        if relation.on_delete is models.CASCADE:
+            _delete_returning(cursor, relation.related_model, relation.field, deleted_ids)
+    return deleted_ids
+
+
+class ChangeTrackingQuerySet(models.QuerySet):
+    """
+    Records outbox entries (and keeps fingerprints up to date) for the bulk ORM paths,
+    which do not call `save` or send model signals.
+    (`save` and `delete` are handled by `SyncedModel.save` and the receivers in `blog.signals`)
+    """
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.set_fingerprint()
+        objs = super().bulk_create(objs, *args, **kwargs)
+        record_changes(self.model, [obj.pk for obj in objs], OutboxEntry.Operation.CREATE)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        objs = list(objs)
+        fields = list(fields)
+        if self.model.synced_fields.intersection(fields):
+            for obj in objs:
+                obj.set_fingerprint()
+            fields.append('fingerprint')
+
+        # `bulk_update` is implemented on top of `update`, which must not record the entries twice
+        with suppress_change_tracking():
+            rows = super().bulk_update(objs, fields, *args, **kwargs)
+        record_changes(self.model, [obj.pk for obj in objs], OutboxEntry.Operation.UPDATE)
+        return rows
+
+    def bulk_update_values(self, objs, fields: Iterable[str], batch_size: int = 1000) -> int:
+        """
+        The same as `bulk_update`, but with one `UPDATE ... FROM (VALUES ...)` statement per batch, which
+        is much faster for large batches than the `CASE WHEN` expressions of `bulk_update`. Only plain
+        values (not expressions) are supported.
+        """
+        objs = list(objs)
+        fields = [self.model._meta.get_field(name) for name in fields]
+        if self.model.synced_fields.intersection(field.name for field in fields):
+            for obj in objs:
+                obj.set_fingerprint()
+            fields.append(self.model._meta.get_field('fingerprint'))
+
+        connection = connections[self.db]
+        quote_name = connection.ops.quote_name
+        fields = [self.model._meta.pk, *fields]
+        # Types are cast, since they can not be inferred from the parameters of `VALUES`
+        placeholders = '(' + ', '.join(f'%s::{field.cast_db_type(connection)}' for field in fields) + ')'
+        columns = ', '.join(quote_name(field.column) for field in fields)
+        assignments = ', '.join(f'{quote_name(field.column)} = v.{quote_name(field.column)}' for field in fields[1:])
+        table = quote_name(self.model._meta.db_table)
+        pk_column = quote_name(self.model._meta.pk.column)
+
+        rows = 0
+        with connection.cursor() as cursor:
+            for chunk in chunk_list(objs, batch_size):
+                cursor.execute(
+                    f'UPDATE {table} SET {assignments} '
+                    f'FROM (VALUES {", ".join([placeholders] * len(chunk))}) AS v ({columns}) '
+                    f'WHERE {table}.{pk_column} = v.{pk_column}',
+                    [
+                        field.get_db_prep_save(getattr(obj, field.attname), connection)
+                        for obj in chunk
+                        for field in fields
+                    ],
+                )
+                rows += cursor.rowcount
+        record_changes(self.model, [obj.pk for obj in objs], OutboxEntry.Operation.UPDATE)
+        return rows
+
+    bulk_update_values.alters_data = True
+
+    def update(self, **kwargs):
+        # Fingerprints are recomputed, unless the new ones are given along (e.g. by `bulk_update`)
+        changes_synced_fields = bool(self.model.synced_fields.intersection(kwargs)) and 'fingerprint' not in kwargs
+        if not change_tracking_enabled() and not changes_synced_fields:
+            return super().update(**kwargs)
+
+        object_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        if changes_synced_fields:
+            self.model.objects.filter(pk__in=object_ids).refresh_fingerprints()
+        record_changes(self.model, object_ids, OutboxEntry.Operation.UPDATE)
+        return rows
+
+    update.alters_data = True
+
+    def delete_ids(self, ids: Iterable[int]) -> List[int]:
+        """
+        Delete the rows with the given IDs (regardless of the filters of the queryset) with one set based
+        `DELETE ... WHERE id = ANY(...) RETURNING id` statement, instead of the `Collector` of `delete()`, which
+        loads the instances and deletes them in chunks. The rows which refer to them with `on_delete=CASCADE`
+        are deleted the same way (after them, since the foreign keys are deferred). No model signals are sent,
+        but the outbox entries are recorded. Returns the IDs of the deleted rows.
+        """
+        connection = connections[self.db]
+        with transaction.atomic(using=self.db, savepoint=False), connection.cursor() as cursor:
+            return _delete_returning(cursor, self.model, self.model._meta.pk, list(ids))
+
+    delete_ids.alters_data = True
+
+    def unsynced(self):
+        """
+        Rows which are changed since they are last pushed to (or imported from) the external API.
+        """
+        return self.exclude(fingerprint=models.F('synced_fingerprint'))
+
+    def refresh_fingerprints(self, batch_size: int = 1000) -> int:
+        """
+        Recompute the stored fingerprints of the matched rows, and return the number of rows.
+        """
+        count = 0
+        with suppress_change_tracking():
+            for chunk in chunk_list(self.order_by('pk').iterator(chunk_size=batch_size), batch_size):
+                for obj in chunk:
+                    obj.set_fingerprint()
+                super().bulk_update(chunk, ['fingerprint'])
+                count += len(chunk)
+        return count
+
+    refresh_fingerprints.alters_data = True
+
+    def mark_synced(self, fingerprints: Dict[int, str]):
+        """
+        Store the fingerprints of the versions which are accepted by the external API, as `{pk: fingerprint}`.
+        """
+        if not fingerprints:
+            return
+
+        with suppress_change_tracking():
+            self.filter(pk__in=fingerprints).update(
+                synced_fingerprint=models.Case(
+                    *(models.When(pk=pk, then=models.Value(fingerprint)) for pk, fingerprint in fingerprints.items())
+                )
+            )
+
+    mark_synced.alters_data = True
+
+
+class SyncedModel(models.Model):
+    """
+    Base class for the models which are synchronized with the external API.
+
+    `fingerprint` is the hash of the current `serialized_value`, and `synced_fingerprint`
+    the hash of the last version which is pushed to (or imported from) the external API,
+    so the unchanged rows are the ones where both are equal.
+    """
+    # Model fields which `serialized_value` is made of
+    synced_fields = frozenset()
+    # Columns of the rows which `external_row` returns (see `blog.sync.ingest.CopyWriter`)
+    external_columns = ()
+
+    fingerprint = models.CharField(max_length=64, default='', editable=False)
+    synced_fingerprint = models.CharField(max_length=64, null=True, blank=True, editable=False)
+
+    objects = ChangeTrackingQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+        indexes = [
+            # Covers the (few) rows which are changed since the last synchronization
+            models.Index(
+                fields=['id'],
+                name='%(app_label)s_%(class)s_unsynced_idx',
+                condition=~models.Q(fingerprint=models.F('synced_fingerprint')),
+            ),
+        ]
+
+    @property
+    def is_synced(self) -> bool:
+        return self.fingerprint == self.synced_fingerprint
+
+    def set_fingerprint(self, synced: bool = False):
+        self.fingerprint = compute_fingerprint(self.serialized_value)
+        if synced:
+            self.synced_fingerprint = self.fingerprint
+
+    def save(self, *args, **kwargs):
+        self.set_fingerprint()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'fingerprint'}
+        super().save(*args, **kwargs)
@@ -0,0 +1,29 @@
+from django.db import models
+
+
+class ImportCheckpoint(models.Model):
+    """
+    The progress of an import (e.g. `bootstrap_blog`), which is saved along with each chunk of imported
+    rows, so that an interrupted import can be resumed where its last committed chunk ended.
+
+    Progress is recorded as offsets of pages in the external listings: everything before `posts_start`
+    in the posts listing is imported, and so is everything before `comments_start` in the comments
+    listing (or, when the comments are fetched post by post, the comments of the posts before
+    `comments_start` in the posts listing).
+    """
+
+    name = models.CharField(max_length=32, unique=True)
+    comments_source = models.CharField(max_length=16)
+    page_size = models.PositiveIntegerField()
+    posts_start = models.PositiveBigIntegerField(default=0)
+    comments_start = models.PositiveBigIntegerField(default=0)
+    last_post_id = models.BigIntegerField(null=True)
+    finished = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    @property
+    def comments_page(self) -> int:
+        """
+        The (zero based) page of comments, where the import continues.
+        """
+        return self.comments_start // self.page_size
@@ -1,12 +1,56 @@
+from typing import Optional
+
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 
+from blog.models.base import SyncedModel, compute_fingerprint
+
 
-class Comment(models.Model):
-    post = models.ForeignKey('blog.Post', on_delete=models.CASCADE)
+class Comment(SyncedModel):
+    synced_fields = frozenset({'post', 'post_id', 'name', 'email', 'body'})
+    external_columns = ('id', 'post_id', 'name', 'email', 'body', 'fingerprint', 'synced_fingerprint')
+
+    # Indexed by `(post_id, id)` (see `Meta.indexes`)
+    post = models.ForeignKey('blog.Post', on_delete=models.CASCADE, db_index=False)
     name = models.CharField(max_length=256)
     email = models.EmailField()
     body = models.TextField()
+    # The name (weighted A) and the body (weighted B), maintained by a trigger (see migration 0008)
+    search_vector = SearchVectorField(null=True, editable=False)
+
+    class Meta(SyncedModel.Meta):
+        indexes = SyncedModel.Meta.indexes + [
+            # The comments of a post (or by an email address), in order of their IDs, as a single index range scan
+            models.Index(fields=['post', 'id'], name='blog_comment_post_id_idx'),
+            models.Index(fields=['email', 'id'], name='blog_comment_email_id_idx'),
+            GinIndex(fields=['search_vector'], name='blog_comment_search_idx'),
+        ]
+
+    @classmethod
+    def from_external(cls, data: dict, post_id: Optional[int] = None) -> 'Comment':
+        item = cls(
+            id=data['id'],
+            post_id=data['postId'] if post_id is None else post_id,
+            name=data['name'],
+            email=data['email'],
+            body=data['body'],
+        )
+        # The item is the same as its external version
+        item.set_fingerprint(synced=True)
+        return item
+
+    @staticmethod
+    def external_row(data: dict, post_id: Optional[int] = None) -> tuple:
+        """
+        The same as `from_external`, but as a row of `external_columns`, without building a model instance.
+        """
+        post_id = data['postId'] if post_id is None else post_id
+        fingerprint = compute_fingerprint(
+            {'postId': post_id, 'name': data['name'], 'email': data['email'], 'body': data['body']}
+        )
+        return data['id'], post_id, data['name'], data['email'], data['body'], fingerprint, fingerprint
 
     @staticmethod
     def update_delete_url(item_id):
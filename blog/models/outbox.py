@@ -0,0 +1,94 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterable, List, Optional
+
+from django.db import models
+
+_tracking_suppressed: ContextVar[bool] = ContextVar('tracking_suppressed', default=False)
+_batched_entries: ContextVar[Optional[List['OutboxEntry']]] = ContextVar('batched_entries', default=None)
+
+# Postgres `NOTIFY` channel, which is notified (on commit) whenever outbox entries are recorded
+NOTIFY_CHANNEL = 'blog_outbox'
+
+
+class OutboxEntry(models.Model):
+    """
+    A durable record of a local change on a synchronized model (`Post` or `Comment`),
+    which still needs to be pushed to the external API.
+    """
+
+    class Operation(models.TextChoices):
+        CREATE = 'create'
+        UPDATE = 'update'
+        DELETE = 'delete'
+
+    model_name = models.CharField(max_length=32)
+    object_id = models.BigIntegerField()
+    operation = models.CharField(max_length=8, choices=Operation.choices)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Number of runs which failed to push the change. Once it reaches the limit, the entry is moved to the dead
+    # letters (and not retried anymore), e.g. an update of an item which is deleted in the external API
+    attempts = models.PositiveIntegerField(default=0)
+    dead_lettered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['model_name', 'object_id', 'id']),
+        ]
+
+
+@contextmanager
+def suppress_change_tracking():
+    """
+    Do not record outbox entries for the changes made inside this block, e.g. for records
+    which are imported from the external API, and therefore already exist there.
+    """
+    token = _tracking_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _tracking_suppressed.reset(token)
+
+
+@contextmanager
+def batch_change_tracking(batch_size: int = 1000):
+    """
+    Collect the outbox entries, which are recorded inside this block (e.g. one by one, by the
+    `post_delete` receivers of a bulk delete), and record them with bulk inserts at the end of it.
+    """
+    if _batched_entries.get() is not None:
+        # Already collected by an outer block
+        yield
+        return
+
+    entries: List[OutboxEntry] = []
+    token = _batched_entries.set(entries)
+    try:
+        yield
+    finally:
+        _batched_entries.reset(token)
+    OutboxEntry.objects.bulk_create(entries, batch_size=batch_size)
+
+
+def change_tracking_enabled() -> bool:
+    return not _tracking_suppressed.get()
+
+
+def record_changes(model_class, object_ids: Iterable[int], operation: str):
+    """
+    Record an outbox entry for each of the given object IDs, unless tracking is suppressed.
+    """
+    if not change_tracking_enabled():
+        return
+
+    entries = [
+        OutboxEntry(model_name=model_class._meta.model_name, object_id=object_id, operation=operation)
+        for object_id in object_ids
+        if object_id is not None
+    ]
+    batched_entries = _batched_entries.get()
+    if batched_entries is not None:
+        batched_entries.extend(entries)
+        return
+
+    OutboxEntry.objects.bulk_create(entries)
@@ -1,11 +1,60 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.conf import settings
 
+from blog.models.base import SyncedModel, compute_fingerprint
+
+
+class Post(SyncedModel):
+    synced_fields = frozenset({'user_id', 'title', 'body'})
+    external_columns = ('id', 'user_id', 'title', 'body', 'fingerprint', 'synced_fingerprint')
 
-class Post(models.Model):
     user_id = models.PositiveBigIntegerField()
     title = models.CharField(max_length=256)
     body = models.TextField()
+    # The title (weighted A) and the body (weighted B), maintained by a trigger (see migration 0008)
+    search_vector = SearchVectorField(null=True, editable=False)
+    # The number of its comments, maintained by triggers of the comments (see migration 0009)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+
+    class Meta(SyncedModel.Meta):
+        indexes = SyncedModel.Meta.indexes + [
+            models.Index(fields=['user_id', 'id'], name='blog_post_user_id_id_idx'),
+            GinIndex(fields=['search_vector'], name='blog_post_search_idx'),
+            models.Index(fields=['comment_count', 'id'], name='blog_post_comment_count_idx'),
+        ]
+
+    def _do_update(self, base_qs, using, pk_val, values, update_fields, forced_update):
+        # The count of an existing post is only written by the DB, so that saving an instance which was loaded
+        # before its comments changed does not overwrite it. Otherwise, `save()` works as usual
+        values = [value for value in values if value[0].name != 'comment_count']
+        updated = super()._do_update(base_qs, using, pk_val, values, update_fields, forced_update)
+        if not updated:
+            # The post is deleted meanwhile, so it is inserted again, and its comments (e.g. written
+            # before it, see migration 0009) are counted by the DB
+            self.comment_count = 0
+        return updated
+
+    @classmethod
+    def from_external(cls, data: dict) -> 'Post':
+        item = cls(
+            id=data['id'],
+            user_id=data['userId'],
+            title=data['title'],
+            body=data['body'],
+        )
+        # The item is the same as its external version
+        item.set_fingerprint(synced=True)
+        return item
+
+    @staticmethod
+    def external_row(data: dict) -> tuple:
+        """
+        The same as `from_external`, but as a row of `external_columns`, without building a model instance.
+        """
+        fingerprint = compute_fingerprint({'userId': data['userId'], 'title': data['title'], 'body': data['body']})
+        return data['id'], data['userId'], data['title'], data['body'], fingerprint, fingerprint
 
     @staticmethod
     def update_delete_url(item_id):
@@ -0,0 +1,32 @@
+from django.conf import settings
+from django.db import models
+
+
+class TokenVersion(models.Model):
+    """
+    The version of the JWTs of a user (which the tokens carry as their `token_version` claim), which is bumped to
+    revoke all the tokens issued so far, e.g. once the password of the user changes. Users without a row have
+    the version 0.
+
+    Kept in the DB (and cached along with the user, see `blog.auth_cache`), so that a revocation is seen by all the
+    processes, and survives restarts and cache evictions.
+    """
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL, primary_key=True, on_delete=models.CASCADE, related_name='token_version'
+    )
+    version = models.PositiveIntegerField(default=0)
+
+    @classmethod
+    def current(cls, user_id) -> int:
+        return cls.objects.filter(user_id=user_id).values_list('version', flat=True).first() or 0
+
+    @classmethod
+    def bump(cls, user_id):
+        """
+        Increment the version of the tokens of the user (atomically, so that concurrent bumps are not lost).
+        """
+        if not cls.objects.filter(user_id=user_id).update(version=models.F('version') + 1):
+            obj, created = cls.objects.get_or_create(user_id=user_id, defaults={'version': 1})
+            if not created:
+                cls.objects.filter(user_id=user_id).update(version=models.F('version') + 1)
@@ -0,0 +1,42 @@
+from typing import Dict, Iterable, Optional, Tuple
+import datetime
+
+from django.db import models
+
+
+class CollectionVersion(models.Model):
+    """
+    A version counter of a collection (`post` or `comment`), which is bumped by DB triggers (see the
+    `0007_collection_versions` and `0010_deferred_collection_versions` migrations) once per transaction, which
+    inserts, deletes, or changes the content of its rows. The bump is applied when the transaction commits, so
+    that the row of a collection is not locked (and concurrent writers don't wait) until then. Used for the ETags
+    of the API.
+    """
+
+    name = models.CharField(max_length=32, unique=True)
+    version = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    @classmethod
+    def current(cls, names: Iterable[str]) -> Dict[str, Tuple[int, Optional[datetime.datetime]]]:
+        """
+        The version and the time of the last change of each of the given collections, with one query.
+        """
+        versions = {name: (0, None) for name in names}
+        for name, version, updated_at in cls.objects.filter(name__in=versions).values_list(
+            'name', 'version', 'updated_at'
+        ):
+            versions[name] = (version, updated_at)
+        return versions
+
+    @classmethod
+    async def acurrent(cls, names: Iterable[str]) -> Dict[str, Tuple[int, Optional[datetime.datetime]]]:
+        """
+        `current` with the async ORM.
+        """
+        versions = {name: (0, None) for name in names}
+        async for name, version, updated_at in cls.objects.filter(name__in=versions).values_list(
+            'name', 'version', 'updated_at'
+        ):
+            versions[name] = (version, updated_at)
+        return versions
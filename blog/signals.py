@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete, pre_save
+from django.dispatch import receiver
+
+from blog.auth_cache import invalidate_user, revoke_tokens
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.outbox import OutboxEntry, record_changes
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_save, sender=Comment)
+def record_save(sender, instance, created, raw=False, **kwargs):
+    # `raw` is set while loading fixtures, which should not be pushed to the external API
+    if raw:
+        return
+
+    operation = OutboxEntry.Operation.CREATE if created else OutboxEntry.Operation.UPDATE
+    record_changes(sender, [instance.pk], operation)
+
+
+@receiver(post_delete, sender=Post)
+@receiver(post_delete, sender=Comment)
+def record_delete(sender, instance, **kwargs):
+    # Also called for the comments of a deleted post (cascade delete)
+    record_changes(sender, [instance.pk], OutboxEntry.Operation.DELETE)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def invalidate_cached_user(sender, instance, **kwargs):
+    # E.g. deactivated, or its password changed (`QuerySet.update()` sends no signals, the entry then expires)
+    invalidate_user(instance.pk)
+
+
+@receiver(pre_save, sender=settings.AUTH_USER_MODEL)
+def revoke_tokens_on_password_change(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance._state.adding or (update_fields is not None and 'password' not in update_fields):
+        return
+
+    # Revoked before the change is committed, so that no request accepts a token of the previous password meanwhile
+    if sender._default_manager.filter(pk=instance.pk).exclude(password=instance.password).exists():
+        revoke_tokens(instance.pk)
@@ -0,0 +1,122 @@
+from typing import Iterable, Iterator, List, Optional, Tuple, Union, Type
+import io
+
+from django.db import connection
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.sync.partition import IdRange
+
+
+class ExternalItemsTable:
+    """
+    A temporary table with the `(id, fingerprint)` of all the external items of a model, which is
+    loaded with `COPY`, so the sets of items to update, delete and create are computed by the DB
+    as joins and anti-joins, and streamed back with a server-side cursor.
+
+    Usage:
+        with ExternalItemsTable(Post) as external_items:
+            external_items.load(...)  # as many times as needed, e.g. once per fetched page
+            external_items.analyze()
+            for items in external_items.changed_items(): ...
+
+    If an `id_range` is given, only the internal items in that range are compared (and only the
+    external items in that range should be loaded).
+    """
+
+    def __init__(self, model_class: Union[Type[Post], Type[Comment]], id_range: Optional[IdRange] = None):
+        self.model_class = model_class
+        self.id_range = id_range
+        self.table = connection.ops.quote_name(f'sync_external_{model_class._meta.model_name}')
+        self.model_table = connection.ops.quote_name(model_class._meta.db_table)
+        # Not e.g. the search vector (in the order of the model's fields, which `from_db` expects)
+        self.fields = [
+            field for field in model_class._meta.concrete_fields if field.column in model_class.external_columns
+        ]
+
+    def __enter__(self) -> 'ExternalItemsTable':
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+            cursor.execute(
+                f'CREATE TEMPORARY TABLE {self.table} (id bigint NOT NULL, fingerprint varchar(64) NOT NULL)'
+            )
+        return self
+
+    def __exit__(self, *exc_info):
+        with connection.cursor() as cursor:
+            cursor.execute(f'DROP TABLE IF EXISTS {self.table}')
+
+    def load(self, items: Iterable[Tuple[int, str]]):
+        """
+        Append the given `(id, fingerprint)` of external items to the table.
+        """
+        data = io.StringIO(''.join(f'{item_id}\t{fingerprint}\n' for item_id, fingerprint in items))
+        with connection.cursor() as cursor:
+            cursor.copy_expert(f'COPY {self.table} (id, fingerprint) FROM STDIN', data)
+
+    def analyze(self):
+        """
+        Index the table once it is fully loaded (which is faster than maintaining the index while loading).
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(f'CREATE INDEX ON {self.table} (id)')
+            cursor.execute(f'ANALYZE {self.table}')
+
+    def mark_unchanged_synced(self) -> int:
+        """
+        Mark the internal items, which are the same as their external ones, as synced.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {self.model_table} AS t SET synced_fingerprint = t.fingerprint '
+                f'FROM {self.table} AS e '
+                f'WHERE e.id = t.id AND e.fingerprint = t.fingerprint '
+                f'AND t.synced_fingerprint IS DISTINCT FROM t.fingerprint'
+            )
+            return cursor.rowcount
+
+    def changed_items(self, chunk_size: int = 1000) -> Iterator[list]:
+        """
+        Internal items, which differ from their external ones (to be updated).
+        """
+        return self._stream_items(
+            f'WHERE EXISTS (SELECT 1 FROM {self.table} AS e WHERE e.id = t.id AND e.fingerprint <> t.fingerprint)',
+            chunk_size,
+        )
+
+    def new_items(self, chunk_size: int = 1000) -> Iterator[list]:
+        """
+        Internal items, which do not exist in the external API (to be created).
+        """
+        condition = f'WHERE NOT EXISTS (SELECT 1 FROM {self.table} AS e WHERE e.id = t.id)'
+        if self.id_range is not None:
+            condition += f' AND t.id >= {int(self.id_range.low)}'
+            if self.id_range.high is not None:
+                condition += f' AND t.id <= {int(self.id_range.high)}'
+        return self._stream_items(condition, chunk_size)
+
+    def deleted_ids(self, chunk_size: int = 1000) -> Iterator[List[int]]:
+        """
+        IDs of the external items, which do not exist in the local DB (to be deleted).
+        """
+        sql = (
+            f'SELECT DISTINCT e.id FROM {self.table} AS e '
+            f'WHERE NOT EXISTS (SELECT 1 FROM {self.model_table} AS t WHERE t.id = e.id) ORDER BY e.id'
+        )
+        for rows in self._stream(sql, chunk_size):
+            yield [item_id for item_id, in rows]
+
+    def _stream_items(self, condition: str, chunk_size: int) -> Iterator[list]:
+        columns = ', '.join(f't.{connection.ops.quote_name(field.column)}' for field in self.fields)
+        field_names = [field.attname for field in self.fields]
+        sql = f'SELECT {columns} FROM {self.model_table} AS t {condition} ORDER BY t.id'
+        for rows in self._stream(sql, chunk_size):
+            yield [self.model_class.from_db(connection.alias, field_names, row) for row in rows]
+
+    @staticmethod
+    def _stream(sql: str, chunk_size: int) -> Iterator[list]:
+        # A server-side cursor, so that only one chunk of the results is held in memory at once
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(sql)
+            while rows := cursor.fetchmany(chunk_size):
+                yield rows
@@ -0,0 +1,96 @@
+from typing import AsyncIterator, Iterator, List, Optional
+
+import aiohttp
+
+from blog.sync.http import HttpEngine, TransientError
+from blog.sync.metrics import SyncMetrics
+from blog.sync.utils import chunk_list
+
+DEFAULT_PAGE_SIZE = 100
+
+
+class FetchError(Exception):
+    """
+    A listing of the external API, which failed with a non-retryable status (e.g. 404), or did not
+    return a list of items, so that it is not mistaken for the end of the collection.
+    """
+
+
+async def fetch_list(session: aiohttp.ClientSession, url: str, params: Optional[dict] = None) -> List[dict]:
+    """
+    Fetch a listing of the external API (a request function of `HttpEngine`), raising a `TransientError`
+    if it is throttled or fails (so that it is retried), and a `FetchError` for any other failure.
+    """
+    async with session.get(url, params=params) as response:
+        message = f'Fetch request to {url=} with {params=}'
+        TransientError.check(response, message)
+        if response.status != 200:
+            raise FetchError(f'{message} got {response.status=}')
+        items = await response.json()
+
+    if not isinstance(items, list):
+        raise FetchError(f'{message} got a {type(items).__name__} instead of a list of items')
+    return items
+
+
+async def aiter_pages(
+        engine: HttpEngine,
+        url: str,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        params: Optional[dict] = None,
+        start: int = 0,
+) -> AsyncIterator[List[dict]]:
+    """
+    Yield the items of an external collection in pages of (at most) `page_size` items,
+    using the `_start`/`_limit` pagination of the external API, so that only one page
+    is held in memory at once, starting at the `start`th item.
+
+    Pages are fetched with the engine, so failed requests are retried, and a page which can't be
+    fetched raises, instead of ending the listing early.
+    """
+    while True:
+        items = await engine.call(fetch_list, url, {**(params or {}), '_start': start, '_limit': page_size})
+
+        if len(items) > page_size:
+            # The external API ignored the pagination parameters, and returned the whole collection
+            for page in chunk_list(items, page_size):
+                yield page
+            return
+
+        if items:
+            yield items
+
+        if len(items) < page_size:
+            return
+
+        start += page_size
+
+
+def iter_pages(
+        engine: HttpEngine,
+        url: str,
+        page_size: int = DEFAULT_PAGE_SIZE,
+        params: Optional[dict] = None,
+        metrics: Optional[SyncMetrics] = None,
+        start: int = 0,
+) -> Iterator[List[dict]]:
+    """
+    `aiter_pages`, from synchronous code (e.g. between DB queries), running each fetch on the engine's loop.
+    """
+    metrics = metrics or engine.metrics
+    pages = aiter_pages(engine, url, page_size=page_size, params=params, start=start)
+    while True:
+        with metrics.phase('fetch'):
+            items = engine.run(anext(pages, None))
+        if items is None:
+            return
+        yield items
+
+
+def fetch_max_id(engine: HttpEngine, url: str) -> int:
+    """
+    The highest ID in an external collection, sorting it in descending order (so that only one item is
+    sent), or scanning all of the items if the external API does not support sorting.
+    """
+    items = engine.run(engine.call(fetch_list, url, {'_sort': 'id', '_order': 'desc', '_limit': 1}))
+    return max((item['id'] for item in items), default=0)
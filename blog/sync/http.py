@@ -0,0 +1,339 @@
+from collections import Counter
+from contextlib import AsyncExitStack
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional
+import asyncio
+import logging
+import time
+
+import aiohttp
+
+from blog.sync.metrics import LATENCY_BUCKETS, LogSampler, SyncMetrics
+from blog.sync.ratelimit import (
+    DEFAULT_MAX_RATE,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_RATE,
+    AdaptiveRateLimiter,
+    backoff_delay,
+    parse_retry_after,
+)
+
+DEFAULT_CONCURRENCY = 32
+DEFAULT_DNS_CACHE_TTL = 300
+DEFAULT_TIMEOUT = 30
+
+logger = logging.getLogger(__name__)
+
+sampled_logger = LogSampler(logger)
+
+RequestFunction = Callable[..., Awaitable]
+
+
+class TransientError(Exception):
+    """
+    A failed request which is worth retrying, e.g. when the external API throttles us (429)
+    or fails (5xx).
+    """
+
+    def __init__(self, message: str, retry_after: Optional[float] = None, status: Optional[int] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+        self.status = status
+
+    @classmethod
+    def check(cls, response: aiohttp.ClientResponse, message: str):
+        """
+        Raise for a response with a retryable status.
+        """
+        if response.status == 429 or response.status >= 500:
+            raise cls(
+                f'{message} got {response.status=}',
+                retry_after=parse_retry_after(response.headers.get('Retry-After')),
+                status=response.status,
+            )
+
+
+RETRYABLE_ERRORS = (TransientError, aiohttp.ClientError, asyncio.TimeoutError)
+
+
+async def gather_outcomes(futures: Iterable[Awaitable]) -> List[bool]:
+    """
+    Wait for the given requests, and return whether each of them succeeded. Requests which
+    still failed after all the retries count as failed, but any other error is raised.
+    """
+    outcomes = []
+    for result in await asyncio.gather(*futures, return_exceptions=True):
+        if isinstance(result, RETRYABLE_ERRORS):
+            outcomes.append(False)
+        elif isinstance(result, BaseException):
+            raise result
+        else:
+            outcomes.append(bool(result))
+    return outcomes
+
+
+class RequestStats:
+    """
+    Collects the number, errors and latencies of the requests sent by an `HttpEngine`.
+    """
+
+    def __init__(self):
+        self.started_at = time.monotonic()
+        self.finished_at: Optional[float] = None
+        self.latencies: List[float] = []
+        self.errors = 0
+        self.error_counts: Counter = Counter()
+        self.retries = 0
+
+    @property
+    def count(self) -> int:
+        return len(self.latencies)
+
+    @property
+    def elapsed(self) -> float:
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def percentile(self, percent: float) -> float:
+        """
+        Latency (in seconds) of the given percentile, using the nearest-rank method.
+        """
+        if not self.latencies:
+            return 0.0
+        latencies = sorted(self.latencies)
+        index = max(0, min(len(latencies) - 1, round(percent / 100 * len(latencies)) - 1))
+        return latencies[index]
+
+    def add_error(self, error: BaseException):
+        self.errors += 1
+        status = getattr(error, 'status', None)
+        self.error_counts[f'HTTP {status}' if status else type(error).__name__] += 1
+
+    def histogram(self) -> Dict[str, int]:
+        """
+        Number of requests per latency bucket, e.g. `{'<=10ms': 3, '<=25ms': 5, ..., '>10000ms': 0}`.
+        """
+        counts = Counter()
+        for latency in self.latencies:
+            bucket = next((bound for bound in LATENCY_BUCKETS if latency <= bound), None)
+            counts[bucket] += 1
+
+        histogram = {f'<={bound * 1000:g}ms': counts[bound] for bound in LATENCY_BUCKETS}
+        histogram[f'>{LATENCY_BUCKETS[-1] * 1000:g}ms'] = counts[None]
+        return histogram
+
+    def merge(self, other: 'RequestStats'):
+        """
+        Add the requests of another run (e.g. of another process) to these stats.
+        """
+        self.latencies += other.latencies
+        self.errors += other.errors
+        self.error_counts.update(other.error_counts)
+        self.retries += other.retries
+
+    def to_dict(self) -> dict:
+        return {
+            'count': self.count,
+            'elapsed': round(self.elapsed, 6),
+            'errors': self.errors,
+            'error_counts': dict(self.error_counts),
+            'retries': self.retries,
+            'latency': {
+                'p50': self.percentile(50),
+                'p90': self.percentile(90),
+                'p99': self.percentile(99),
+                'histogram': self.histogram(),
+            },
+        }
+
+    def summary(self) -> str:
+        requests_per_second = self.count / self.elapsed if self.elapsed else 0.0
+        return (
+            f'Requests: {self.count} in {self.elapsed:.2f}s ({requests_per_second:.1f} req/s), '
+            f'errors: {self.errors}, retries: {self.retries}, latency '
+            f'p50={self.percentile(50) * 1000:.0f}ms '
+            f'p90={self.percentile(90) * 1000:.0f}ms '
+            f'p99={self.percentile(99) * 1000:.0f}ms'
+        )
+
+
+class HttpEngine:
+    """
+    A single event loop and a single pooled `aiohttp.ClientSession`, shared by all the
+    requests of a command run, so that connections are kept alive between phases.
+
+    Coroutines are run on the engine's loop with `run`, from synchronous code (e.g. between
+    DB queries). Requests are sent by calling a request function, `request_function(session, *args)`:
+        - `call`: sends it right away, bounded by the in-flight limit.
+        - `submit`: puts it in a bounded queue, which is drained by `concurrency` workers,
+          so that the producer pauses while the queue is full (backpressure).
+
+    Requests are paced by an `AdaptiveRateLimiter`, and the ones which fail with a `TransientError`
+    (or a connection error/timeout) are retried with jittered exponential backoff.
+
+    Besides the `stats` of the requests, the engine carries the `metrics` (phase timings and changes)
+    of the sync run which it is used by.
+    """
+
+    def __init__(
+            self,
+            concurrency: int = DEFAULT_CONCURRENCY,
+            limit_per_host: Optional[int] = None,
+            queue_size: Optional[int] = None,
+            dns_cache_ttl: int = DEFAULT_DNS_CACHE_TTL,
+            rate_limiter: Optional[AdaptiveRateLimiter] = None,
+            max_retries: int = DEFAULT_MAX_RETRIES,
+            timeout: float = DEFAULT_TIMEOUT,
+    ):
+        self.concurrency = concurrency
+        self.limit_per_host = limit_per_host or concurrency
+        self.queue_size = queue_size or concurrency * 2
+        self.dns_cache_ttl = dns_cache_ttl
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.loop = asyncio.new_event_loop()
+        self.stats = RequestStats()
+        self.metrics = SyncMetrics()
+        self.session: Optional[aiohttp.ClientSession] = None
+
+    @classmethod
+    def from_options(cls, options: dict) -> 'HttpEngine':
+        return cls(
+            concurrency=options['concurrency'],
+            limit_per_host=options['connections_per_host'],
+            rate_limiter=AdaptiveRateLimiter(rate=options['rate'], max_rate=options['max_rate']),
+            max_retries=options['max_retries'],
+        )
+
+    def __enter__(self) -> 'HttpEngine':
+        self.run(self._start())
+        return self
+
+    def __exit__(self, *exc_info):
+        try:
+            self.run(self._close())
+        finally:
+            self.loop.close()
+
+    def run(self, coroutine):
+        """
+        Run the given coroutine on the engine's event loop, until it is done.
+        """
+        return self.loop.run_until_complete(coroutine)
+
+    async def _start(self):
+        self._exit_stack = AsyncExitStack()
+        self._connector = aiohttp.TCPConnector(
+            limit=self.concurrency,
+            limit_per_host=self.limit_per_host,
+            ttl_dns_cache=self.dns_cache_ttl,
+            ssl=False,
+        )
+        self.session = await self._exit_stack.enter_async_context(
+            aiohttp.ClientSession(connector=self._connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        )
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._workers = [asyncio.ensure_future(self._work()) for _ in range(self.concurrency)]
+        self.stats = RequestStats()
+
+    async def _close(self):
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        await self._exit_stack.aclose()
+        await self._connector.close()
+        self.stats.finished_at = time.monotonic()
+
+    async def _work(self):
+        while True:
+            request_function, args, future = await self._queue.get()
+            try:
+                result = await self.call(request_function, *args)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self._queue.task_done()
+
+    async def call(self, request_function: RequestFunction, *args):
+        """
+        Send a request right away (once the rate limit and in-flight limit allow it), retry it
+        on transient errors, and return its result.
+        """
+        attempt = 0
+        while True:
+            await self.rate_limiter.acquire()
+            async with self._semaphore:
+                started_at = time.monotonic()
+                try:
+                    result = await request_function(self.session, *args)
+                except RETRYABLE_ERRORS as e:
+                    error = e
+                except Exception as e:
+                    self.stats.add_error(e)
+                    raise
+                else:
+                    self.rate_limiter.on_success()
+                    return result
+                finally:
+                    self.stats.latencies.append(time.monotonic() - started_at)
+
+            self.stats.add_error(error)
+            retry_after = getattr(error, 'retry_after', None)
+            if isinstance(error, TransientError):
+                # Only the responses of the external API are signals of congestion, not e.g. connection errors
+                self.rate_limiter.on_throttled(retry_after, sent_at=started_at)
+            if attempt >= self.max_retries:
+                sampled_logger.warning(
+                    f'giving up {request_function.__name__}',
+                    f'Giving up {request_function.__name__}{args} after {attempt + 1} attempts: {error!r}',
+                )
+                raise error
+
+            self.stats.retries += 1
+            await asyncio.sleep(max(retry_after or 0, backoff_delay(attempt)))
+            attempt += 1
+
+    async def submit(self, request_function: RequestFunction, *args) -> asyncio.Future:
+        """
+        Queue a request, waiting while the queue is full, and return a future of its result.
+        """
+        future = self.loop.create_future()
+        await self._queue.put((request_function, args, future))
+        return future
+
+
+def add_http_arguments(parser):
+    parser.add_argument(
+        '--concurrency',
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help='Maximum number of in-flight requests to the external API',
+    )
+    parser.add_argument(
+        '--connections-per-host',
+        type=int,
+        default=None,
+        help='Maximum number of connections per host (defaults to --concurrency)',
+    )
+    parser.add_argument(
+        '--rate',
+        type=float,
+        default=DEFAULT_RATE,
+        help='Initial number of requests per second, adapted to what the external API allows',
+    )
+    parser.add_argument(
+        '--max-rate',
+        type=float,
+        default=DEFAULT_MAX_RATE,
+        help='Maximum number of requests per second',
+    )
+    parser.add_argument(
+        '--max-retries',
+        type=int,
+        default=DEFAULT_MAX_RETRIES,
+        help='Number of retries for a request, which failed with a transient error',
+    )
@@ -0,0 +1,125 @@
+from typing import Iterable, Set, Type
+import io
+
+from django.core.management import call_command
+from django.db import connection
+
+from blog.models.base import SyncedModel
+
+DEFAULT_COPY_BATCH_SIZE = 5000
+
+
+def copy_value(value) -> str:
+    """
+    A value in the text format of `COPY`.
+    """
+    if value is None:
+        return '\\N'
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('\r', '\\r').replace('\t', '\\t')
+
+
+class CopyWriter:
+    """
+    Streams rows of external items (see `SyncedModel.external_row`) into the table of a model, with
+    `COPY ... FROM STDIN`, in batches of `batch_size` rows, so neither model instances nor more than
+    one batch of rows are held in memory.
+
+    With `ignore_conflicts`, rows are copied into a temporary staging table instead, and inserted from
+    there, skipping the ones whose IDs already exist (e.g. when an interrupted import is resumed, and
+    pages which were already imported are fetched again). `count` is the number of inserted rows.
+
+    Usage:
+        with CopyWriter(Post) as writer:
+            writer.write_rows(Post.external_row(data) for data in page)  # as many times as needed
+    """
+
+    def __init__(
+            self,
+            model_class: Type[SyncedModel],
+            batch_size: int = DEFAULT_COPY_BATCH_SIZE,
+            ignore_conflicts: bool = False,
+    ):
+        quote_name = connection.ops.quote_name
+        table = quote_name(model_class._meta.db_table)
+        columns = ', '.join(quote_name(column) for column in model_class.external_columns)
+        if ignore_conflicts:
+            staging_table = quote_name(f'{model_class._meta.db_table}_staging')
+            self.setup_sql = f'CREATE TEMPORARY TABLE IF NOT EXISTS {staging_table} (LIKE {table} INCLUDING DEFAULTS)'
+            self.sql = f'COPY {staging_table} ({columns}) FROM STDIN'
+            self.insert_sql = (
+                f'INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging_table} ON CONFLICT (id) DO NOTHING'
+            )
+            self.cleanup_sql = f'TRUNCATE {staging_table}'
+        else:
+            self.setup_sql = self.insert_sql = self.cleanup_sql = None
+            self.sql = f'COPY {table} ({columns}) FROM STDIN'
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer = io.StringIO()
+        self._pending = 0
+
+    def __enter__(self) -> 'CopyWriter':
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.flush()
+
+    def write_rows(self, rows: Iterable[tuple]):
+        for row in rows:
+            self._buffer.write('\t'.join(map(copy_value, row)))
+            self._buffer.write('\n')
+            self._pending += 1
+            if self._pending >= self.batch_size:
+                self.flush()
+
+    def flush(self):
+        if not self._pending:
+            return
+
+        self._buffer.seek(0)
+        with connection.cursor() as cursor:
+            if self.insert_sql is None:
+                cursor.copy_expert(self.sql, self._buffer)
+                self.count += self._pending
+            else:
+                cursor.execute(self.setup_sql)
+                cursor.copy_expert(self.sql, self._buffer)
+                cursor.execute(self.insert_sql)
+                self.count += cursor.rowcount
+                cursor.execute(self.cleanup_sql)
+        self._buffer = io.StringIO()
+        self._pending = 0
+
+
+class PageProgress:
+    """
+    Tracks which pages of an external listing (of `page_size` items, by their `_start` offsets) are
+    written, in whatever order they are fetched, as `next_start`: the offset of the first page which
+    is not written yet, so that everything before it is.
+    """
+
+    def __init__(self, next_start: int, page_size: int):
+        self.next_start = next_start
+        self.page_size = page_size
+        self._written: Set[int] = set()
+
+    def done(self, start: int):
+        if start < self.next_start:
+            return  # Written again, e.g. after resuming
+
+        self._written.add(start)
+        while self.next_start in self._written:
+            self._written.remove(self.next_start)
+            self.next_start += self.page_size
+
+
+def reset_sequences(app_name: str = 'blog'):
+    """
+    Since records are created with the IDs of the external API, the primary key sequences need to
+    be synced with the IDs in DB (with the SQL commands of `sqlsequencereset`).
+    """
+    output = io.StringIO()
+    call_command('sqlsequencereset', app_name, stdout=output, no_color=True)
+    with connection.cursor() as cursor:
+        cursor.execute(output.getvalue())
@@ -0,0 +1,123 @@
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Optional, TypeVar
+import json
+import logging
+import time
+
+T = TypeVar('T')
+
+# Upper bounds (in seconds) of the buckets of the request latency histogram
+LATENCY_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+PHASES = ('fetch', 'decode', 'db', 'diff', 'dispatch')
+
+
+class SyncMetrics:
+    """
+    Collects where the time of a sync run goes (in phases), and the changes which are planned
+    (or pushed) per model and operation, with the estimated size of their request bodies.
+
+    Phases:
+        - fetch: listing the external collections.
+        - decode: parsing and fingerprinting the external items.
+        - db: loading and querying the local items and the outbox.
+        - diff: comparing the local items with the external ones (in DB).
+        - dispatch: sending the changes to the external API.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = defaultdict(float)
+        # `{model_name: {operation: Counter(count=..., bytes=..., failed=...)}}`
+        self.changes: Dict[str, Dict[str, Counter]] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] += time.perf_counter() - started_at
+
+    def timed(self, name: str, iterable: Iterable[T]) -> Iterator[T]:
+        """
+        Iterate over e.g. a stream of DB results, counting the time spent in waiting for each item as the given phase.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.phase(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def _counter(self, model_name: str, operation: str) -> Counter:
+        return self.changes.setdefault(model_name, {}).setdefault(operation, Counter())
+
+    def add_change(self, model_name: str, operation: str, data: Optional[dict] = None):
+        counter = self._counter(model_name, operation)
+        counter['count'] += 1
+        counter['bytes'] += len(json.dumps(data)) if data is not None else 0
+
+    def add_failed_change(self, model_name: str, operation: str):
+        self._counter(model_name, operation)['failed'] += 1
+
+    def merge(self, other: 'SyncMetrics'):
+        """
+        Add the metrics of another run (e.g. of another process) to these metrics.
+        """
+        for name, seconds in other.phases.items():
+            self.phases[name] += seconds
+        for model_name, operations in other.changes.items():
+            for operation, counter in operations.items():
+                self._counter(model_name, operation).update(counter)
+
+    def summary(self) -> str:
+        return 'Phases: ' + ', '.join(f'{name}={seconds:.2f}s' for name, seconds in self.to_dict()['phases'].items())
+
+    def plan(self) -> str:
+        lines = []
+        for model_name, operations in sorted(self.changes.items()):
+            counts = ', '.join(
+                f'{counter["count"]} {operation}s ({counter["bytes"] / 1024:.1f} KiB)'
+                for operation, counter in sorted(operations.items())
+            )
+            lines.append(f'{model_name}: {counts}')
+        return '\n'.join(lines) or 'Nothing to push'
+
+    def to_dict(self) -> dict:
+        return {
+            'phases': {name: round(self.phases.get(name, 0.0), 6) for name in (*PHASES, *sorted(self.phases))},
+            'changes': {
+                model_name: {
+                    operation: {key: counter[key] for key in ('count', 'bytes', 'failed')}
+                    for operation, counter in operations.items()
+                }
+                for model_name, operations in self.changes.items()
+            },
+        }
+
+
+class LogSampler:
+    """
+    Logs only a sample of frequent messages (e.g. one per request): the first `first` messages of each
+    kind, and then one of every `every` messages, along with the number of the ones skipped meanwhile.
+    """
+
+    def __init__(self, logger: logging.Logger, first: int = 10, every: int = 100):
+        self.logger = logger
+        self.first = first
+        self.every = every
+        self.counts: Counter = Counter()
+
+    def log(self, level: int, kind: str, message: str):
+        self.counts[kind] += 1
+        count = self.counts[kind]
+        if count <= self.first:
+            self.logger.log(level, message)
+        elif (count - self.first) % self.every == 0:
+            self.logger.log(level, f'{message} ({self.every - 1} similar messages skipped, {count} in total)')
+
+    def warning(self, kind: str, message: str):
+        self.log(logging.WARNING, kind, message)
@@ -0,0 +1,155 @@
+from collections import defaultdict
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union, Type
+
+from django.db.models import F, Max
+from django.utils import timezone
+
+from blog.models.outbox import OutboxEntry, record_changes
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.sync.partition import IdRange
+from blog.sync.utils import chunk_list
+
+Operation = OutboxEntry.Operation
+
+# Number of runs, which may fail to push a change, before it is moved to the dead letters
+DEFAULT_MAX_ATTEMPTS = 10
+
+
+def coalesce_operations(operations: Sequence[str]) -> Optional[str]:
+    """
+    Reduce the (ordered) recorded operations of a single item, to the one request which
+    is needed to bring the external item up to date, or `None` if nothing has to be sent.
+    """
+    if not operations:
+        return None
+
+    first, last = operations[0], operations[-1]
+    if first == Operation.CREATE:
+        # The item never reached the external API, so a create followed by a delete cancels out
+        return None if last == Operation.DELETE else Operation.CREATE
+
+    if last == Operation.DELETE:
+        return Operation.DELETE
+
+    return Operation.UPDATE
+
+
+def outbox_snapshot() -> int:
+    """
+    The ID of the latest outbox entry, entries recorded afterwards are left for the next run.
+    """
+    return OutboxEntry.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+
+
+def pending_batches(
+        model_class: Union[Type[Post], Type[Comment]],
+        up_to: int,
+        batch_size: int = 500,
+        id_range: Optional[IdRange] = None,
+) -> Iterator[Tuple[Dict[int, Optional[str]], Dict[int, List[int]]]]:
+    """
+    Yield the pending changes of the given model (only of the items in `id_range`, if given)
+    in batches of items, as `{object_id: coalesced operation}`, along with the IDs of the entries
+    which are read for each item, as `{object_id: [entry_id, ...]}` (which are the ones to acknowledge,
+    since an entry with a lower ID than `up_to` may still be committed after it is read).
+
+    Batches are paginated by `object_id` (keyset), so that all the entries of one item are
+    always coalesced together.
+    """
+    entries = _entries(model_class, up_to, id_range)
+    last_object_id = None
+    while True:
+        ids_query = entries
+        if last_object_id is not None:
+            ids_query = ids_query.filter(object_id__gt=last_object_id)
+
+        object_ids = list(
+            ids_query.order_by('object_id').values_list('object_id', flat=True).distinct()[:batch_size]
+        )
+        if not object_ids:
+            return
+
+        operations_by_id: Dict[int, List[str]] = {object_id: [] for object_id in object_ids}
+        entry_ids_by_id: Dict[int, List[int]] = {object_id: [] for object_id in object_ids}
+        for entry_id, object_id, operation in entries.filter(object_id__in=object_ids).order_by('id').values_list(
+                'id', 'object_id', 'operation'
+        ):
+            operations_by_id[object_id].append(operation)
+            entry_ids_by_id[object_id].append(entry_id)
+
+        operations = {
+            object_id: coalesce_operations(operations) for object_id, operations in operations_by_id.items()
+        }
+        yield operations, entry_ids_by_id
+        last_object_id = object_ids[-1]
+
+
+def pending_entry_ids(
+        model_class: Union[Type[Post], Type[Comment]],
+        up_to: int,
+        id_range: Optional[IdRange] = None,
+) -> List[int]:
+    """
+    The IDs of all the entries of the model (in `id_range`, if given) which are committed so far, including the
+    dead letters, e.g. to acknowledge them once a full comparison, which started afterwards, is done.
+    """
+    return list(_entries(model_class, up_to, id_range, dead_letters=True).values_list('id', flat=True))
+
+
+def acknowledge(entry_ids: Iterable[int], chunk_size: int = 10000):
+    """
+    Remove the given entries, which are handled (pushed or cancelled out).
+    """
+    for chunk in chunk_list(entry_ids, chunk_size):
+        OutboxEntry.objects.filter(id__in=chunk).delete()
+
+
+def record_failures(entry_ids_by_id: Dict[int, List[int]], max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> List[int]:
+    """
+    Count a failed attempt for the given entries of the failed items (as `{object_id: [entry_id, ...]}`),
+    and move the entries of the items which failed `max_attempts` times to the dead letters, so that they
+    are not retried in every run. Returns the IDs of the dead lettered items.
+    """
+    entry_ids = [entry_id for ids in entry_ids_by_id.values() for entry_id in ids]
+    if not entry_ids:
+        return []
+
+    entries = OutboxEntry.objects.filter(id__in=entry_ids)
+    entries.update(attempts=F('attempts') + 1)
+    dead_ids = list(entries.filter(attempts__gte=max_attempts).values_list('object_id', flat=True).distinct())
+    entries.filter(object_id__in=dead_ids).update(dead_lettered_at=timezone.now())
+    return dead_ids
+
+
+def requeue_dead_letters() -> int:
+    """
+    Retry the changes in the dead letters (e.g. once their cause is fixed), and return their number.
+    """
+    return OutboxEntry.objects.filter(dead_lettered_at__isnull=False).update(dead_lettered_at=None, attempts=0)
+
+
+def _entries(
+        model_class: Union[Type[Post], Type[Comment]],
+        up_to: int,
+        id_range: Optional[IdRange],
+        dead_letters: bool = False,
+):
+    entries = OutboxEntry.objects.filter(model_name=model_class._meta.model_name, id__lte=up_to)
+    if not dead_letters:
+        entries = entries.filter(dead_lettered_at__isnull=True)
+    if id_range is not None:
+        entries = entries.filter(**id_range.lookups('object_id'))
+    return entries
+
+
+def retry_later(model_class: Union[Type[Post], Type[Comment]], failed_changes: List[Tuple[int, str]]):
+    """
+    Record the given failed changes, as `(item_id, operation)`, so that they are retried in the next run.
+    """
+    ids_by_operation: Dict[str, List[int]] = defaultdict(list)
+    for item_id, operation in failed_changes:
+        ids_by_operation[operation].append(item_id)
+
+    for operation, item_ids in ids_by_operation.items():
+        record_changes(model_class, item_ids, operation)
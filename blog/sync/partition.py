@@ -0,0 +1,118 @@
+from typing import List, NamedTuple, Optional, Tuple, Union, Type
+import argparse
+import multiprocessing
+
+from django.db import connections
+from django.db.models import Max
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.sync.fetch import fetch_max_id
+from blog.sync.http import HttpEngine, RequestStats
+from blog.sync.metrics import SyncMetrics
+
+MODEL_CLASSES = {model_class._meta.model_name: model_class for model_class in (Post, Comment)}
+
+
+class IdRange(NamedTuple):
+    """
+    An inclusive range of item IDs, which is open ended if `high` is `None`.
+    """
+    low: int
+    high: Optional[int] = None
+
+    def __contains__(self, item_id: int) -> bool:
+        return self.low <= item_id and (self.high is None or item_id <= self.high)
+
+    def lookups(self, field: str = 'id') -> dict:
+        """
+        ORM lookups, which filter the given ID field to the range.
+        """
+        lookups = {f'{field}__gte': self.low}
+        if self.high is not None:
+            lookups[f'{field}__lte'] = self.high
+        return lookups
+
+    def params(self) -> dict:
+        """
+        Query parameters, which filter a collection of the external API to the range.
+        """
+        params = {'id_gte': self.low}
+        if self.high is not None:
+            params['id_lte'] = self.high
+        return params
+
+
+def parse_partition(value: str) -> Tuple[int, int]:
+    """
+    Parse a `k/N` partition (the `k`th of `N`, starting at 1), as an `argparse` type.
+    """
+    try:
+        index, count = (int(part) for part in value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f'{value!r} is not a partition, e.g. 1/4')
+
+    if not 1 <= index <= count:
+        raise argparse.ArgumentTypeError(f'{value!r} is not a partition, it must be between 1/{count} and {count}/{count}')
+    return index, count
+
+
+def split_id_range(max_id: int, parts: int) -> List[IdRange]:
+    """
+    Split the IDs `1..max_id` into the given number of (about) equal ranges. The last range is
+    open ended, so that items which are created meanwhile are not missed.
+    """
+    size = max(1, -(-max_id // parts))
+    ranges = [IdRange(index * size + 1, (index + 1) * size) for index in range(parts)]
+    ranges[-1] = IdRange(ranges[-1].low)
+    return ranges
+
+
+def partition_ranges(max_id: int, partition: Tuple[int, int] = (1, 1), workers: int = 1) -> List[IdRange]:
+    """
+    The ID ranges handled by the given partition (e.g. a host), one for each of its workers.
+    """
+    index, count = partition
+    return split_id_range(max_id, count * workers)[(index - 1) * workers:index * workers]
+
+
+def max_item_id(engine: HttpEngine, model_class: Union[Type[Post], Type[Comment]]) -> int:
+    """
+    The highest ID of the model, either in the local DB or in the external API.
+    """
+    local_max_id = model_class.objects.aggregate(max_id=Max('id'))['max_id'] or 0
+    return max(local_max_id, fetch_max_id(engine, model_class.list_create_url()))
+
+
+def run_partitions(
+        function,
+        model_class,
+        ranges: List[IdRange],
+        options: dict,
+        workers: int,
+) -> List[Tuple[RequestStats, SyncMetrics]]:
+    """
+    Run `function(engine, model_class, id_range, options)` for each of the given ID ranges, in a pool
+    of `workers` processes (each with its own DB connection and `HttpEngine`), and return the request
+    stats and the metrics of each range.
+    """
+    arguments = [(function, model_class._meta.model_name, id_range, options) for id_range in ranges]
+    if workers == 1:
+        return [_run_partition(*partition_arguments) for partition_arguments in arguments]
+
+    # DB connections must not be shared with the forked processes, so they are closed before
+    # forking, and each process opens its own connection
+    connections.close_all()
+    with multiprocessing.get_context('fork').Pool(workers) as pool:
+        return pool.starmap(_run_partition, arguments)
+
+
+def _run_partition(
+        function,
+        model_name: str,
+        id_range: IdRange,
+        options: dict,
+) -> Tuple[RequestStats, SyncMetrics]:
+    with HttpEngine.from_options(options) as engine:
+        function(engine, MODEL_CLASSES[model_name], id_range, options)
+    return engine.stats, engine.metrics
@@ -0,0 +1,105 @@
+from typing import Any, Awaitable, Callable, Iterator, Optional
+import asyncio
+import queue
+import threading
+import time
+
+from blog.sync.http import HttpEngine
+
+DEFAULT_QUEUE_SIZE = 16
+
+_DONE = object()
+
+
+class FetchPipeline:
+    """
+    Overlaps fetching with writing: a producer coroutine, `produce(put)`, runs on the engine's event
+    loop in a background thread, and puts what it fetches into a bounded queue, which the calling
+    thread drains (e.g. into the DB, whose connection belongs to the calling thread) by iterating
+    over the pipeline.
+
+    While the queue is full, the producer waits for the consumer (backpressure), so memory use is
+    bounded by `queue_size` items. The time each side spends waiting for the other one is recorded,
+    to tell whether a run is limited by fetching or by writing.
+    """
+
+    def __init__(
+            self,
+            engine: HttpEngine,
+            produce: Callable[[Callable[[Any], Awaitable]], Awaitable],
+            queue_size: int = DEFAULT_QUEUE_SIZE,
+    ):
+        self.engine = engine
+        self.produce = produce
+        self.consumer_wait = 0.0
+        self.producer_wait = 0.0
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error: Optional[BaseException] = None
+        self._task: Optional[asyncio.Task] = None
+
+    def __iter__(self) -> Iterator:
+        thread = threading.Thread(target=self._run, name='fetch-pipeline', daemon=True)
+        thread.start()
+        try:
+            while True:
+                started_at = time.monotonic()
+                item = self._queue.get()
+                self.consumer_wait += time.monotonic() - started_at
+                if item is _DONE:
+                    break
+                yield item
+
+            if self._error is not None:
+                raise self._error
+        finally:
+            if thread.is_alive():
+                # The consumer failed (or stopped early), so the producer is cancelled, and the queue
+                # is drained until it is done, so that it is not blocked on a full queue
+                self.engine.loop.call_soon_threadsafe(self._cancel)
+                while self._queue.get() is not _DONE:
+                    pass
+            thread.join()
+
+    def _run(self):
+        try:
+            self.engine.run(self._produce())
+        except BaseException as e:
+            self._error = e
+        finally:
+            self._queue.put(_DONE)
+
+    async def _produce(self):
+        self._task = asyncio.current_task()
+        await self.produce(self.put)
+
+    def _cancel(self):
+        if self._task is not None:
+            self._task.cancel()
+
+    async def put(self, item):
+        """
+        Put an item into the queue, waiting (without blocking the event loop) while the queue is full.
+        """
+        started_at = time.monotonic()
+        await asyncio.get_running_loop().run_in_executor(None, self._queue.put, item)
+        self.producer_wait += time.monotonic() - started_at
+
+    def summary(self) -> str:
+        return (
+            f'Writer waited {self.consumer_wait:.2f}s for fetches, '
+            f'fetchers waited {self.producer_wait:.2f}s for the writer'
+        )
+
+
+async def gather_all(*coroutines: Awaitable):
+    """
+    Like `asyncio.gather`, but the other coroutines are cancelled as soon as one of them fails.
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -0,0 +1,327 @@
+from typing import Dict, Iterable, List, Optional, Tuple, Union, Type
+import logging
+
+import aiohttp
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.base import SyncedModel
+from blog.models.outbox import OutboxEntry
+from blog.sync import outbox
+from blog.sync.diff import ExternalItemsTable
+from blog.sync.fetch import iter_pages
+from blog.sync.http import HttpEngine, TransientError, gather_outcomes
+from blog.sync.metrics import LogSampler
+from blog.sync.partition import IdRange
+
+logger = logging.getLogger(__name__)
+
+# One log line per request would slow down large runs, so successful requests are only logged at debug
+# level (and counted in the run's metrics), and only a sample of the failed ones is logged
+sampled_logger = LogSampler(logger)
+
+
+async def send_patch_request(session: aiohttp.ClientSession, url: str, data: dict):
+    """
+    Send a PATCH request to the specified URL with the provided data using the given session.
+    """
+    async with session.patch(url, json=data) as response:
+        TransientError.check(response, f'Update request to {url=}')
+        if response.status != 200:
+            sampled_logger.warning(
+                f'update {response.status}', f'Update request to {url=} with {data=} got {response.status=}'
+            )
+            return False
+
+        logger.debug(f'Update request to {url=} succeeded')
+        return True
+
+
+async def send_delete_request(session: aiohttp.ClientSession, url: str):
+    """
+    Send a DELETE request to the specified URL using the given session.
+    """
+    async with session.delete(url) as response:
+        TransientError.check(response, f'Delete request to {url=}')
+        if response.status == 404:
+            # e.g. the comments of a post, which are already deleted along with the post
+            logger.debug(f'Delete request to {url=} got {response.status=}, item is already deleted')
+            return True
+
+        if response.status != 200:
+            sampled_logger.warning(f'delete {response.status}', f'Delete request to {url=} got {response.status=}')
+            return False
+
+        logger.debug(f'Delete request to {url=} succeeded')
+        return True
+
+
+async def send_post_request(session, url, data):
+    """
+    Send a POST request to the specified URL with the provided data using the given session.
+    """
+    async with session.post(url, json=data) as response:
+        TransientError.check(response, f'Create request to {url=}')
+        if response.status != 201:
+            sampled_logger.warning(
+                f'create {response.status}', f'Create request to {url=} with {data=} got {response.status=}'
+            )
+            return False
+
+        logger.debug(f'Create request to {url=} succeeded')
+        return True
+
+
+async def push_changes(
+        engine: HttpEngine,
+        model_class: Union[Type[Post], Type[Comment]],
+        creates: Iterable[SyncedModel] = (),
+        updates: Iterable[SyncedModel] = (),
+        delete_ids: Iterable[int] = (),
+        dry_run: bool = False,
+) -> Tuple[Dict[int, str], List[Tuple[int, str]]]:
+    """
+    Send the given changes of the specified model class to the external API, and return the
+    fingerprints of the pushed items, as `{item_id: fingerprint}`, and the failed changes,
+    as `(item_id, operation)`.
+
+    The changes are counted in the engine's metrics. With `dry_run`, they are only counted
+    (and nothing is pushed).
+    """
+    model_name = model_class._meta.model_name
+    metrics = engine.metrics
+    tasks = {}
+    fingerprints = {}
+    for item in creates:
+        data = item.serialized_value
+        metrics.add_change(model_name, OutboxEntry.Operation.CREATE, data)
+        if not dry_run:
+            tasks[item.id, OutboxEntry.Operation.CREATE] = await engine.submit(
+                send_post_request, item.list_create_url(), data
+            )
+        fingerprints[item.id] = item.fingerprint
+
+    for item in updates:
+        data = item.serialized_value
+        metrics.add_change(model_name, OutboxEntry.Operation.UPDATE, data)
+        if not dry_run:
+            tasks[item.id, OutboxEntry.Operation.UPDATE] = await engine.submit(
+                send_patch_request, item.update_delete_url(item.id), data
+            )
+        fingerprints[item.id] = item.fingerprint
+
+    for item_id in delete_ids:
+        metrics.add_change(model_name, OutboxEntry.Operation.DELETE)
+        if not dry_run:
+            tasks[item_id, OutboxEntry.Operation.DELETE] = await engine.submit(
+                send_delete_request, model_class.update_delete_url(item_id)
+            )
+
+    pushed, failed = {}, []
+    for (item_id, operation), succeeded in zip(tasks, await gather_outcomes(tasks.values())):
+        if not succeeded:
+            metrics.add_failed_change(model_name, operation)
+            failed.append((item_id, operation))
+        elif operation != OutboxEntry.Operation.DELETE:
+            pushed[item_id] = fingerprints[item_id]
+
+    return pushed, failed
+
+
+def dispatch(engine: HttpEngine, model_class: Union[Type[Post], Type[Comment]], dry_run: bool = False, **changes):
+    """
+    Push the given changes (see `push_changes`) from synchronous code.
+    """
+    with engine.metrics.phase('dispatch'):
+        return engine.run(push_changes(engine, model_class, dry_run=dry_run, **changes))
+
+
+def push_pending_changes(
+        engine: HttpEngine,
+        batch_size: int,
+        dry_run: bool = False,
+        max_attempts: int = outbox.DEFAULT_MAX_ATTEMPTS,
+) -> int:
+    """
+    Push only the changes which are recorded in the outbox since the last run, and return
+    the number of handled items.
+    """
+    return sum(
+        push_pending_model_changes(
+            engine, model_class, batch_size=batch_size, dry_run=dry_run, max_attempts=max_attempts
+        )
+        for model_class in (Post, Comment)
+    )
+
+
+def push_pending_model_changes(
+        engine: HttpEngine,
+        model_class: Union[Type[Post], Type[Comment]],
+        batch_size: int,
+        id_range: Optional[IdRange] = None,
+        dry_run: bool = False,
+        max_attempts: int = outbox.DEFAULT_MAX_ATTEMPTS,
+) -> int:
+    """
+    Push the recorded changes of the given model (only of the items in `id_range`, if given),
+    and return the number of handled items. With `dry_run`, the changes are only counted, and
+    the outbox is left as is.
+
+    Failed changes are left in the outbox, and once they failed in `max_attempts` runs, they are
+    moved to the dead letters (see `outbox.record_failures`).
+    """
+    metrics = engine.metrics
+    handled_count = 0
+    with metrics.phase('db'):
+        up_to = outbox.outbox_snapshot()
+    batches = outbox.pending_batches(model_class, up_to=up_to, batch_size=batch_size, id_range=id_range)
+    for operations, entry_ids_by_id in metrics.timed('db', batches):
+        with metrics.phase('db'):
+            internal_items = model_class.objects.in_bulk(
+                [item_id for item_id, operation in operations.items() if operation is not None]
+            )
+
+        # Cancelled out, or edited back to the version which the external API already has
+        handled_ids = []
+        creates, updates, delete_ids = [], [], []
+        for item_id, operation in operations.items():
+            internal_item = internal_items.get(item_id)
+            if operation is None:
+                handled_ids.append(item_id)
+            elif operation == OutboxEntry.Operation.DELETE:
+                delete_ids.append(item_id)
+            elif internal_item is None:
+                # The item is deleted after the outbox snapshot is taken, so its entries
+                # are coalesced along with the delete entry, in the next run
+                continue
+            elif operation == OutboxEntry.Operation.CREATE:
+                creates.append(internal_item)
+            elif internal_item.is_synced:
+                handled_ids.append(item_id)
+            else:
+                updates.append(internal_item)
+
+        pushed, failed = dispatch(
+            engine, model_class, dry_run=dry_run, creates=creates, updates=updates, delete_ids=delete_ids
+        )
+        if dry_run:
+            continue
+
+        with metrics.phase('db'):
+            model_class.objects.mark_synced(pushed)
+
+            failed_ids = {item_id for item_id, operation in failed}
+            handled_ids += [item_id for item_id in (*pushed, *delete_ids) if item_id not in failed_ids]
+            # Only the entries which are read, not the ones committed meanwhile (which may have lower IDs)
+            outbox.acknowledge(entry_id for item_id in handled_ids for entry_id in entry_ids_by_id[item_id])
+            dead_ids = outbox.record_failures(
+                {item_id: entry_ids_by_id[item_id] for item_id in failed_ids}, max_attempts=max_attempts
+            )
+        if dead_ids:
+            logger.error(
+                f'Moved the changes of {len(dead_ids)} {model_class._meta.verbose_name_plural} to the dead letters, '
+                f'after {max_attempts} failed attempts: {dead_ids[:10]}'
+            )
+        handled_count += len(handled_ids)
+
+    return handled_count
+
+
+def push_all_changes(engine: HttpEngine, page_size: int, dry_run: bool = False):
+    """
+    Compare all the local records with the external ones, and push the differences.
+    """
+    for model_class in (Post, Comment):
+        push_all_model_changes(engine, model_class, page_size=page_size, dry_run=dry_run)
+
+
+def push_all_model_changes(
+        engine: HttpEngine,
+        model_class: Union[Type[Post], Type[Comment]],
+        page_size: int,
+        id_range: Optional[IdRange] = None,
+        dry_run: bool = False,
+):
+    """
+    Compare the local records of the given model (only the ones in `id_range`, if given) with the
+    external ones, and push the differences. With `dry_run`, the differences are only counted,
+    and the local records and the outbox are left as they are.
+    """
+    metrics = engine.metrics
+    # Changes committed up until now, are covered by the full comparison
+    with metrics.phase('db'):
+        entry_ids = outbox.pending_entry_ids(model_class, up_to=outbox.outbox_snapshot(), id_range=id_range)
+    failed_changes: List[Tuple[int, str]] = []
+
+    with ExternalItemsTable(model_class, id_range=id_range) as external_items:
+        # Fetch the external items page by page, to prevent loading all of them into memory at once,
+        # only their IDs and fingerprints are kept (in a temporary table in DB)
+        params = id_range.params() if id_range is not None else None
+        external_pages = iter_pages(engine, model_class.list_create_url(), page_size=page_size, params=params)
+        for external_page in external_pages:
+            with metrics.phase('decode'):
+                fingerprints = [
+                    (external_item['id'], model_class.from_external(external_item).fingerprint)
+                    for external_item in external_page
+                    # In case the external API ignores the ID filters
+                    if id_range is None or external_item['id'] in id_range
+                ]
+            with metrics.phase('db'):
+                external_items.load(fingerprints)
+
+        with metrics.phase('diff'):
+            external_items.analyze()
+            if not dry_run:
+                external_items.mark_unchanged_synced()
+
+        # Items which exist in both DBs, but are changed locally
+        for items in metrics.timed('diff', external_items.changed_items(chunk_size=page_size)):
+            pushed, failed = dispatch(engine, model_class, dry_run=dry_run, updates=items)
+            with metrics.phase('db'):
+                model_class.objects.mark_synced(pushed)
+            failed_changes += failed
+
+        # Mean items exist in external DB but not in internal DB, so they should be also deleted
+        # from the external DB
+        for delete_ids in metrics.timed('diff', external_items.deleted_ids(chunk_size=page_size)):
+            pushed, failed = dispatch(engine, model_class, dry_run=dry_run, delete_ids=delete_ids)
+            failed_changes += failed
+
+        # Items which do not exist in the external DB yet
+        for items in metrics.timed('diff', external_items.new_items(chunk_size=page_size)):
+            pushed, failed = dispatch(engine, model_class, dry_run=dry_run, creates=items)
+            with metrics.phase('db'):
+                model_class.objects.mark_synced(pushed)
+            failed_changes += failed
+
+    if dry_run:
+        return
+
+    # Failed changes are recorded in the outbox, to be retried in the next run
+    with metrics.phase('db'):
+        outbox.acknowledge(entry_ids)
+        outbox.retry_later(model_class, failed_changes)
+
+
+def push_partition(
+        engine: HttpEngine,
+        model_class: Union[Type[Post], Type[Comment]],
+        id_range: IdRange,
+        options: dict,
+):
+    """
+    Push the changes of one ID range of a model, with the options of `synchronize` (see `run_partitions`).
+    """
+    if options['full']:
+        push_all_model_changes(
+            engine, model_class, page_size=options['page_size'], id_range=id_range, dry_run=options['dry_run']
+        )
+    else:
+        push_pending_model_changes(
+            engine,
+            model_class,
+            batch_size=options['batch_size'],
+            id_range=id_range,
+            dry_run=options['dry_run'],
+            max_attempts=options['max_attempts'],
+        )
@@ -0,0 +1,113 @@
+from email.utils import parsedate_to_datetime
+from typing import Optional
+import asyncio
+import datetime
+import random
+import time
+
+DEFAULT_RATE = 50.0
+DEFAULT_MAX_RATE = 1000.0
+DEFAULT_MAX_RETRIES = 5
+
+
+class AdaptiveRateLimiter:
+    """
+    A token bucket, whose rate (requests per second) is adapted with AIMD:
+        - Additive increase: the rate grows by about `increase` per second, while requests succeed.
+        - Multiplicative decrease: the rate is multiplied by `decrease`, when the external API
+          throttles us (or fails), and requests are paused for its `Retry-After`.
+    So the rate converges on what the external API actually allows.
+
+    The rate is decreased once per congestion event: the requests which were sent before the last decrease
+    (e.g. the rest of a burst of in-flight requests) were sent at the previous rate, so their throttling is
+    not counted again.
+    """
+
+    def __init__(
+            self,
+            rate: float = DEFAULT_RATE,
+            min_rate: float = 1.0,
+            max_rate: float = DEFAULT_MAX_RATE,
+            increase: float = 1.0,
+            decrease: float = 0.5,
+    ):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+        self._decreased_at = float('-inf')
+
+    @property
+    def capacity(self) -> float:
+        # Allows a burst of up to one second of requests
+        return max(1.0, self.rate)
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    async def acquire(self):
+        """
+        Wait until a request may be sent.
+        """
+        while True:
+            now = time.monotonic()
+            if now < self._paused_until:
+                await asyncio.sleep(self._paused_until - now)
+                continue
+
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    def on_success(self):
+        self.rate = min(self.max_rate, self.rate + self.increase / self.rate)
+
+    def on_throttled(self, retry_after: Optional[float] = None, sent_at: Optional[float] = None):
+        """
+        Slow down, for a request which was throttled, and was sent at `sent_at` (`time.monotonic()`, if known).
+        """
+        if sent_at is None or sent_at >= self._decreased_at:
+            self._refill()
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+            self._tokens = min(self._tokens, self.capacity)
+            self._decreased_at = time.monotonic()
+        if retry_after:
+            self._paused_until = max(self._paused_until, time.monotonic() + retry_after)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Seconds to wait according to a `Retry-After` header, which is either a number of seconds or an HTTP date.
+    """
+    if not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+
+def backoff_delay(attempt: int, base: float = 0.5, cap: float = 30.0) -> float:
+    """
+    Exponential backoff with "full jitter", for the given (zero based) retry attempt.
+    """
+    return random.uniform(0, min(cap, base * 2 ** attempt))
@@ -0,0 +1,136 @@
+from contextlib import contextmanager
+from typing import IO, Dict, Iterable, Iterator, List, Tuple, Type
+import gzip
+import json
+import sys
+
+from django.db import connection
+
+from blog.models.base import SyncedModel
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.sync.ingest import DEFAULT_COPY_BATCH_SIZE, CopyWriter
+
+SNAPSHOT_FORMAT = 'blog-snapshot'
+SNAPSHOT_VERSION = 1
+
+# Faster than the default (9), for a slightly larger snapshot
+COMPRESS_LEVEL = 6
+
+# Posts are written (and read) before their comments
+SNAPSHOT_MODELS = (Post, Comment)
+
+# The fields of each model in a snapshot, which are named as in the external API (see `SyncedModel.from_external`)
+SNAPSHOT_FIELDS = {
+    Post: {'id': 'id', 'user_id': 'userId', 'title': 'title', 'body': 'body'},
+    Comment: {'id': 'id', 'post_id': 'postId', 'name': 'name', 'email': 'email', 'body': 'body'},
+}
+
+
+class SnapshotError(Exception):
+    pass
+
+
+@contextmanager
+def open_snapshot(path: str, mode: str = 'rt') -> Iterator[IO[str]]:
+    """
+    Open a gzip compressed snapshot file (`-` for stdin or stdout) as text.
+    """
+    if path != '-':
+        with gzip.open(path, mode, compresslevel=COMPRESS_LEVEL, encoding='utf-8') as snapshot_file:
+            yield snapshot_file
+        return
+
+    std_stream = sys.stdin if 'r' in mode else sys.stdout
+    with gzip.open(std_stream.buffer, mode, compresslevel=COMPRESS_LEVEL, encoding='utf-8') as snapshot_file:
+        yield snapshot_file
+
+
+def write_snapshot(snapshot_file: IO[str], chunk_size: int = 2000) -> Dict[str, int]:
+    """
+    Write the posts and comments as a snapshot: newline delimited JSON, with a header line, and then a
+    line for each item (`{"model": "post", "item": {...}}`), in the format of the external API.
+    Items are streamed from the DB (with a server side cursor), so memory use does not grow with the
+    dataset. Returns the number of items written per model.
+    """
+    snapshot_file.write(json.dumps({'format': SNAPSHOT_FORMAT, 'version': SNAPSHOT_VERSION}) + '\n')
+
+    counts = {}
+    for model_class in SNAPSHOT_MODELS:
+        model_name = model_class._meta.model_name
+        fields = SNAPSHOT_FIELDS[model_class]
+        count = 0
+        rows = model_class.objects.order_by('id').values_list(*fields).iterator(chunk_size=chunk_size)
+        for row in rows:
+            item = dict(zip(fields.values(), row))
+            snapshot_file.write(json.dumps({'model': model_name, 'item': item}, separators=(',', ':')) + '\n')
+            count += 1
+        counts[model_name] = count
+    return counts
+
+
+def read_snapshot(snapshot_file: IO[str]) -> Iterator[Tuple[Type[SyncedModel], dict]]:
+    """
+    Yield the model and the item (in the format of the external API) of each line of a snapshot.
+    """
+    header = json.loads(snapshot_file.readline() or '{}')
+    if header.get('format') != SNAPSHOT_FORMAT:
+        raise SnapshotError('Not a blog snapshot')
+    if header.get('version') != SNAPSHOT_VERSION:
+        raise SnapshotError(f'Unsupported snapshot version {header.get("version")!r}')
+
+    model_classes = {model_class._meta.model_name: model_class for model_class in SNAPSHOT_MODELS}
+    for line in snapshot_file:
+        record = json.loads(line)
+        yield model_classes[record['model']], record['item']
+
+
+@contextmanager
+def deferred_indexes(model_classes: Iterable[Type[SyncedModel]]):
+    """
+    Drop the secondary indexes of the given models, and create them again at the end of the block,
+    since building an index at once is much faster than updating it row by row during a bulk load.
+    Indexes, which back constraints (e.g. primary keys), are kept. Should be used in a transaction,
+    so that the indexes are restored if the block fails.
+    """
+    definitions: List[str] = []
+    with connection.cursor() as cursor:
+        for model_class in model_classes:
+            cursor.execute(
+                '''
+                SELECT indexname, indexdef FROM pg_indexes
+                WHERE schemaname = current_schema() AND tablename = %s
+                AND NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = indexname)
+                ''',
+                [model_class._meta.db_table],
+            )
+            for index_name, definition in cursor.fetchall():
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(index_name)}')
+                definitions.append(definition)
+
+    yield
+
+    with connection.cursor() as cursor:
+        for definition in definitions:
+            cursor.execute(definition)
+
+
+def import_snapshot(snapshot_file: IO[str], batch_size: int = DEFAULT_COPY_BATCH_SIZE) -> Dict[str, int]:
+    """
+    Import a snapshot into the DB (which should not contain any of its items) with `COPY`, deferring
+    the secondary indexes until all the rows are written. The items are considered to be in sync with
+    the external API, and they are not recorded in the outbox. Should be used in a transaction.
+    Returns the number of items imported per model.
+    """
+    with deferred_indexes(SNAPSHOT_MODELS):
+        writers = {model_class: CopyWriter(model_class, batch_size) for model_class in SNAPSHOT_MODELS}
+        for model_class, item in read_snapshot(snapshot_file):
+            writers[model_class].write_rows((model_class.external_row(item),))
+        for writer in writers.values():
+            writer.flush()
+
+        # The deferred foreign key checks are run now, since indexes can not be created on a table
+        # with pending checks
+        with connection.cursor() as cursor:
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+    return {model_class._meta.model_name: writer.count for model_class, writer in writers.items()}
@@ -0,0 +1,22 @@
+from itertools import islice
+import resource
+
+
+def chunk_list(lst, chunk_size):
+    it = iter(lst)
+    chunk = list(islice(it, chunk_size))
+    while chunk:
+        yield chunk
+        chunk = list(islice(it, chunk_size))
+
+
+def peak_memory_mb(children: bool = False) -> float:
+    """
+    Peak resident set size of the current process (or of the largest of its child processes,
+    if that is larger), in megabytes.
+    """
+    # `ru_maxrss` is reported in kilobytes on Linux
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if children:
+        max_rss = max(max_rss, resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    return max_rss / 1024
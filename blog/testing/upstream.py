@@ -0,0 +1,286 @@
+from bisect import bisect_right, insort
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional
+import asyncio
+import random
+import socket
+import threading
+
+from aiohttp import web
+
+
+def make_post(post_id: int) -> dict:
+    return {
+        'userId': (post_id - 1) // 10 + 1,
+        'id': post_id,
+        'title': f'Post title {post_id}',
+        'body': f'Post body {post_id}\nwith a second line',
+    }
+
+
+def make_comment(comment_id: int, comments_per_post: int) -> dict:
+    return {
+        'postId': (comment_id - 1) // comments_per_post + 1,
+        'id': comment_id,
+        'name': f'Comment name {comment_id}',
+        'email': f'user{comment_id}@example.com',
+        'body': f'Comment body {comment_id}\nwith a second line',
+    }
+
+
+class FakeCollection:
+    """
+    A collection of items with the IDs `1..size`, which are generated on demand (so even millions
+    of items take no memory), and only the items which are created, updated or deleted through
+    the API are stored.
+    """
+
+    def __init__(self, size: int, factory: Callable[[int], dict]):
+        self.size = size
+        self.factory = factory
+        self.next_id = size + 1
+        self.changed: Dict[int, dict] = {}
+        self.deleted: List[int] = []  # sorted
+
+    def _is_deleted(self, item_id: int) -> bool:
+        index = bisect_right(self.deleted, item_id)
+        return index > 0 and self.deleted[index - 1] == item_id
+
+    def get(self, item_id: int) -> Optional[dict]:
+        if not 1 <= item_id < self.next_id or self._is_deleted(item_id):
+            return None
+        return self.changed.get(item_id) or self.factory(item_id)
+
+    def _nth_id(self, rank: int) -> int:
+        """
+        The ID of the `rank`-th (zero based) existing item, i.e. skipping the deleted ones.
+        """
+        item_id = rank + 1
+        while True:
+            next_item_id = rank + 1 + bisect_right(self.deleted, item_id)
+            if next_item_id == item_id:
+                return item_id
+            item_id = next_item_id
+
+    def list(
+            self,
+            start: int = 0,
+            limit: Optional[int] = None,
+            low: int = 1,
+            high: Optional[int] = None,
+            descending: bool = False,
+    ) -> List[dict]:
+        """
+        A page of the existing items with IDs between `low` and `high`, in order of their IDs.
+        """
+        high = min(high or self.next_id - 1, self.next_id - 1)
+        items = []
+        if descending:
+            item_id = high
+            skipped = 0
+            while item_id >= low and (limit is None or len(items) < limit):
+                item = self.get(item_id)
+                if item is not None:
+                    if skipped >= start:
+                        items.append(item)
+                    skipped += 1
+                item_id -= 1
+            return items
+
+        # Rank of the first item in the range, among all the existing items
+        low = max(low, 1)
+        first_rank = low - 1 - bisect_right(self.deleted, low - 1)
+        item_id = self._nth_id(first_rank + start)
+        while item_id <= high and (limit is None or len(items) < limit):
+            item = self.get(item_id)
+            if item is not None:
+                items.append(item)
+            item_id += 1
+        return items
+
+    def create(self, data: dict) -> dict:
+        item = {**data, 'id': self.next_id}
+        self.changed[item['id']] = item
+        self.next_id += 1
+        return item
+
+    def update(self, item_id: int, data: dict) -> Optional[dict]:
+        item = self.get(item_id)
+        if item is None:
+            return None
+        item = self.changed[item_id] = {**item, **data, 'id': item_id}
+        return item
+
+    def delete(self, item_id: int) -> bool:
+        if self.get(item_id) is None:
+            return False
+        self.changed.pop(item_id, None)
+        insort(self.deleted, item_id)
+        return True
+
+
+class FakeUpstream:
+    """
+    A stand-in for the JSONPlaceholder API, with `posts` posts and `comments_per_post` comments
+    per post, which answers after `latency` seconds (on average) and fails with `503` at the given
+    `error_rate`.
+    """
+
+    def __init__(
+            self,
+            posts: int = 100,
+            comments_per_post: int = 5,
+            latency: float = 0.0,
+            error_rate: float = 0.0,
+            seed: Optional[int] = None,
+    ):
+        self.comments_per_post = comments_per_post
+        self.latency = latency
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.collections = {
+            'posts': FakeCollection(posts, make_post),
+            'comments': FakeCollection(
+                posts * comments_per_post, lambda comment_id: make_comment(comment_id, comments_per_post)
+            ),
+        }
+        self.request_counts: Dict[str, int] = {}
+
+    def comments_of_post(self, post_id: int) -> List[dict]:
+        comments = self.collections['comments']
+        generated = comments.list(
+            low=(post_id - 1) * self.comments_per_post + 1,
+            high=min(post_id * self.comments_per_post, comments.size),
+        )
+        created = [
+            comment for comment_id, comment in comments.changed.items()
+            if comment_id > comments.size and comment.get('postId') == post_id
+        ]
+        return [comment for comment in generated if comment['postId'] == post_id] + created
+
+
+def _int(request: web.Request, name: str, default: Optional[int] = None) -> Optional[int]:
+    value = request.query.get(name)
+    return int(value) if value is not None else default
+
+
+@web.middleware
+async def simulate_network(request: web.Request, handler):
+    upstream: FakeUpstream = request.app['upstream']
+    resource = request.match_info.route.resource
+    route = f'{request.method} {resource.canonical if resource else request.path}'
+    upstream.request_counts[route] = upstream.request_counts.get(route, 0) + 1
+
+    if upstream.latency:
+        await asyncio.sleep(upstream.random.uniform(0.5, 1.5) * upstream.latency)
+    if upstream.error_rate and upstream.random.random() < upstream.error_rate:
+        return web.json_response({}, status=503)
+    return await handler(request)
+
+
+async def list_items(request: web.Request) -> web.Response:
+    upstream: FakeUpstream = request.app['upstream']
+    collection = upstream.collections[request.match_info['collection']]
+
+    descending = request.query.get('_sort') == 'id' and request.query.get('_order') == 'desc'
+    items = collection.list(
+        start=_int(request, '_start', 0),
+        limit=_int(request, '_limit'),
+        low=_int(request, 'id_gte', 1),
+        high=_int(request, 'id_lte'),
+        descending=descending,
+    )
+    if 'postId' in request.query:
+        items = [item for item in items if item.get('postId') == int(request.query['postId'])]
+    return web.json_response(items)
+
+
+async def get_item(request: web.Request) -> web.Response:
+    upstream: FakeUpstream = request.app['upstream']
+    item = upstream.collections[request.match_info['collection']].get(int(request.match_info['item_id']))
+    if item is None:
+        return web.json_response({}, status=404)
+    return web.json_response(item)
+
+
+async def list_comments_of_post(request: web.Request) -> web.Response:
+    upstream: FakeUpstream = request.app['upstream']
+    return web.json_response(upstream.comments_of_post(int(request.match_info['item_id'])))
+
+
+async def create_item(request: web.Request) -> web.Response:
+    upstream: FakeUpstream = request.app['upstream']
+    item = upstream.collections[request.match_info['collection']].create(await request.json())
+    return web.json_response(item, status=201)
+
+
+async def update_item(request: web.Request) -> web.Response:
+    upstream: FakeUpstream = request.app['upstream']
+    item = upstream.collections[request.match_info['collection']].update(
+        int(request.match_info['item_id']), await request.json()
+    )
+    if item is None:
+        return web.json_response({}, status=404)
+    return web.json_response(item)
+
+
+async def delete_item(request: web.Request) -> web.Response:
+    upstream: FakeUpstream = request.app['upstream']
+    if not upstream.collections[request.match_info['collection']].delete(int(request.match_info['item_id'])):
+        return web.json_response({}, status=404)
+    return web.json_response({})
+
+
+def create_app(upstream: Optional[FakeUpstream] = None) -> web.Application:
+    """
+    An aiohttp app, which serves the `/posts`, `/comments` and `/posts/{id}/comments` routes of the
+    JSONPlaceholder API (including the `_start`/`_limit` pagination, `_sort=id&_order=desc` and
+    `id_gte`/`id_lte` filters) from a `FakeUpstream`.
+    """
+    app = web.Application(middlewares=[simulate_network])
+    app['upstream'] = upstream or FakeUpstream()
+
+    collection = '{collection:posts|comments}'
+    app.router.add_get(f'/{collection}', list_items)
+    app.router.add_post(f'/{collection}', create_item)
+    app.router.add_get(f'/{collection}/{{item_id:\\d+}}', get_item)
+    app.router.add_put(f'/{collection}/{{item_id:\\d+}}', update_item)
+    app.router.add_patch(f'/{collection}/{{item_id:\\d+}}', update_item)
+    app.router.add_delete(f'/{collection}/{{item_id:\\d+}}', delete_item)
+    app.router.add_get('/posts/{item_id:\\d+}/comments', list_comments_of_post)
+    return app
+
+
+def external_api_settings(base_url: str) -> dict:
+    """
+    Settings, which point the external API URLs at the given base URL (e.g. for `override_settings`).
+    """
+    return {
+        'POSTS_URL': f'{base_url}/posts',
+        'COMMENTS_URL': f'{base_url}/comments',
+        'COMMENTS_BY_POST_URL': f'{base_url}/posts/{{}}/comments',
+    }
+
+
+@contextmanager
+def serve_in_thread(upstream: FakeUpstream, host: str = '127.0.0.1', port: int = 0) -> Iterator[str]:
+    """
+    Serve a fake upstream in a background thread (with its own event loop), and yield its base URL.
+    """
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    loop = asyncio.new_event_loop()
+    runner = web.AppRunner(create_app(upstream), access_log=None)
+    loop.run_until_complete(runner.setup())
+    loop.run_until_complete(web.SockSite(runner, sock).start())
+
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    try:
+        yield f'http://{host}:{sock.getsockname()[1]}'
+    finally:
+        asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
@@ -0,0 +1,183 @@
+from unittest import mock
+import asyncio
+import gzip
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+from django.urls import resolve, reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken
+
+from blog.api.conditional import ConditionalGetMixin
+from blog.api.v1.post.views import PostView
+from blog.api.values import ValuesReadMixin
+from blog.middleware import AsyncWhiteNoiseMiddleware, ConcurrencyLimitMiddleware
+from blog.models.post import Post
+from blog.models.comment import Comment
+
+# The sync handlers of the reads, which the async views must not use
+SYNC_READS = (
+    mock.patch.object(ConditionalGetMixin, 'list', side_effect=AssertionError),
+    mock.patch.object(ConditionalGetMixin, 'retrieve', side_effect=AssertionError),
+    mock.patch.object(ValuesReadMixin, 'list', side_effect=AssertionError),
+    mock.patch.object(ValuesReadMixin, 'retrieve', side_effect=AssertionError),
+)
+
+
+class TestAsyncReadMixin(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='myusername')
+        cls.posts = [Post.objects.create(user_id=1, title=f'Title {index}', body='Body') for index in range(3)]
+        Comment.objects.create(post=cls.posts[0], name='Name', email='a@b.com', body='Body')
+        Comment.objects.create(post=cls.posts[1], name='Other name', email='a@b.com', body='Body')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+        self.headers = {'Authorization': f'Bearer {AccessToken.for_user(self.user)}'}
+
+    async def aget(self, url, params=None, **headers):
+        # Served by the ASGI handler
+        for patcher in SYNC_READS:
+            patcher.start()
+        try:
+            return await self.async_client.get(url, params or {}, headers={**self.headers, **headers})
+        finally:
+            for patcher in SYNC_READS:
+                patcher.stop()
+
+    def test_views(self):
+        self.assertTrue(asyncio.iscoroutinefunction(resolve(reverse('post-list')).func))
+        self.assertTrue(asyncio.iscoroutinefunction(resolve(reverse('comment-detail', args=[1])).func))
+        # Only the views of the async actions
+        self.assertFalse(asyncio.iscoroutinefunction(resolve(reverse('post-export')).func))
+        self.assertFalse(asyncio.iscoroutinefunction(PostView.as_view({'get': 'list'}, async_actions=())))
+
+    async def test_reads(self):
+        post_id = self.posts[0].id
+        for url, params in (
+            (reverse('post-list'), {}),
+            (reverse('post-list'), {'include': 'comments', 'page_size': 2}),
+            (reverse('post-list'), {'page': 2, 'page_size': 2, 'fields': 'id,title'}),
+            (reverse('post-list'), {'pagination': 'cursor', 'page_size': 2, 'order': 'desc'}),
+            (reverse('post-list'), {'search': 'title'}),
+            (reverse('comment-list'), {'post': post_id}),
+            (reverse('post-detail', args=[post_id]), {}),
+            (reverse('post-detail', args=[post_id]), {'include': 'comments'}),
+        ):
+            with self.subTest(url=url, params=params):
+                response = await self.aget(url, params)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                # The same as the sync views
+                expected = await sync_to_async(self.client.get)(url, params)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response['ETag'], expected['ETag'])
+
+                not_modified = await self.aget(url, params, If_None_Match=response['ETag'])
+                self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Filtered by the post
+        response = await self.aget(reverse('comment-list'), {'post': post_id})
+        self.assertEqual([comment['post'] for comment in json.loads(response.content)['results']], [post_id])
+
+    async def test_cursor(self):
+        response = await self.aget(reverse('post-list'), {'pagination': 'cursor', 'page_size': 2})
+        ids = [item['id'] for item in json.loads(response.content)['results']]
+        next_url = json.loads(response.content)['next']
+        response = await self.aget(next_url)
+        ids += [item['id'] for item in json.loads(response.content)['results']]
+        self.assertEqual(ids, [post.id for post in self.posts])
+        self.assertIsNone(json.loads(response.content)['next'])
+
+    async def test_errors(self):
+        for url, params, status_code in (
+            (reverse('post-detail', args=[0]), {}, status.HTTP_404_NOT_FOUND),
+            (reverse('post-detail', args=['x']), {}, status.HTTP_404_NOT_FOUND),
+            (reverse('post-list'), {'page': 10}, status.HTTP_404_NOT_FOUND),
+            (reverse('post-list'), {'fields': 'x'}, status.HTTP_400_BAD_REQUEST),
+            (reverse('post-list'), {'pagination': 'x'}, status.HTTP_400_BAD_REQUEST),
+        ):
+            with self.subTest(url=url, params=params):
+                self.assertEqual((await self.aget(url, params)).status_code, status_code)
+
+        # Without credentials (as the sync views, since the session authentication comes first)
+        self.headers = {}
+        self.assertEqual((await self.aget(reverse('post-list'))).status_code, status.HTTP_403_FORBIDDEN)
+
+    async def test_sync_actions(self):
+        # Served by the sync view (in a thread)
+        response = await self.async_client.post(
+            reverse('post-list'),
+            {'user_id': 1, 'title': 'New title', 'body': 'Body'},
+            content_type='application/json',
+            headers=self.headers,
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(await Post.objects.filter(title='New title').aexists())
+
+        response = await self.aget(reverse('post-comments', args=[self.posts[0].id]))
+        self.assertEqual(len(json.loads(response.content)['results']), 1)
+
+    async def test_export(self):
+        for headers in ({}, {'Accept-Encoding': 'gzip'}):
+            with self.subTest(headers=headers), mock.patch.object(PostView, 'export_chunk_size', 2):
+                response = await self.aget(reverse('post-export'), **headers)
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                # Streamed from an async iterator
+                chunks = [chunk async for chunk in response.streaming_content]
+                content = b''.join(chunks)
+                if headers:
+                    self.assertEqual(response['Content-Encoding'], 'gzip')
+                    content = gzip.decompress(content)
+                else:
+                    self.assertEqual([len(chunk.splitlines()) for chunk in chunks], [2, 1])
+                self.assertEqual([json.loads(line)['id'] for line in content.splitlines()], [p.id for p in self.posts])
+
+
+class TestAsyncWhiteNoiseMiddleware(APITestCase):
+
+    def test_capabilities(self):
+        async def get_response(request):
+            return 'response'
+
+        middleware = AsyncWhiteNoiseMiddleware(get_response)
+        self.assertTrue(asyncio.iscoroutinefunction(middleware))
+        self.assertEqual(asyncio.run(middleware(mock.Mock(path_info='/api/v1/posts/'))), 'response')
+
+        middleware = AsyncWhiteNoiseMiddleware(lambda request: 'response')
+        self.assertFalse(asyncio.iscoroutinefunction(middleware))
+        self.assertEqual(middleware(mock.Mock(path_info='/api/v1/posts/')), 'response')
+
+    @override_settings(DEBUG=False)
+    async def test_admin(self):
+        # Through the whole async middleware chain
+        response = await self.async_client.get('/admin/login/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+
+class TestConcurrencyLimitMiddleware(APITestCase):
+
+    def test_limit(self):
+        served = []
+        in_flight = []
+
+        async def app(scope, receive, send):
+            in_flight.append(scope)
+            served.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(scope)
+
+        async def serve():
+            middleware = ConcurrencyLimitMiddleware(app, 3)
+            await asyncio.gather(*(middleware({'type': 'http', 'index': index}, None, None) for index in range(10)))
+            # Other scopes are not limited
+            await asyncio.gather(*(middleware({'type': 'lifespan', 'index': index}, None, None) for index in range(5)))
+
+        asyncio.run(serve())
+        self.assertEqual(len(served), 15)
+        self.assertEqual(max(served[:10]), 3)
+        self.assertEqual(max(served[10:]), 5)
@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+from blog.api.authentication import TOKEN_VERSION_CLAIM
+from blog.models.token import TokenVersion
+
+
+class TestCachedJWTAuthentication(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='myusername', password='password')
+
+    def setUp(self):
+        cache.clear()
+        response = self.client.post(reverse('token_obtain_pair'), {'username': 'myusername', 'password': 'password'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.tokens = response.data
+
+    def get(self, access_token):
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access_token}')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('post-list'))
+        user_queries = [query for query in queries.captured_queries if 'auth_user' in query['sql']]
+        return response, len(user_queries)
+
+    def test_cached(self):
+        # Nothing derived from the password is sent to the clients
+        self.assertEqual(AccessToken(self.tokens['access'])[TOKEN_VERSION_CLAIM], 0)
+        response, user_queries = self.get(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries, 1)
+
+        # No queries of the user (nor of a session) once it is cached
+        with CaptureQueriesContext(connection) as queries:
+            response, user_queries = self.get(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries, 0)
+        self.assertFalse([query for query in queries.captured_queries if 'django_session' in query['sql']])
+
+        # Tokens without the claim (e.g. issued before it was added) are accepted
+        response, user_queries = self.get(AccessToken.for_user(self.user))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(user_queries, 0)
+
+    def test_deactivated(self):
+        self.assertEqual(self.get(self.tokens['access'])[0].status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        self.user.save()
+
+        response, user_queries = self.get(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['code'], 'user_inactive')
+
+    def test_deleted(self):
+        self.assertEqual(self.get(self.tokens['access'])[0].status_code, status.HTTP_200_OK)
+        self.user.delete()
+
+        response, user_queries = self.get(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['code'], 'user_not_found')
+
+    def test_password_changed(self):
+        self.assertEqual(self.get(self.tokens['access'])[0].status_code, status.HTTP_200_OK)
+        # Saved without changing the password
+        self.user.first_name = 'First'
+        self.user.save()
+        self.assertEqual(self.get(self.tokens['access'])[0].status_code, status.HTTP_200_OK)
+
+        self.user.set_password('new password')
+        self.user.save()
+
+        # Neither the access token nor the ones of the refresh token are accepted anymore
+        for access_token in (self.tokens['access'], RefreshToken(self.tokens['refresh']).access_token):
+            response, user_queries = self.get(access_token)
+            self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+            self.assertEqual(response.data['code'], 'password_changed')
+
+        response = self.client.post(
+            reverse('token_obtain_pair'), {'username': 'myusername', 'password': 'new password'}
+        )
+        self.assertEqual(AccessToken(response.data['access'])[TOKEN_VERSION_CLAIM], 1)
+        new_access_token = response.data['access']
+        self.assertEqual(self.get(new_access_token)[0].status_code, status.HTTP_200_OK)
+
+        # The revocation is kept in the DB, so it is not reversed once the cache is cleared (e.g. evicted, restarted)
+        cache.clear()
+        self.assertEqual(self.get(self.tokens['access'])[0].status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(self.get(new_access_token)[0].status_code, status.HTTP_200_OK)
+
+    def test_password_changed_by_another_process(self):
+        self.assertEqual(self.get(self.tokens['access'])[0].status_code, status.HTTP_200_OK)
+
+        # Another process changes the password, which drops the cached user only from its own cache
+        TokenVersion.bump(self.user.pk)
+        self.assertEqual(self.get(self.tokens['access'])[0].status_code, status.HTTP_200_OK)
+
+        # Rejected once the cached user expires
+        cache.clear()
+        response, user_queries = self.get(self.tokens['access'])
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.assertEqual(response.data['code'], 'password_changed')
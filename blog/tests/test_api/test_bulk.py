@@ -0,0 +1,115 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.outbox import OutboxEntry
+
+
+class TestBulkMixin(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='myusername')
+        cls.posts = [Post.objects.create(user_id=1, title=f'Title {index}', body='Body') for index in range(3)]
+        OutboxEntry.objects.all().delete()
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_bulk_create(self):
+        data = [
+            {'title': 'New 1', 'body': 'Body 1', 'user_id': 5},
+            {'body': 'Without a title'},
+            {'title': 'New 2', 'body': 'Body 2'},
+        ]
+        response = self.client.post(reverse('post-bulk'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], [201, 400, 201])
+        self.assertIn('title', results[1]['errors'])
+        created = Post.objects.filter(id__in=[results[0]['data']['id'], results[2]['data']['id']])
+        self.assertEqual(sorted(created.values_list('title', flat=True)), ['New 1', 'New 2'])
+        # New posts get the same user ID as the ones created one by one
+        self.assertEqual(set(created.values_list('user_id', flat=True)), {99999942})
+        self.assertEqual(results[0]['data']['user_id'], 99999942)
+        self.assertEqual(OutboxEntry.objects.filter(operation=OutboxEntry.Operation.CREATE).count(), 2)
+
+    def test_bulk_create_comments(self):
+        data = [
+            {'post': post.id, 'name': f'Name {post.id}', 'email': 'a@b.com', 'body': 'Body'} for post in self.posts
+        ] + [{'post': 0, 'name': 'Name', 'email': 'a@b.com', 'body': 'Body'}]
+
+        # The posts of all the comments, the insert of the comments and of their outbox entries (in a savepoint)
+        with self.assertNumQueries(5):
+            response = self.client.post(reverse('comment-bulk'), data, format='json')
+
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], [201, 201, 201, 400])
+        self.assertIn('post', results[3]['errors'])
+        self.assertEqual(Comment.objects.count(), 3)
+        self.assertEqual(results[0]['data']['post'], self.posts[0].id)
+
+    def test_bulk_update(self):
+        data = [
+            {'id': self.posts[0].id, 'title': 'Updated 0'},
+            {'id': self.posts[1].id, 'title': 'x' * 300},
+            {'id': 0, 'title': 'Missing'},
+            {'title': 'Without an ID'},
+            {'id': self.posts[2].id, 'body': 'Updated body'},
+        ]
+        response = self.client.patch(reverse('post-bulk'), data, format='json')
+
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], [200, 400, 404, 400, 200])
+        self.assertEqual(results[0]['data']['title'], 'Updated 0')
+        self.assertEqual(Post.objects.get(id=self.posts[0].id).title, 'Updated 0')
+        self.assertEqual(Post.objects.get(id=self.posts[1].id).title, 'Title 1')
+        self.assertEqual(Post.objects.get(id=self.posts[2].id).body, 'Updated body')
+        # The user ID of existing posts is kept
+        self.assertEqual(Post.objects.get(id=self.posts[0].id).user_id, 1)
+        self.assertEqual(
+            sorted(OutboxEntry.objects.values_list('object_id', flat=True)), [self.posts[0].id, self.posts[2].id]
+        )
+        self.assertFalse(Post.objects.get(id=self.posts[0].id).is_synced)
+
+    def test_bulk_update_duplicates(self):
+        data = [
+            {'id': self.posts[0].id, 'title': 'Updated 0'},
+            {'id': self.posts[1].id, 'title': 'Updated 1'},
+            {'id': self.posts[0].id, 'title': 'Updated again'},
+        ]
+        response = self.client.patch(reverse('post-bulk'), data, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data, {'non_field_errors': [f'Duplicate IDs: {self.posts[0].id}.']})
+        self.assertEqual(Post.objects.get(id=self.posts[0].id).title, 'Title 0')
+
+    def test_bulk_delete(self):
+        Comment.objects.create(post=self.posts[0], name='Name', email='a@b.com', body='Body')
+        OutboxEntry.objects.all().delete()
+
+        # One set based delete of the posts and one of their comments, and the insert of the outbox entries
+        # (in a savepoint)
+        with self.assertNumQueries(5):
+            response = self.client.delete(
+                reverse('post-bulk'), [self.posts[0].id, self.posts[1].id, 0, 'invalid'], format='json'
+            )
+
+        self.assertEqual([result['status'] for result in response.data['results']], [204, 204, 404, 400])
+        self.assertEqual(list(Post.objects.values_list('id', flat=True)), [self.posts[2].id])
+        self.assertFalse(Comment.objects.exists())
+        self.assertEqual(
+            sorted(OutboxEntry.objects.values_list('model_name', 'operation')),
+            [('comment', 'delete'), ('post', 'delete'), ('post', 'delete')],
+        )
+
+    def test_invalid_payload(self):
+        for data in ({'title': 'Not a list'}, [{'title': 'Title', 'body': 'Body'}] * 1001):
+            with self.subTest(type(data)):
+                response = self.client.post(reverse('post-bulk'), data, format='json')
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Post.objects.count(), 3)
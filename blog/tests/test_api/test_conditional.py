@@ -0,0 +1,134 @@
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITransactionTestCase
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.version import CollectionVersion
+
+
+class TestConditionalGetMixin(APITransactionTestCase):
+    """
+    The versions of the collections are bumped when the writing transactions commit, so each write is committed.
+    """
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(username='myusername')
+        self.post = Post.objects.create(user_id=1, title='Title', body='Body')
+        self.other_post = Post.objects.create(user_id=1, title='Other title', body='Body')
+        self.comment = Comment.objects.create(post=self.post, name='Name', email='a@b.com', body='Body')
+        self.client.force_authenticate(self.user)
+
+    def assertNotModified(self, url, response, num_queries, **params):
+        with self.assertNumQueries(num_queries):
+            not_modified = self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+
+    def test_list(self):
+        url = reverse('post-list')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('Last-Modified', response)
+        self.assertEqual(response['ETag'], self.client.get(url)['ETag'])
+
+        # Only the version of the collection is queried
+        self.assertNotModified(url, response, num_queries=1)
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']).status_code,
+            status.HTTP_304_NOT_MODIFIED,
+        )
+        # Other query strings are other representations
+        self.assertEqual(
+            self.client.get(url, {'page_size': 1}, HTTP_IF_NONE_MATCH=response['ETag']).status_code,
+            status.HTTP_200_OK,
+        )
+
+        # Any write to the collection changes the ETag
+        Post.objects.filter(id=self.other_post.id).update(title='Updated')
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(changed['ETag'], response['ETag'])
+
+    def test_retrieve(self):
+        url = reverse('post-detail', args=[self.post.id])
+        response = self.client.get(url)
+
+        # Only the fingerprint of the post is queried
+        self.assertNotIn('Last-Modified', response)
+        self.assertNotModified(url, response, num_queries=1)
+
+        # Writes which change only other posts are ignored, but not changes of the post
+        Post.objects.filter(id=self.other_post.id).update(title='Updated')
+        self.assertNotModified(url, response, num_queries=1)
+
+        self.post.title = 'Updated'
+        self.post.save()
+        changed = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data['title'], 'Updated')
+
+        # As well as its comment count (which is not part of the fingerprint)
+        Comment.objects.create(post=self.post, name='Name', email='a@b.com', body='Body')
+        counted = self.client.get(url, HTTP_IF_NONE_MATCH=changed['ETag'])
+        self.assertEqual(counted.status_code, status.HTTP_200_OK)
+        self.assertEqual(counted.data['comment_count'], 2)
+
+    def test_embedded_comments(self):
+        for url, params, num_queries in (
+            (reverse('post-list'), {'include': 'comments'}, 1),
+            (reverse('post-detail', args=[self.post.id]), {'include': 'comments'}, 2),
+            (reverse('post-comments', args=[self.post.id]), {}, 1),
+        ):
+            with self.subTest(url):
+                response = self.client.get(url, params)
+                self.assertIn('Last-Modified', response)
+                self.assertNotModified(url, response, num_queries, **params)
+
+                Comment.objects.filter(id=self.comment.id).update(name=f'Updated {url}')
+                changed = self.client.get(url, params, HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(changed.status_code, status.HTTP_200_OK)
+
+    def test_filtered_by_post(self):
+        url = reverse('comment-list')
+        response = self.client.get(url, {'user_id': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertNotModified(url, response, num_queries=1, user_id=1)
+
+        # The comment is listed for another user, once its post is
+        Post.objects.filter(id=self.post.id).update(user_id=2)
+        changed = self.client.get(url, {'user_id': 1}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(changed.status_code, status.HTTP_200_OK)
+        self.assertEqual(changed.data['results'], [])
+
+    def test_versions(self):
+        version, _ = CollectionVersion.current(['comment'])['comment']
+
+        # Only changes of the content of the rows bump the versions
+        Comment.objects.filter(id=self.comment.id).update(synced_fingerprint='synced')
+        self.assertEqual(CollectionVersion.current(['comment'])['comment'][0], version)
+        Comment.objects.filter(id=self.comment.id).update(body='Updated')
+        self.assertEqual(CollectionVersion.current(['comment'])['comment'][0], version + 1)
+        Comment.objects.all().delete()
+        self.assertEqual(CollectionVersion.current(['comment'])['comment'][0], version + 2)
+
+        # Once per transaction, and not for rolled back savepoints
+        with transaction.atomic():
+            comment = Comment.objects.create(post=self.post, name='Name', email='a@b.com', body='Body')
+            Comment.objects.update(body='Updated')
+            with self.assertRaises(IntegrityError), transaction.atomic():
+                Comment.objects.create(post=self.post, name='Name', email='a@b.com', body='Body')
+                Comment.objects.create(id=comment.id, post=self.post, name='Name', email='a@b.com', body='Body')
+            self.assertEqual(CollectionVersion.current(['comment'])['comment'][0], version + 2)
+        self.assertEqual(CollectionVersion.current(['comment'])['comment'][0], version + 3)
+
+        self.assertEqual(CollectionVersion.current(['other']), {'other': (0, None)})
+
+    def test_not_found(self):
+        for pk in (self.other_post.id + 1, 'invalid'):
+            with self.subTest(pk):
+                response = self.client.get(reverse('post-detail', args=[pk]))
+                self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+                self.assertNotIn('ETag', response)
@@ -0,0 +1,83 @@
+from unittest import mock
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from blog.api.v1.comment.views import CommentView
+from blog.api.v1.post.views import PostView
+from blog.models.post import Post
+from blog.models.comment import Comment
+
+
+class TestExportMixin(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='myusername')
+        cls.posts = [Post.objects.create(user_id=index % 2, title=f'Tïtle {index}', body='Body') for index in range(5)]
+        for post in cls.posts[:2]:
+            Comment.objects.create(post=post, name='Name', email='a@b.com', body='Body ')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def export(self, url, params=None, **headers):
+        response = self.client.get(url, params or {}, **headers)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        chunks = list(response.streaming_content)
+        content = b''.join(chunks)
+        if response.get('Content-Encoding') == 'gzip':
+            content = gzip.decompress(content)
+        return chunks, content
+
+    def test_export(self):
+        for url, list_url in (
+            (reverse('post-export'), reverse('post-list')),
+            (reverse('comment-export'), reverse('comment-list')),
+        ):
+            with self.subTest(url):
+                chunks, content = self.export(url)
+                # The same items as the list
+                items = self.client.get(list_url).data['results']
+                self.assertEqual([json.loads(line) for line in content.splitlines()], items)
+                self.assertNotIn(' '.encode(), content)
+
+                with (
+                    mock.patch.object(PostView, 'values_read', False),
+                    mock.patch.object(CommentView, 'values_read', False),
+                ):
+                    self.assertEqual(self.export(url)[1], content)
+
+    def test_chunks(self):
+        url = reverse('post-export')
+        with mock.patch.object(PostView, 'export_chunk_size', 2):
+            chunks, content = self.export(url)
+            self.assertEqual([len(chunk.splitlines()) for chunk in chunks], [2, 2, 1])
+
+            gzipped_chunks, gzipped_content = self.export(url, HTTP_ACCEPT_ENCODING='gzip, deflate')
+            self.assertEqual(gzipped_content, content)
+            self.assertGreater(len(gzipped_chunks), 1)
+
+    def test_parameters(self):
+        url = reverse('post-export')
+        chunks, content = self.export(url, {'since_id': self.posts[2].id, 'user_id': 0, 'fields': 'id'})
+        self.assertEqual(content, f'{{"id":{self.posts[4].id}}}\n'.encode())
+
+        chunks, content = self.export(url, {'since_id': self.posts[4].id})
+        self.assertEqual(content, b'')
+
+        for since_id in ('last', '99999999999999999999'):
+            with self.subTest(since_id):
+                response = self.client.get(url, {'since_id': since_id})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(json.loads(response.content), {'since_id': [f'Invalid value {since_id!r}.']})
+
+    def test_not_authenticated(self):
+        self.client.force_authenticate(None)
+        response = self.client.get(reverse('post-export'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -0,0 +1,90 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from blog.api.v1.comment.views import CommentView
+from blog.api.v1.post.views import PostView
+from blog.models.post import Post
+from blog.models.comment import Comment
+
+
+class TestSparseFieldsMixin(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='myusername')
+        cls.posts = [Post.objects.create(user_id=1, title=f'Title {index}', body='Body' * 1000) for index in range(3)]
+        cls.comment = Comment.objects.create(post=cls.posts[0], name='Name', email='a@b.com', body='Body')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def get(self, url, params, values_read=True):
+        table = 'blog_comment' if 'comment' in url else 'blog_post'
+        with (
+            mock.patch.object(PostView, 'values_read', values_read),
+            mock.patch.object(CommentView, 'values_read', values_read),
+            CaptureQueriesContext(connection) as context,
+        ):
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # The bodies of the page are not read, unless they are kept
+        page_query = [
+            query['sql'] for query in context.captured_queries
+            if f'FROM "{table}"' in query['sql'] and 'ORDER BY' in query['sql']
+        ]
+        self.assertEqual(len(page_query), 1)
+        self.assertEqual(f'"{table}"."body"' in page_query[0], 'body' in response.data['results'][0])
+        return response
+
+    def test_list(self):
+        url = reverse('post-list')
+        for params, keys in (
+            ({'fields': 'title,id'}, ['id', 'title']),
+            ({'exclude': 'body'}, ['id', 'title', 'user_id', 'comment_count']),
+            ({'fields': 'id,body,title', 'exclude': 'body'}, ['id', 'title']),
+            ({'fields': 'title', 'pagination': 'cursor', 'page_size': 2}, ['title']),
+            ({'fields': 'id,comments', 'include': 'comments'}, ['id', 'comments']),
+            ({'exclude': 'comments,body', 'include': 'comments'}, ['id', 'title', 'user_id', 'comment_count']),
+        ):
+            for values_read in (True, False):
+                with self.subTest(params=params, values_read=values_read):
+                    response = self.get(url, params, values_read)
+                    results = response.data['results']
+                    self.assertEqual([list(post) for post in results], [keys] * len(results))
+                    self.assertEqual(results[0][keys[0]], getattr(self.posts[0], keys[0]))
+
+        # The cursor (of the ID) works without the ID
+        response = self.client.get(url, {'fields': 'title', 'pagination': 'cursor', 'page_size': 2})
+        response = self.client.get(response.data['next'])
+        self.assertEqual(response.data['results'], [{'title': 'Title 2'}])
+
+        response = self.get(reverse('post-comments', args=[self.posts[0].id]), {'fields': 'email'})
+        self.assertEqual(response.data['results'], [{'email': 'a@b.com'}])
+
+    def test_retrieve(self):
+        for values_read in (True, False):
+            with (
+                self.subTest(values_read=values_read),
+                mock.patch.object(CommentView, 'values_read', values_read),
+            ):
+                response = self.client.get(reverse('comment-detail', args=[self.comment.id]), {'exclude': 'body,post'})
+                self.assertEqual(response.data, {'id': self.comment.id, 'name': 'Name', 'email': 'a@b.com'})
+
+    def test_invalid(self):
+        for params in ({'fields': 'id,text'}, {'exclude': 'comments'}):
+            with self.subTest(params=params):
+                response = self.client.get(reverse('post-list'), params)
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(list(response.data), list(params))
+
+    def test_writes(self):
+        # Not applied to the responses of writes
+        response = self.client.post(f'{reverse("post-list")}?fields=id', {'title': 'Title', 'body': 'Body'})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(set(response.data), {'id', 'title', 'body', 'user_id', 'comment_count'})
@@ -0,0 +1,65 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from blog.api.v1.post.views import PostView
+from blog.models.post import Post
+from blog.models.comment import Comment
+
+
+class TestOrderingFilter(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='myusername')
+        cls.posts = [Post.objects.create(user_id=1, title=f'Title {index}', body='Body') for index in range(4)]
+        for post, count in zip(cls.posts, (1, 3, 0, 1)):
+            Comment.objects.bulk_create([
+                Comment(post=post, name='Name', email='a@b.com', body='Body') for _ in range(count)
+            ])
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def items(self, params):
+        response = self.client.get(reverse('post-list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [(item['id'], item['comment_count']) for item in response.data['results']]
+
+    def test_ordering(self):
+        first, second, third, fourth = [post.id for post in self.posts]
+        for values_read in (True, False):
+            with self.subTest(values_read=values_read), mock.patch.object(PostView, 'values_read', values_read):
+                # The ID is the tie breaker, in the same direction
+                self.assertEqual(
+                    self.items({'ordering': '-comment_count'}),
+                    [(second, 3), (fourth, 1), (first, 1), (third, 0)],
+                )
+                self.assertEqual(
+                    self.items({'ordering': 'comment_count'}),
+                    [(third, 0), (first, 1), (fourth, 1), (second, 3)],
+                )
+                self.assertEqual([item[0] for item in self.items({'ordering': '-id'})], [fourth, third, second, first])
+
+        # Along with the filters, and paginated
+        self.assertEqual(
+            self.items({'ordering': '-comment_count', 'page_size': 2, 'page': 2}), [(first, 1), (third, 0)]
+        )
+        # Cursor pagination walks the IDs regardless
+        self.assertEqual(
+            [item[0] for item in self.items({'ordering': '-comment_count', 'pagination': 'cursor'})],
+            [first, second, third, fourth],
+        )
+
+    def test_invalid(self):
+        for value in ('title', '--comment_count', 'comment_count,id'):
+            with self.subTest(value=value):
+                response = self.client.get(reverse('post-list'), {'ordering': value})
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(
+                    response.data,
+                    {'ordering': ['Must be one of: id, comment_count (prefixed with - for descending order).']},
+                )
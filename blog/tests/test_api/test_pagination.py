@@ -0,0 +1,56 @@
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from blog.models.post import Post
+
+
+class TestBlogPagination(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='myusername')
+        cls.posts = [Post.objects.create(user_id=1, title=f'Title {index}', body='Body') for index in range(5)]
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def walk(self, url):
+        ids = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids += [post['id'] for post in response.data['results']]
+            url = response.data['next']
+        return ids
+
+    def test_page_number(self):
+        response = self.client.get(reverse('post-list'), {'page_size': 2, 'page': 3})
+        self.assertEqual(response.data['count'], 5)
+        self.assertEqual([post['id'] for post in response.data['results']], [self.posts[4].id])
+
+    def test_cursor(self):
+        ids = [post.id for post in self.posts]
+        url = reverse('post-list')
+
+        self.assertEqual(self.walk(f'{url}?pagination=cursor&page_size=2'), ids)
+        self.assertEqual(self.walk(f'{url}?pagination=cursor&page_size=2&order=desc'), ids[::-1])
+
+    def test_cursor_queries(self):
+        response = self.client.get(reverse('post-list'), {'pagination': 'cursor', 'page_size': 2})
+
+        # Only the version of the collection (for the ETag) and the page are queried (no count and no offset),
+        # starting after the last ID of the previous one
+        with self.assertNumQueries(2) as context:
+            self.client.get(response.data['next'])
+        self.assertNotIn('OFFSET', context.captured_queries[1]['sql'])
+        self.assertIn(f'"blog_post"."id" > {self.posts[1].id}', context.captured_queries[1]['sql'])
+
+    def test_invalid(self):
+        url = reverse('post-list')
+        for params in ({'pagination': 'other'}, {'pagination': 'cursor', 'order': 'other'}, {'cursor': 'invalid'}):
+            with self.subTest(params):
+                response = self.client.get(url, params)
+                self.assertIn(response.status_code, (status.HTTP_400_BAD_REQUEST, status.HTTP_404_NOT_FOUND))
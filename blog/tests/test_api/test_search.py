@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APITestCase
+
+from blog.api.v1.post.views import PostView
+from blog.models.post import Post
+from blog.models.comment import Comment
+
+
+class TestFullTextSearchFilter(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='myusername')
+        cls.body_match = Post.objects.create(user_id=1, title='Other', body='Cats are sleeping')
+        cls.no_match = Post.objects.create(user_id=1, title='Dogs', body='Dogs are barking')
+        cls.title_match = Post.objects.create(user_id=1, title='Sleeping cats', body='Body')
+        cls.comment = Comment.objects.create(post=cls.no_match, name='A cat', email='a@b.com', body='Body')
+        Comment.objects.create(post=cls.no_match, name='Name', email='a@b.com', body='Body')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def search(self, url, params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item['id'] for item in response.data['results']]
+
+    def test_search(self):
+        url = reverse('post-list')
+        # Ranked (titles weigh more than bodies), with stemming
+        for values_read in (True, False):
+            with self.subTest(values_read=values_read), mock.patch.object(PostView, 'values_read', values_read):
+                self.assertEqual(self.search(url, {'search': 'cat'}), [self.title_match.id, self.body_match.id])
+
+        # In the syntax of web search engines
+        self.assertEqual(self.search(url, {'search': '"sleeping cats"'}), [self.title_match.id])
+        self.assertEqual(self.search(url, {'search': 'cats -sleeping'}), [])
+        self.assertEqual(len(self.search(url, {'search': 'cats or barking'})), 3)
+        self.assertEqual(self.search(url, {'search': ' '}), [self.body_match.id, self.no_match.id, self.title_match.id])
+
+        # Cursor pages walk the matches in order of their IDs
+        self.assertEqual(
+            self.search(url, {'search': 'cats', 'pagination': 'cursor'}), [self.body_match.id, self.title_match.id]
+        )
+        self.assertEqual(self.search(reverse('comment-list'), {'search': 'cats'}), [self.comment.id])
+
+    def test_updates(self):
+        # The search vectors are maintained by the DB, however the rows are written
+        Post.objects.filter(id=self.no_match.id).update(body='A cat')
+        Post.objects.bulk_create([Post(id=self.title_match.id + 1, user_id=1, title='Cat', body='Body')])
+        self.assertEqual(
+            set(self.search(reverse('post-list'), {'search': 'cat'})),
+            {self.body_match.id, self.no_match.id, self.title_match.id, self.title_match.id + 1},
+        )
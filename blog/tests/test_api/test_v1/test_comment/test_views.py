@@ -69,3 +69,29 @@ class TestCommentView(APITestCase):
         self.assertEqual(response.data['name'], self.comment.name)
         self.assertEqual(response.data['email'], self.comment.email)
         self.assertEqual(response.data['body'], self.comment.body)
+
+    def test_filter_comments(self):
+        other_post = Post.objects.create(user_id=2, title='Other title', body='Other body')
+        other_comment = Comment.objects.create(post=other_post, name='Jane', email='jane@example.com', body='Body')
+        self.client.force_login(self.user)
+        url = reverse('comment-list')
+
+        for params, expected_comments in (
+            ({'post': other_post.id}, [other_comment]),
+            ({'email': 'johndoe@example.com'}, [self.comment]),
+            ({'user_id': 1}, [self.comment]),
+            ({'post': self.post.id, 'email': 'jane@example.com'}, []),
+        ):
+            with self.subTest(params):
+                response = self.client.get(url, params)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    [comment['id'] for comment in response.data['results']],
+                    [comment.id for comment in expected_comments],
+                )
+
+        for value in ('invalid', '99999999999999999999', '-99999999999999999999'):
+            with self.subTest(value):
+                response = self.client.get(url, {'post': value})
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.data, {'post': [f'Invalid value {value!r}.']})
@@ -4,6 +4,7 @@ from rest_framework.test import APITestCase
 from rest_framework import status
 
 from blog.models.post import Post
+from blog.models.comment import Comment
 
 
 class TestPostView(APITestCase):
@@ -58,4 +59,45 @@ class TestPostView(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
         self.assertEqual(Post.objects.count(), 0)
 
+    def test_filter_posts(self):
+        other_post = Post.objects.create(user_id=1, title='Other Post', body='Other post body')
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('post-list'), {'user_id': 1})
+        self.assertEqual([post['id'] for post in response.data['results']], [other_post.id])
+
+    def test_list_post_comments(self):
+        comments = [
+            Comment.objects.create(post=self.post, name=f'Name {index}', email='a@b.com', body='Body')
+            for index in range(3)
+        ]
+        other_post = Post.objects.create(user_id=1, title='Other Post', body='Other post body')
+        Comment.objects.create(post=other_post, name='Other', email='a@b.com', body='Body')
+        self.client.force_authenticate(self.user)
+
+        url = reverse('post-comments', args=[self.post.id])
+        # The versions of the collections (for the ETag), the post and a page of its comments (with their count)
+        with self.assertNumQueries(4):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual([comment['id'] for comment in response.data['results']], [comment.id for comment in comments])
+
+        response = self.client.get(reverse('post-comments', args=[other_post.id + 1]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_list_posts_include_comments(self):
+        for index in range(3):
+            post = Post.objects.create(user_id=1, title=f'Post {index}', body='Body')
+            Comment.objects.create(post=post, name=f'Name {index}', email='a@b.com', body='Body')
+        self.client.force_authenticate(self.user)
+
+        # The versions of the collections, the count, the page of posts and all of their comments, however many
+        # posts there are
+        with self.assertNumQueries(4):
+            response = self.client.get(reverse('post-list'), {'include': 'comments'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([len(post['comments']) for post in response.data['results']], [0, 1, 1, 1])
+        self.assertEqual(response.data['results'][1]['comments'][0]['name'], 'Name 0')
 
+        response = self.client.get(reverse('post-list'), {'include': 'users'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,138 @@
+from datetime import datetime, timezone
+from decimal import Decimal
+from unittest import mock
+import uuid
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from blog.api.renderers import FastJSONRenderer
+from blog.api.values import values_mapper
+from blog.api.v1.comment.serializers import CommentSerializer
+from blog.api.v1.comment.views import CommentView
+from blog.api.v1.post.serializers import PostSerializer, PostWithCommentsSerializer
+from blog.api.v1.post.views import PostView
+from blog.models.post import Post
+from blog.models.comment import Comment
+
+
+class TestValuesReadMixin(APITestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_user(username='myusername')
+        cls.posts = [
+            Post.objects.create(user_id=1, title='Title', body='Body'),
+            Post.objects.create(user_id=2, title='Tïtle "quoted"  ', body='Line\nline\\ ✓'),
+            Post.objects.create(user_id=2, title='No comments', body=''),
+        ]
+        for index, post in enumerate(cls.posts[:2]):
+            for number in range(2):
+                Comment.objects.create(post=post, name=f'Name {index} {number}', email='a@b.com', body='Bödy')
+
+    def setUp(self):
+        self.client.force_authenticate(self.user)
+
+    def test_same_responses(self):
+        post_id = self.posts[1].id
+        for url, params in (
+            (reverse('post-list'), {}),
+            (reverse('post-list'), {'include': 'comments'}),
+            (reverse('post-list'), {'user_id': 2, 'page_size': 1, 'page': 2}),
+            (reverse('post-list'), {'pagination': 'cursor', 'page_size': 2, 'include': 'comments'}),
+            (reverse('post-detail', args=[post_id]), {}),
+            (reverse('post-detail', args=[post_id]), {'include': 'comments'}),
+            (reverse('post-detail', args=[self.posts[2].id]), {'include': 'comments'}),
+            (reverse('post-detail', args=[self.posts[2].id + 1]), {}),
+            (reverse('post-comments', args=[post_id]), {}),
+            (reverse('comment-list'), {}),
+            (reverse('comment-list'), {'post': post_id, 'pagination': 'cursor', 'order': 'desc'}),
+            (reverse('comment-detail', args=[Comment.objects.first().id]), {}),
+        ):
+            with self.subTest(url=url, params=params):
+                # Without the serializers, with the same queries
+                num_queries = self.count_queries(url, params)
+                with (
+                    mock.patch.object(serializers.Serializer, 'to_representation', side_effect=AssertionError),
+                    self.assertNumQueries(num_queries),
+                ):
+                    response = self.client.get(url, params)
+                with (
+                    mock.patch.object(PostView, 'values_read', False),
+                    mock.patch.object(CommentView, 'values_read', False),
+                ):
+                    expected = self.client.get(url, params)
+                self.assertEqual(response.status_code, expected.status_code)
+                self.assertEqual(response.content, expected.content)
+                self.assertEqual(response['ETag'] if 'ETag' in response else None, expected.get('ETag'))
+
+    def count_queries(self, url, params) -> int:
+        with (
+            mock.patch.object(PostView, 'values_read', False),
+            mock.patch.object(CommentView, 'values_read', False),
+            CaptureQueriesContext(connection) as context,
+        ):
+            self.client.get(url, params)
+        return len(context.captured_queries)
+
+    def test_mappers(self):
+        self.assertEqual(values_mapper(CommentSerializer).columns, ('id', 'post_id', 'name', 'email', 'body'))
+        self.assertEqual(values_mapper(PostSerializer).columns, ('id', 'title', 'body', 'user_id', 'comment_count'))
+        self.assertEqual(
+            values_mapper(PostWithCommentsSerializer).columns, ('id', 'title', 'body', 'user_id', 'comment_count')
+        )
+
+        row = {'id': 1, 'title': 'Title', 'body': 'Body', 'user_id': 2, 'comment_count': 0}
+        mapper = values_mapper(PostWithCommentsSerializer)
+        # In the order of the fields of the serializer
+        self.assertEqual(list(mapper.map_row(row)), ['id', 'title', 'body', 'user_id', 'comment_count', 'comments'])
+        for keys in ({'id', 'title', 'comments'}, {'title'}, {'comments'}, set()):
+            with self.subTest(keys):
+                self.assertEqual(
+                    mapper.restrict(keys).map_row(row),
+                    {key: value for key, value in [*row.items(), ('comments', None)] if key in keys},
+                )
+
+        class MethodSerializer(PostSerializer):
+            title = serializers.SerializerMethodField()
+
+            def get_title(self, post):
+                return post.title.upper()
+
+        class DottedSerializer(CommentSerializer):
+            user_id = serializers.IntegerField(source='post.user_id')
+
+            class Meta(CommentSerializer.Meta):
+                fields = CommentSerializer.Meta.fields + ('user_id',)
+
+        class NestedSerializer(PostWithCommentsSerializer):
+            comments = DottedSerializer(source='comment_set', many=True, read_only=True)
+
+        # Serialized as usual
+        for serializer_class in (MethodSerializer, DottedSerializer, NestedSerializer):
+            with self.subTest(serializer_class.__name__):
+                self.assertIsNone(values_mapper(serializer_class))
+
+
+class TestFastJSONRenderer(SimpleTestCase):
+
+    def test_render(self):
+        for data in (
+            None,
+            {},
+            [{'id': 1, 'title': 'Tïtle "quoted"   ', 'body': 'Line\nline\\ ✓ \x00', 'user_id': None}],
+            {'count': 2, 'next': 'http://testserver/?page=2', 'results': [True, False, 1.5, -3]},
+            {'at': datetime(2023, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc), 'id': uuid.uuid4()},
+            {'price': Decimal('1.10'), 'huge': 2 ** 70},
+        ):
+            with self.subTest(data=data):
+                self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+        indented = 'application/json; indent=2'
+        self.assertEqual(FastJSONRenderer().render({'a': 1}, indented), JSONRenderer().render({'a': 1}, indented))
@@ -0,0 +1,38 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.base import compute_fingerprint
+from blog.models.outbox import OutboxEntry, suppress_change_tracking
+
+
+class TestCommand(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        with suppress_change_tracking():
+            post = Post.objects.create(id=1, user_id=1, title='Title One', body='Body One')
+            Comment.objects.create(id=1, post=post, name='Name One', email='email@one.com', body='Body One')
+
+            # As if the rows existed before the fingerprints were added
+            Post.objects.update(fingerprint='')
+            Comment.objects.update(fingerprint='')
+
+    def test_handle(self):
+        call_command('backfill_fingerprints', stdout=StringIO())
+
+        post = Post.objects.get()
+        self.assertEqual(post.fingerprint, compute_fingerprint(post.serialized_value))
+        self.assertIsNone(post.synced_fingerprint)
+        comment = Comment.objects.get()
+        self.assertEqual(comment.fingerprint, compute_fingerprint(comment.serialized_value))
+        self.assertFalse(OutboxEntry.objects.exists())
+
+    def test_handle_mark_synced(self):
+        call_command('backfill_fingerprints', mark_synced=True, stdout=StringIO())
+
+        self.assertFalse(Post.objects.unsynced().exists())
+        self.assertFalse(Comment.objects.unsynced().exists())
@@ -0,0 +1,46 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.version import CollectionVersion
+
+
+class TestCommand(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.posts = [Post.objects.create(user_id=1, title=f'Cats {index}', body='Body') for index in range(3)]
+        Comment.objects.create(post=cls.posts[0], name='Name', email='a@b.com', body='About dogs')
+
+    def search(self, model_class, query):
+        return list(model_class.objects.filter(search_vector=query).order_by('id').values_list('id', flat=True))
+
+    def test_handle(self):
+        # As if the rows existed before the search vectors were added
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE blog_post SET search_vector = NULL WHERE id <> %s', [self.posts[2].id])
+            cursor.execute('UPDATE blog_comment SET search_vector = NULL')
+        self.assertEqual(self.search(Post, 'cats'), [self.posts[2].id])
+        versions = CollectionVersion.current(['post', 'comment'])
+
+        stdout = StringIO()
+        call_command('backfill_search_vectors', batch_size=2, stdout=stdout)
+        self.assertEqual(
+            stdout.getvalue(),
+            'Backfilled search vectors of 2 posts\nBackfilled search vectors of 1 comments\n',
+        )
+        self.assertEqual(self.search(Post, 'cats'), [post.id for post in self.posts])
+        self.assertEqual(self.search(Comment, 'dogs'), [Comment.objects.get().id])
+        # The content is the same
+        self.assertEqual(CollectionVersion.current(['post', 'comment']), versions)
+
+        stdout = StringIO()
+        call_command('backfill_search_vectors', stdout=stdout)
+        self.assertEqual(
+            stdout.getvalue(),
+            'Backfilled search vectors of 0 posts\nBackfilled search vectors of 0 comments\n',
+        )
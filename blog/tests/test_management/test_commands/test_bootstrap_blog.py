@@ -1,3 +1,5 @@
+from django.conf import settings
+from django.core.management import call_command
 from django.test import TransactionTestCase
 from unittest.mock import patch, MagicMock
 
@@ -5,97 +7,96 @@ from blog.models import Post, Comment
 from blog.management.commands import bootstrap_blog
 
 
+def patch_fetch_list(posts_data, comments_data):
+    """
+    Patch the listings of the external API: the posts listing returns `posts_data`, and any other
+    listing `comments_data` (either of them may be an exception to raise).
+    """
+    async def fake_fetch_list(session, url, params=None):
+        result = posts_data if url == settings.POSTS_URL else comments_data
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    def decorator(test):
+        test = patch('blog.management.commands.bootstrap_blog.fetch_list', fake_fetch_list)(test)
+        return patch('blog.sync.fetch.fetch_list', fake_fetch_list)(test)
+    return decorator
+
+
 class TestCommand(TransactionTestCase):
 
     def setUp(self):
         self.command = bootstrap_blog.Command()
 
         # Mock the aiohttp.ClientSession
-        self.mock_client_session = patch('blog.management.commands.bootstrap_blog.aiohttp.ClientSession').start()
+        self.client_session_patcher = patch('blog.sync.http.aiohttp.ClientSession')
+        self.mock_client_session = self.client_session_patcher.start()
         self.mock_session_instance = MagicMock()
         self.mock_client_session.return_value = self.mock_session_instance
 
     def tearDown(self):
         # Stop the patch for aiohttp.ClientSession
-        self.mock_client_session.stop()
+        self.client_session_patcher.stop()
 
-    @patch('requests.get')
-    @patch('blog.management.commands.bootstrap_blog.fetch_json')
-    def test_handle_success(self, mock_fetch_json, mock_requests_get):
-        # Mock the response from posts endpoint
-        posts_data = [
+    @patch_fetch_list(
+        posts_data=[
             {'id': 1, 'userId': 1, 'title': 'Post 1', 'body': 'Body 1'},
-        ]
-        mock_posts_response = MagicMock()
-        mock_posts_response.json.return_value = posts_data
-        mock_requests_get.return_value = mock_posts_response
-
-        # Mock the response from comments endpoint
-        comments_data = [
+        ],
+        comments_data=[
             {'id': 1, 'name': 'Comment 1', 'email': 'comment1@example.com', 'body': 'Comment body 1'},
             {'id': 2, 'name': 'Comment 2', 'email': 'comment2@example.com', 'body': 'Comment body 2'},
-        ]
-        mock_fetch_json.return_value = comments_data
-
+        ],
+    )
+    def test_handle_success(self):
         # Execute the command
-        self.command.handle()
+        call_command(self.command)
 
         # Assertions
         self.assertEqual(Post.objects.count(), 1)
         self.assertEqual(Comment.objects.count(), 2)
 
-    @patch('requests.get')
-    def test_handle_posts_request_failure(self, mock_requests_get):
-        # Mock the failed response from posts endpoint
-        mock_posts_response = MagicMock()
-        mock_posts_response.json.side_effect = Exception('Posts endpoint error')
-        mock_requests_get.return_value = mock_posts_response
+        # Imported records are the same as the external ones
+        self.assertFalse(Post.objects.unsynced().exists())
+        self.assertFalse(Comment.objects.unsynced().exists())
 
+    @patch_fetch_list(posts_data=Exception('Posts endpoint error'), comments_data=[])
+    def test_handle_posts_request_failure(self):
         # Execute the command
         with self.assertRaises(Exception):
-            self.command.handle()
+            call_command(self.command)
 
         # Assertions
         self.assertEqual(Post.objects.count(), 0)
         self.assertEqual(Comment.objects.count(), 0)
 
-    @patch('requests.get')
-    @patch('blog.management.commands.bootstrap_blog.fetch_json')
-    def test_handle_comments_request_failure(self, mock_fetch_json, mock_requests_get):
-        # Mock the response from posts endpoint
-        posts_data = [
+    @patch_fetch_list(
+        posts_data=[
             {'id': 1, 'userId': 1, 'title': 'Post 1', 'body': 'Body 1'},
             {'id': 2, 'userId': 2, 'title': 'Post 2', 'body': 'Body 2'},
-        ]
-        mock_posts_response = MagicMock()
-        mock_posts_response.json.return_value = posts_data
-        mock_requests_get.return_value = mock_posts_response
-
-        # Mock the failed response from comments endpoint
-        mock_fetch_json.side_effect = Exception('Comments endpoint error')
-
+        ],
+        comments_data=Exception('Comments endpoint error'),
+    )
+    def test_handle_comments_request_failure(self):
         # Execute the command
         with self.assertRaises(Exception):
-            self.command.handle()
+            call_command(self.command)
 
         # Assertions
         self.assertEqual(Post.objects.count(), 0)
         self.assertEqual(Comment.objects.count(), 0)
 
-    @patch('requests.get')
-    def test_handle_invalid_posts_data(self, mock_requests_get):
-        # Mock the invalid response from posts endpoint
-        invalid_posts_data = [
+    @patch_fetch_list(
+        posts_data=[
             {'userId': 1, 'title': 'Post 1', 'body': 'Body 1'},
             {'id': 2, 'userId': 2, 'title': 'Post 2', 'body': 'Body 2'},
-        ]
-        mock_posts_response = MagicMock()
-        mock_posts_response.json.return_value = invalid_posts_data
-        mock_requests_get.return_value = mock_posts_response
-
+        ],
+        comments_data=[],
+    )
+    def test_handle_invalid_posts_data(self):
         # Execute the command
         with self.assertRaises(KeyError):  # Raises KeyError since the first post item does not have field 'id'
-            self.command.handle()
+            call_command(self.command)
 
         # Assertions
         self.assertEqual(Post.objects.count(), 0)
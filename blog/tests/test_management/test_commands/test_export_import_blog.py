@@ -0,0 +1,100 @@
+from io import StringIO
+from unittest import mock
+import os
+import tempfile
+import threading
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import TransactionTestCase
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.outbox import OutboxEntry
+
+
+class TestCommands(TransactionTestCase):
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'blog.ndjson.gz')
+
+        for post_index in range(3):
+            post = Post.objects.create(user_id=post_index, title=f'Title {post_index}', body='Body')
+            for comment_index in range(2):
+                Comment.objects.create(post=post, name=f'Name {comment_index}', email='a@b.com', body='Body')
+
+    def test_export_import(self):
+        stdout = StringIO()
+        call_command('export_blog', self.path, stdout=stdout)
+        self.assertIn('Exported 3 posts and 6 comments', stdout.getvalue())
+
+        expected_posts = list(Post.objects.order_by('id').values_list('id', 'user_id', 'title', 'body'))
+        expected_comments = list(Comment.objects.order_by('id').values_list('id', 'post_id', 'name', 'email', 'body'))
+        for command, options in (('import_blog', {}), ('bootstrap_blog', {'snapshot': self.path})):
+            with self.subTest(command):
+                Post.objects.all().delete()
+                OutboxEntry.objects.all().delete()
+                stdout = StringIO()
+                args = () if options else (self.path,)
+                call_command(command, *args, **options, stdout=stdout)
+
+                self.assertIn('Imported 3 posts and 6 comments', stdout.getvalue())
+                self.assertEqual(
+                    list(Post.objects.order_by('id').values_list('id', 'user_id', 'title', 'body')), expected_posts
+                )
+                self.assertEqual(
+                    list(Comment.objects.order_by('id').values_list('id', 'post_id', 'name', 'email', 'body')),
+                    expected_comments,
+                )
+                self.assertFalse(Post.objects.unsynced().exists())
+                self.assertFalse(OutboxEntry.objects.exists())
+
+                # Sequences are reset after the import
+                self.assertGreater(
+                    Post.objects.create(user_id=1, title='Title', body='Body').id, expected_posts[-1][0]
+                )
+
+    def test_export_concurrent_writes(self):
+        def create_post():
+            # In another transaction (of another connection)
+            post = Post.objects.create(user_id=1, title='Created meanwhile', body='Body')
+            Comment.objects.create(post=post, name='Name', email='a@b.com', body='Body')
+            connection.close()
+
+        def snapshot_models():
+            yield Post
+            # Between the queries of the posts and of the comments
+            thread = threading.Thread(target=create_post)
+            thread.start()
+            thread.join()
+            yield Comment
+
+        stdout = StringIO()
+        with mock.patch('blog.sync.snapshot.SNAPSHOT_MODELS', snapshot_models()):
+            call_command('export_blog', self.path, stdout=stdout)
+        self.assertIn('Exported 3 posts and 6 comments', stdout.getvalue())
+        self.assertEqual(Post.objects.count(), 4)
+
+        Post.objects.all().delete()
+        stdout = StringIO()
+        call_command('import_blog', self.path, stdout=stdout)
+        self.assertIn('Imported 3 posts and 6 comments', stdout.getvalue())
+
+    def test_import_into_non_empty_db(self):
+        call_command('export_blog', self.path, stdout=StringIO())
+
+        with self.assertRaisesMessage(CommandError, 'there are existing ones in DB'):
+            call_command('import_blog', self.path, stdout=StringIO())
+
+    def test_import_invalid_snapshot(self):
+        Post.objects.all().delete()
+        with open(self.path, 'wb') as snapshot_file:
+            snapshot_file.write(b'not gzip')
+
+        with self.assertRaisesMessage(CommandError, 'Can not import snapshot'):
+            call_command('import_blog', self.path, stdout=StringIO())
+        with self.assertRaisesMessage(CommandError, 'Can not import snapshot'):
+            call_command('import_blog', self.path + '.missing', stdout=StringIO())
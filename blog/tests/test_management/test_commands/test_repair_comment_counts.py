@@ -0,0 +1,36 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+
+
+class TestCommand(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.posts = [Post.objects.create(user_id=1, title=f'Title {index}', body='Body') for index in range(3)]
+        for post in cls.posts[:2]:
+            Comment.objects.create(post=post, name='Name', email='a@b.com', body='Body')
+
+    def test_handle(self):
+        # As if the triggers were disabled for some writes
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'UPDATE blog_post SET comment_count = 5 WHERE id IN %s', [(self.posts[0].id, self.posts[2].id)]
+            )
+
+        stdout = StringIO()
+        call_command('repair_comment_counts', batch_size=2, stdout=stdout)
+        self.assertEqual(stdout.getvalue(), 'Repaired the comment counts of 2 posts\n')
+        self.assertEqual(
+            list(Post.objects.order_by('id').values_list('comment_count', flat=True)),
+            [1, 1, 0],
+        )
+
+        stdout = StringIO()
+        call_command('repair_comment_counts', stdout=stdout)
+        self.assertEqual(stdout.getvalue(), 'Repaired the comment counts of 0 posts\n')
@@ -0,0 +1,80 @@
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TransactionTestCase
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.outbox import OutboxEntry
+from blog.management.commands.sync_worker import Command
+
+
+class TestCommand(TransactionTestCase):
+
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
+    def test_handle_drains_the_outbox(
+            self,
+            mock_aiohttp_delete: mock.Mock,
+            mock_aiohttp_patch: mock.Mock,
+            mock_aiohttp_post: mock.Mock,
+    ):
+        mock_aiohttp_post.return_value.__aenter__.return_value.status = 201
+
+        post = Post.objects.create(id=1, user_id=1, title="Title One", body="Body One")
+        # Created and deleted before the worker runs, so nothing needs to be sent
+        Comment.objects.create(post=post, id=1, name="Name One", email="email@one.com", body="Body One")
+        Comment.objects.filter(id=1).delete()
+
+        call_command(Command(), max_cycles=1)
+
+        mock_aiohttp_post.assert_called_once_with(
+            Post.list_create_url(),
+            json={'userId': 1, 'title': 'Title One', 'body': 'Body One'},
+        )
+        mock_aiohttp_patch.assert_not_called()
+        mock_aiohttp_delete.assert_not_called()
+        self.assertFalse(OutboxEntry.objects.exists())
+
+    @mock.patch('blog.management.commands.sync_worker.backoff_delay', mock.Mock(return_value=0))
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    def test_handle_dead_letters(self, mock_aiohttp_patch: mock.Mock):
+        # e.g. the post is deleted in the external API, so the update can never succeed
+        mock_aiohttp_patch.return_value.__aenter__.return_value.status = 404
+
+        Post.objects.create(id=1, user_id=1, title="Title One", body="Body One")
+        OutboxEntry.objects.all().delete()
+        OutboxEntry.objects.create(model_name='post', object_id=1, operation='update')
+
+        call_command(Command(), max_cycles=3, max_attempts=2, catch_up_interval=0)
+
+        # Not retried after the second failure
+        self.assertEqual(mock_aiohttp_patch.call_count, 2)
+        entry = OutboxEntry.objects.get()
+        self.assertEqual(entry.attempts, 2)
+        self.assertIsNotNone(entry.dead_lettered_at)
+
+    @mock.patch('blog.management.commands.sync_worker.backoff_delay', mock.Mock(return_value=0))
+    @mock.patch('blog.management.commands.sync_worker.push_pending_changes')
+    def test_handle_unexpected_error(self, mock_push_pending_changes: mock.Mock):
+        mock_push_pending_changes.side_effect = [ValueError('Unexpected'), 0]
+
+        with self.assertLogs('blog.management.commands.sync_worker', level='ERROR'):
+            call_command(Command(), max_cycles=2, catch_up_interval=0)
+
+        self.assertEqual(mock_push_pending_changes.call_count, 2)
+
+    def test_wait_for_notification(self):
+        command = Command()
+        command.stopping = False
+        command.listen()
+
+        # Nothing is recorded yet
+        self.assertFalse(command.wait_for_notification(timeout=0.1))
+
+        Post.objects.create(id=1, user_id=1, title="Title One", body="Body One")
+        self.assertTrue(command.wait_for_notification(timeout=5))
+
+        command.consume_notifications()
+        self.assertFalse(command.wait_for_notification(timeout=0.1))
@@ -1,23 +1,40 @@
+from io import StringIO
+import asyncio
+import json
+import tempfile
 from unittest import mock
 
-from django.test import TestCase
-from requests.exceptions import Timeout
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Min
+from django.test import TestCase, TransactionTestCase
 
 from blog.models.post import Post
 from blog.models.comment import Comment
+from blog.models.outbox import OutboxEntry, suppress_change_tracking
+from blog.models.base import compute_fingerprint
 from blog.management.commands.synchronize import Command
+from blog.sync.partition import IdRange
+from blog.sync.push import dispatch
 
 
 class FakeHttpResponse:
+    status = 200
 
     def __init__(self, json_body):
         self._json = json_body
 
-    def json(self):
+    async def json(self):
         return self._json
 
+    async def __aenter__(self):
+        return self
 
-def fake_requests_get(url: str, *args, **kwargs):
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+def fake_http_get(url: str, *args, **kwargs):
     if 'post' in url:
         return FakeHttpResponse(
             [
@@ -69,32 +86,36 @@ def fake_requests_get(url: str, *args, **kwargs):
         )
 
 
-class TestCommand(TestCase):
+def create_items():
+    # This record is the same with its external item
+    Post.objects.create(id=1, user_id=1, title="Title One", body="Body One")
 
-    @classmethod
-    def setUpTestData(cls):
-        # This record is the same with its external item
-        Post.objects.create(id=1, user_id=1, title="Title One", body="Body One")
+    # This record's external item needs to be updated
+    Post.objects.create(id=2, user_id=2, title="Updated Title Two", body="Body Two")
 
-        # This record's external item needs to be updated
-        Post.objects.create(id=2, user_id=2, title="Updated Title Two", body="Body Two")
+    # A new external item, needs to be created for this record
+    Post.objects.create(id=4, user_id=4, title="Title Four", body="Body Four")
 
-        # A new external item, needs to be created for this record
-        Post.objects.create(id=4, user_id=4, title="Title Four", body="Body Four")
+    # This record is the same with its external item
+    Comment.objects.create(post_id=1, id=1, name="Name One", email="email@one.com", body="Body One")
 
-        # This record is the same with its external item
-        Comment.objects.create(post_id=1, id=1, name="Name One", email="email@one.com", body="Body One")
+    # This record's external item needs to be updated
+    Comment.objects.create(post_id=2, id=2, name="Updated Name Two", email="email@two.com", body="Body Two")
+
+    # A new external item, needs to be created for this record
+    Comment.objects.create(post_id=4, id=4, name="Name Four", email="email@four.com", body="Body Four")
 
-        # This record's external item needs to be updated
-        Comment.objects.create(post_id=2, id=2, name="Updated Name Two", email="email@two.com", body="Body Two")
 
-        # A new external item, needs to be created for this record
-        Comment.objects.create(post_id=4, id=4, name="Name Four", email="email@four.com", body="Body Four")
+class TestCommand(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        create_items()
 
-    @mock.patch('blog.management.commands.synchronize.requests.get', fake_requests_get)
-    @mock.patch('blog.management.commands.synchronize.aiohttp.ClientSession.post')
-    @mock.patch('blog.management.commands.synchronize.aiohttp.ClientSession.patch')
-    @mock.patch('blog.management.commands.synchronize.aiohttp.ClientSession.delete')
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get', mock.Mock(side_effect=fake_http_get))
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
     def test_handle_success(
             self,
             mock_aiohttp_delete: mock.Mock,
@@ -117,7 +138,7 @@ class TestCommand(TestCase):
         mock_aiohttp_post.return_value.__aenter__.return_value.status = 201
 
         command = Command()
-        command.handle()
+        call_command(command, full=True)
 
         # Assert two create requests
         self.assertEqual(mock_aiohttp_post.call_count, 2)
@@ -128,34 +149,73 @@ class TestCommand(TestCase):
         # Assert two delete requests
         self.assertEqual(mock_aiohttp_delete.call_count, 2)
 
-    @mock.patch('blog.management.commands.synchronize.requests.get')
-    @mock.patch('blog.management.commands.synchronize.aiohttp.ClientSession.post')
-    @mock.patch('blog.management.commands.synchronize.aiohttp.ClientSession.patch')
-    @mock.patch('blog.management.commands.synchronize.aiohttp.ClientSession.delete')
+        # Both the unchanged and the pushed items are now in sync
+        self.assertFalse(Post.objects.unsynced().exists())
+        self.assertFalse(Comment.objects.unsynced().exists())
+
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get', mock.Mock(side_effect=fake_http_get))
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
+    def test_handle_dry_run(
+            self,
+            mock_aiohttp_delete: mock.Mock,
+            mock_aiohttp_patch: mock.Mock,
+            mock_aiohttp_post: mock.Mock,
+    ):
+        stdout = StringIO()
+        with tempfile.NamedTemporaryFile(suffix='.json') as summary_file:
+            call_command(Command(), full=True, dry_run=True, summary_json=summary_file.name, stdout=stdout)
+            summary = json.load(summary_file)
+
+        mock_aiohttp_post.assert_not_called()
+        mock_aiohttp_patch.assert_not_called()
+        mock_aiohttp_delete.assert_not_called()
+
+        # Nothing is changed locally either
+        self.assertEqual(set(Post.objects.unsynced().values_list('id', flat=True)), {1, 2, 4})
+        self.assertIn('post: 1 creates', stdout.getvalue())
+
+        self.assertEqual(
+            {operation: changes['count'] for operation, changes in summary['changes']['comment'].items()},
+            {'create': 1, 'update': 1, 'delete': 1},
+        )
+        self.assertGreater(summary['changes']['post']['create']['bytes'], 0)
+        self.assertEqual(set(summary['phases']), {'fetch', 'decode', 'db', 'diff', 'dispatch'})
+        # Only the listings of the external items are requested
+        self.assertEqual(summary['requests']['count'], 2)
+
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
     def test_handle_failure_get_request(
             self,
             mock_aiohttp_delete: mock.Mock,
             mock_aiohttp_patch: mock.Mock,
             mock_aiohttp_post: mock.Mock,
-            mock_requests_get: mock.Mock
+            mock_aiohttp_get: mock.Mock
     ):
-        mock_requests_get.side_effect = Timeout()
+        mock_aiohttp_get.side_effect = asyncio.TimeoutError()
         mock_aiohttp_delete.return_value.__aenter__.return_value.status = 200
         mock_aiohttp_patch.return_value.__aenter__.return_value.status = 200
         mock_aiohttp_post.return_value.__aenter__.return_value.status = 201
 
         command = Command()
-        with self.assertRaises(Timeout):
-            command.handle()
+        # The listing is retried, and the run fails once it gives up (instead of treating it as empty)
+        with self.assertRaises(asyncio.TimeoutError):
+            call_command(command, full=True, max_retries=1)
+
+        self.assertEqual(mock_aiohttp_get.call_count, 2)
 
         mock_aiohttp_delete.assert_not_called()
         mock_aiohttp_patch.assert_not_called()
         mock_aiohttp_post.assert_not_called()
 
-    @mock.patch('blog.management.commands.synchronize.requests.get', fake_requests_get)
-    @mock.patch('blog.management.commands.synchronize.aiohttp.ClientSession.post')
-    @mock.patch('blog.management.commands.synchronize.aiohttp.ClientSession.patch')
-    @mock.patch('blog.management.commands.synchronize.aiohttp.ClientSession.delete')
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get', mock.Mock(side_effect=fake_http_get))
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
     def test_handle_failure_post_request(
             self,
             mock_aiohttp_delete: mock.Mock,
@@ -168,8 +228,255 @@ class TestCommand(TestCase):
 
         command = Command()
         with self.assertRaises(Exception):
-            command.handle()
+            call_command(command, full=True)
 
         self.assertEqual(mock_aiohttp_post.call_count, 1)
         self.assertEqual(mock_aiohttp_patch.call_count, 1)
         self.assertEqual(mock_aiohttp_delete.call_count, 1)
+
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get', mock.Mock(side_effect=fake_http_get))
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
+    def test_handle_throttled_requests_are_retried_later(
+            self,
+            mock_aiohttp_delete: mock.Mock,
+            mock_aiohttp_patch: mock.Mock,
+            mock_aiohttp_post: mock.Mock,
+    ):
+        mock_aiohttp_delete.return_value.__aenter__.return_value.status = 200
+        mock_aiohttp_patch.return_value.__aenter__.return_value.status = 429
+        mock_aiohttp_patch.return_value.__aenter__.return_value.headers = {}
+        mock_aiohttp_post.return_value.__aenter__.return_value.status = 201
+
+        call_command(Command(), full=True, max_retries=0)
+
+        # Only the failed updates are left in the outbox
+        self.assertEqual(
+            list(OutboxEntry.objects.values_list('model_name', 'object_id', 'operation')),
+            [('post', 2, 'update'), ('comment', 2, 'update')],
+        )
+
+
+class TestCommandPartitions(TransactionTestCase):
+
+    def setUp(self):
+        create_items()
+
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get', mock.Mock(side_effect=fake_http_get))
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
+    def test_handle_partitions(
+            self,
+            mock_aiohttp_delete: mock.Mock,
+            mock_aiohttp_patch: mock.Mock,
+            mock_aiohttp_post: mock.Mock,
+    ):
+        mock_aiohttp_delete.return_value.__aenter__.return_value.status = 200
+        mock_aiohttp_patch.return_value.__aenter__.return_value.status = 200
+        mock_aiohttp_post.return_value.__aenter__.return_value.status = 201
+
+        # The highest IDs are 4, so the first partition is 1..2 and the second one is 3..
+        options = {'full': True, 'max_post_id': 4, 'max_comment_id': 4}
+        call_command(Command(), partition=(1, 2), **options)
+
+        mock_aiohttp_post.assert_not_called()
+        self.assertEqual(mock_aiohttp_patch.call_count, 2)
+        mock_aiohttp_delete.assert_not_called()
+        self.assertEqual(set(Post.objects.unsynced().values_list('id', flat=True)), {4})
+
+        call_command(Command(), partition=(2, 2), **options)
+
+        self.assertEqual(mock_aiohttp_post.call_count, 2)
+        self.assertEqual(mock_aiohttp_patch.call_count, 2)
+        self.assertEqual(
+            mock_aiohttp_delete.call_args_list,
+            [mock.call(Post.update_delete_url(3)), mock.call(Comment.update_delete_url(3))],
+        )
+        self.assertFalse(Post.objects.unsynced().exists())
+        self.assertFalse(Comment.objects.unsynced().exists())
+
+    @mock.patch('blog.management.commands.synchronize.run_partitions', return_value=[])
+    def test_handle_partitions_options(self, mock_run_partitions: mock.Mock):
+        # Each host must split the same IDs
+        with self.assertRaisesMessage(CommandError, '--partition requires --max-post-id and --max-comment-id'):
+            call_command(Command(), partition=(1, 2), max_post_id=4, stdout=StringIO())
+        mock_run_partitions.assert_not_called()
+
+        call_command(
+            Command(), partition=(2, 2), workers=2, max_post_id=8, max_comment_id=4, rate=100, stdout=StringIO()
+        )
+        (_, post_class, post_ranges, options, _), (_, comment_class, comment_ranges, _, _) = [
+            call.args for call in mock_run_partitions.call_args_list
+        ]
+        self.assertEqual((post_class, post_ranges), (Post, [IdRange(5, 6), IdRange(7)]))
+        self.assertEqual((comment_class, comment_ranges), (Comment, [IdRange(3, 3), IdRange(4)]))
+        # The rate is shared by the workers of all the hosts
+        self.assertEqual(options['rate'], 25)
+
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get', mock.Mock(side_effect=fake_http_get))
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
+    def test_handle_workers(
+            self,
+            mock_aiohttp_delete: mock.Mock,
+            mock_aiohttp_patch: mock.Mock,
+            mock_aiohttp_post: mock.Mock,
+    ):
+        mock_aiohttp_delete.return_value.__aenter__.return_value.status = 200
+        mock_aiohttp_patch.return_value.__aenter__.return_value.status = 200
+        mock_aiohttp_post.return_value.__aenter__.return_value.status = 201
+        stdout = StringIO()
+
+        # The requests are sent by the worker processes, so only their outcome is visible here
+        call_command(Command(), full=True, workers=2, stdout=stdout)
+
+        # The highest external IDs, a listing of each range, and the pushed changes
+        self.assertIn('Requests: 12 ', stdout.getvalue())
+        self.assertFalse(Post.objects.unsynced().exists())
+        self.assertFalse(Comment.objects.unsynced().exists())
+        self.assertFalse(OutboxEntry.objects.exists())
+
+
+class TestCommandOutbox(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        # Already exists in the external API, but needs to be updated
+        with suppress_change_tracking():
+            post = Post.objects.create(id=1, user_id=1, title="Title One", body="Body One")
+        post.title = "Updated Title One"
+        post.save()
+
+        # Needs to be created in the external API
+        Comment.objects.create(post_id=1, id=1, name="Name One", email="email@one.com", body="Body One")
+
+        # Created and deleted locally, so nothing needs to be sent
+        Comment.objects.create(post_id=1, id=2, name="Name Two", email="email@two.com", body="Body Two")
+        Comment.objects.filter(id=2).delete()
+
+        # Needs to be deleted from the external API
+        OutboxEntry.objects.create(model_name='comment', object_id=3, operation='delete')
+
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
+    def test_handle_success(
+            self,
+            mock_aiohttp_delete: mock.Mock,
+            mock_aiohttp_patch: mock.Mock,
+            mock_aiohttp_post: mock.Mock,
+            mock_aiohttp_get: mock.Mock,
+    ):
+        mock_aiohttp_delete.return_value.__aenter__.return_value.status = 200
+        mock_aiohttp_patch.return_value.__aenter__.return_value.status = 200
+        mock_aiohttp_post.return_value.__aenter__.return_value.status = 201
+
+        call_command(Command())
+
+        # The external items are not listed
+        mock_aiohttp_get.assert_not_called()
+
+        mock_aiohttp_patch.assert_called_once_with(
+            Post.update_delete_url(1),
+            json={'userId': 1, 'title': 'Updated Title One', 'body': 'Body One'},
+        )
+        mock_aiohttp_post.assert_called_once_with(
+            Comment.list_create_url(),
+            json={'postId': 1, 'name': 'Name One', 'email': 'email@one.com', 'body': 'Body One'},
+        )
+        mock_aiohttp_delete.assert_called_once_with(Comment.update_delete_url(3))
+
+        self.assertFalse(OutboxEntry.objects.exists())
+
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
+    def test_handle_late_entries_are_kept(
+            self,
+            mock_aiohttp_delete: mock.Mock,
+            mock_aiohttp_patch: mock.Mock,
+            mock_aiohttp_post: mock.Mock,
+    ):
+        mock_aiohttp_delete.return_value.__aenter__.return_value.status = 200
+        mock_aiohttp_patch.return_value.__aenter__.return_value.status = 200
+        mock_aiohttp_post.return_value.__aenter__.return_value.status = 201
+        late_entry_id = OutboxEntry.objects.aggregate(min_id=Min('id'))['min_id'] - 1
+
+        def commit_late_entry(*args, **kwargs):
+            # A transaction which got its (lower) ID before the snapshot, but commits while the changes are pushed
+            if not OutboxEntry.objects.filter(id=late_entry_id).exists():
+                OutboxEntry.objects.create(id=late_entry_id, model_name='post', object_id=1, operation='update')
+            return dispatch(*args, **kwargs)
+
+        with mock.patch('blog.sync.push.dispatch', side_effect=commit_late_entry):
+            call_command(Command())
+
+        # Left for the next run
+        self.assertEqual(list(OutboxEntry.objects.values_list('id', flat=True)), [late_entry_id])
+
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
+    def test_handle_failed_requests_are_kept(
+            self,
+            mock_aiohttp_delete: mock.Mock,
+            mock_aiohttp_patch: mock.Mock,
+            mock_aiohttp_post: mock.Mock,
+    ):
+        mock_aiohttp_delete.return_value.__aenter__.return_value.status = 200
+        mock_aiohttp_patch.return_value.__aenter__.return_value.status = 503
+        mock_aiohttp_patch.return_value.__aenter__.return_value.headers = {}
+        mock_aiohttp_post.return_value.__aenter__.return_value.status = 201
+
+        call_command(Command(), max_retries=0)
+
+        self.assertEqual(
+            list(OutboxEntry.objects.values_list('model_name', 'object_id', 'operation')),
+            [('post', 1, 'update')],
+        )
+
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.post')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.delete')
+    def test_handle_dead_letters(
+            self,
+            mock_aiohttp_delete: mock.Mock,
+            mock_aiohttp_patch: mock.Mock,
+            mock_aiohttp_post: mock.Mock,
+    ):
+        mock_aiohttp_delete.return_value.__aenter__.return_value.status = 200
+        mock_aiohttp_patch.return_value.__aenter__.return_value.status = 404
+        mock_aiohttp_post.return_value.__aenter__.return_value.status = 201
+
+        call_command(Command(), max_attempts=1)
+        self.assertIsNotNone(OutboxEntry.objects.get().dead_lettered_at)
+
+        # Not retried, until the dead letters are requeued
+        call_command(Command())
+        self.assertEqual(mock_aiohttp_patch.call_count, 1)
+
+        mock_aiohttp_patch.return_value.__aenter__.return_value.status = 200
+        stdout = StringIO()
+        call_command(Command(), requeue_dead_letters=True, stdout=stdout)
+        self.assertIn('Requeued 1 dead letters', stdout.getvalue())
+        self.assertEqual(mock_aiohttp_patch.call_count, 2)
+        self.assertFalse(OutboxEntry.objects.exists())
+
+    @mock.patch('blog.sync.push.aiohttp.ClientSession.patch')
+    def test_handle_reverted_changes_are_skipped(self, mock_aiohttp_patch: mock.Mock):
+        Post.objects.mark_synced({1: compute_fingerprint({'userId': 1, 'title': 'Title One', 'body': 'Body One'})})
+        OutboxEntry.objects.exclude(model_name='post').delete()
+
+        # Edited back to the version, which the external API already has
+        post = Post.objects.get(id=1)
+        post.title = 'Title One'
+        post.save()
+
+        call_command(Command())
+
+        mock_aiohttp_patch.assert_not_called()
+        self.assertFalse(OutboxEntry.objects.exists())
@@ -0,0 +1,54 @@
+from django.test import TestCase
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.base import compute_fingerprint
+from blog.models.outbox import OutboxEntry
+
+
+class TestFingerprints(TestCase):
+
+    def test_compute_fingerprint(self):
+        self.assertEqual(
+            compute_fingerprint({'title': 'Title', 'userId': 1}),
+            compute_fingerprint({'userId': 1, 'title': 'Title'}),
+        )
+        self.assertNotEqual(
+            compute_fingerprint({'userId': 1, 'title': 'Title'}),
+            compute_fingerprint({'userId': 1, 'title': 'Other Title'}),
+        )
+
+    def test_save(self):
+        post = Post.objects.create(user_id=1, title='Title', body='Body')
+        post.refresh_from_db()
+        self.assertEqual(post.fingerprint, compute_fingerprint({'userId': 1, 'title': 'Title', 'body': 'Body'}))
+        self.assertFalse(post.is_synced)
+
+        post.title = 'Updated Title'
+        post.save(update_fields=['title'])
+        post.refresh_from_db()
+        self.assertEqual(post.fingerprint, compute_fingerprint(post.serialized_value))
+
+    def test_bulk_paths(self):
+        post = Post.objects.create(user_id=1, title='Title', body='Body')
+        comments = Comment.objects.bulk_create([
+            Comment(post=post, name='Name One', email='email@one.com', body='Body One'),
+            Comment(post=post, name='Name Two', email='email@two.com', body='Body Two'),
+        ])
+        comments[0].name = 'Updated Name One'
+        Comment.objects.bulk_update(comments[:1], ['name'])
+        Comment.objects.filter(id=comments[1].id).update(body='Updated Body Two')
+
+        for comment in Comment.objects.all():
+            self.assertEqual(comment.fingerprint, compute_fingerprint(comment.serialized_value))
+
+    def test_mark_synced(self):
+        post_one = Post.objects.create(user_id=1, title='Title One', body='Body One')
+        post_two = Post.objects.create(user_id=2, title='Title Two', body='Body Two')
+        entries = OutboxEntry.objects.count()
+
+        Post.objects.mark_synced({post_one.id: post_one.fingerprint})
+
+        self.assertEqual(list(Post.objects.unsynced()), [post_two])
+        # Marking items as synced is not a change, which should be pushed
+        self.assertEqual(OutboxEntry.objects.count(), entries)
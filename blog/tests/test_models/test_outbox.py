@@ -0,0 +1,54 @@
+from django.test import TestCase
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.outbox import OutboxEntry, suppress_change_tracking
+
+
+class TestChangeTracking(TestCase):
+
+    def assertOperations(self, model_class, expected):
+        operations = OutboxEntry.objects.filter(model_name=model_class._meta.model_name).order_by('id')
+        self.assertEqual(list(operations.values_list('object_id', 'operation')), expected)
+
+    def test_save_and_delete(self):
+        post = Post.objects.create(user_id=1, title='Title', body='Body')
+        post.title = 'Updated Title'
+        post.save()
+        post_id = post.id
+        post.delete()
+
+        self.assertOperations(Post, [(post_id, 'create'), (post_id, 'update'), (post_id, 'delete')])
+
+    def test_cascade_delete(self):
+        post = Post.objects.create(user_id=1, title='Title', body='Body')
+        comment = Comment.objects.create(post=post, name='Name', email='email@one.com', body='Body')
+        Post.objects.filter(id=post.id).delete()
+
+        self.assertOperations(Comment, [(comment.id, 'create'), (comment.id, 'delete')])
+
+    def test_bulk_paths(self):
+        posts = Post.objects.bulk_create([
+            Post(user_id=1, title='Title One', body='Body One'),
+            Post(user_id=2, title='Title Two', body='Body Two'),
+        ])
+        posts[0].title = 'Updated Title One'
+        Post.objects.bulk_update(posts[:1], ['title'])
+        Post.objects.filter(id=posts[1].id).update(body='Updated Body Two')
+
+        self.assertOperations(
+            Post,
+            [
+                (posts[0].id, 'create'),
+                (posts[1].id, 'create'),
+                (posts[0].id, 'update'),
+                (posts[1].id, 'update'),
+            ]
+        )
+
+    def test_suppressed(self):
+        with suppress_change_tracking():
+            post = Post.objects.create(user_id=1, title='Title', body='Body')
+            Post.objects.filter(id=post.id).update(title='Updated Title')
+
+        self.assertFalse(OutboxEntry.objects.exists())
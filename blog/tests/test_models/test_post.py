@@ -0,0 +1,138 @@
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.version import CollectionVersion
+from blog.sync.ingest import CopyWriter
+
+
+class TestCommentCount(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.post = Post.objects.create(user_id=1, title='Title', body='Body')
+        cls.other_post = Post.objects.create(user_id=1, title='Other title', body='Body')
+
+    def make_comment(self, post, index=0):
+        return Comment(post=post, name=f'Name {index}', email='a@b.com', body='Body')
+
+    def assertCounts(self, *counts):
+        self.assertEqual(
+            list(Post.objects.filter(id__in=[self.post.id, self.other_post.id]).order_by('id').values_list(
+                'comment_count', flat=True
+            )),
+            list(counts),
+        )
+
+    def test_writes(self):
+        comment = self.make_comment(self.post)
+        comment.save()
+        Comment.objects.bulk_create([self.make_comment(self.post, index) for index in range(3)])
+        Comment.objects.bulk_create([self.make_comment(self.other_post)])
+        self.assertCounts(4, 1)
+
+        # Moved to the other post
+        comment.post = self.other_post
+        comment.save()
+        self.assertCounts(3, 2)
+        Comment.objects.filter(post=self.post).update(post=self.other_post)
+        self.assertCounts(0, 5)
+        # Updates of other columns
+        Comment.objects.update(body='Updated')
+        self.assertCounts(0, 5)
+
+        comment.delete()
+        self.assertCounts(0, 4)
+        Comment.objects.filter(id__in=Comment.objects.values('id')[:2]).delete()
+        self.assertCounts(0, 2)
+
+        # Cascade delete of a post
+        self.other_post.delete()
+        self.assertFalse(Comment.objects.exists())
+
+    def test_truncate(self):
+        Comment.objects.bulk_create([self.make_comment(self.post)])
+        with connection.cursor() as cursor:
+            # The deferred foreign key checks of the test's transaction
+            cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+            cursor.execute(f'TRUNCATE {Comment._meta.db_table}')
+        self.assertCounts(0, 0)
+
+    def test_copy(self):
+        # The comments which are written before their post are counted when the post is inserted
+        with CopyWriter(Comment) as writer:
+            writer.write_rows([
+                (comment_id, 100001, f'Name {comment_id}', 'a@b.com', 'Body', '', '') for comment_id in (100001, 100002)
+            ] + [
+                (100003, self.post.id, 'Name', 'a@b.com', 'Body', '', ''),
+            ])
+        with CopyWriter(Post) as writer:
+            writer.write_rows([(100001, 1, 'Title', 'Body', '', '')])
+        self.assertEqual(Post.objects.get(id=100001).comment_count, 2)
+        self.assertCounts(1, 0)
+
+    def test_save(self):
+        # An instance which was loaded before a comment was written does not overwrite the count
+        post = Post.objects.get(id=self.post.id)
+        self.make_comment(self.post).save()
+        post.title = 'Updated'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual((post.title, post.comment_count), ('Updated', 1))
+
+    def test_save_deleted(self):
+        # Inserted again, as usual, without the count of its deleted comments
+        self.make_comment(self.post).save()
+        post = Post.objects.get(id=self.post.id)
+        self.assertEqual(post.comment_count, 1)
+        Post.objects.filter(id=self.post.id).delete()
+        post.title = 'Updated'
+        post.save()
+        post.refresh_from_db()
+        self.assertEqual((post.title, post.comment_count), ('Updated', 0))
+
+    def test_save_deferred(self):
+        post = Post.objects.defer('search_vector', 'synced_fingerprint').get(id=self.post.id)
+        post.title = 'Updated'
+        with CaptureQueriesContext(connection) as queries:
+            post.save()
+
+        # The deferred fields are neither loaded nor written
+        self.assertEqual(post.get_deferred_fields(), {'search_vector', 'synced_fingerprint'})
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "blog_post"')]
+        self.assertEqual(len(updates), 1)
+        self.assertNotIn('synced_fingerprint', updates[0])
+        self.assertEqual(Post.objects.get(id=self.post.id).title, 'Updated')
+
+
+class TestCommentCountVersion(TransactionTestCase):
+    """
+    The versions of the collections are bumped when the writing transactions commit.
+    """
+
+    def test_version(self):
+        def post_version():
+            return CollectionVersion.current(['post'])['post'][0]
+
+        post = Post.objects.create(user_id=1, title='Title', body='Body')
+        other_post = Post.objects.create(user_id=1, title='Other title', body='Body')
+        version = post_version()
+        comment = Comment(post=post, name='Name', email='a@b.com', body='Body')
+        comment.save()
+        self.assertGreater(post_version(), version)
+
+        # Writes of comments, which don't change any count, don't bump the version of the posts
+        version = post_version()
+        Comment.objects.mark_synced({comment.id: comment.fingerprint})
+        comment.name = 'Renamed'
+        comment.save()
+        Comment.objects.filter(id=comment.id).update(post=post)
+        Comment.objects.filter(id=0).delete()
+        Comment.objects.bulk_create([])
+        self.assertEqual(post_version(), version)
+
+        comment.post = other_post
+        comment.save()
+        self.assertEqual(post_version(), version + 1)
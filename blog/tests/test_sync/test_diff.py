@@ -0,0 +1,34 @@
+from django.test import TestCase
+
+from blog.models.post import Post
+from blog.models.outbox import suppress_change_tracking
+from blog.sync.diff import ExternalItemsTable
+
+
+class TestExternalItemsTable(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        with suppress_change_tracking():
+            cls.unchanged = Post.objects.create(id=1, user_id=1, title='Title One', body='Body One')
+            cls.changed = Post.objects.create(id=2, user_id=2, title='Updated Title Two', body='Body Two')
+            cls.new = Post.objects.create(id=4, user_id=4, title='Title Four', body='Body Four')
+
+    def test_diff(self):
+        external_posts = [
+            Post.from_external({'id': 1, 'userId': 1, 'title': 'Title One', 'body': 'Body One'}),
+            Post.from_external({'id': 2, 'userId': 2, 'title': 'Title Two', 'body': 'Body Two'}),
+            Post.from_external({'id': 3, 'userId': 3, 'title': 'Title Three', 'body': 'Body Three'}),
+        ]
+
+        with ExternalItemsTable(Post) as external_items:
+            for external_post in external_posts:
+                external_items.load([(external_post.id, external_post.fingerprint)])
+            external_items.analyze()
+
+            self.assertEqual(external_items.mark_unchanged_synced(), 1)
+            self.assertEqual(list(external_items.changed_items(chunk_size=1)), [[self.changed]])
+            self.assertEqual(list(external_items.new_items()), [[self.new]])
+            self.assertEqual(list(external_items.deleted_ids()), [[3]])
+
+        self.assertEqual(list(Post.objects.unsynced().order_by('id')), [self.changed, self.new])
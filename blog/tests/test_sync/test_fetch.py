@@ -0,0 +1,96 @@
+from unittest import mock
+
+from django.test import SimpleTestCase
+
+from blog.sync.fetch import FetchError, fetch_max_id, iter_pages
+from blog.sync.http import HttpEngine
+
+ITEMS = [{'id': item_id} for item_id in range(1, 8)]
+
+
+class FakeHttpResponse:
+
+    def __init__(self, json_body, status: int = 200):
+        self._json = json_body
+        self.status = status
+        self.headers = {}
+
+    async def json(self):
+        return self._json
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+def paginated_get(url, params):
+    return FakeHttpResponse(ITEMS[params['_start']:params['_start'] + params['_limit']])
+
+
+def unpaginated_get(url, params):
+    return FakeHttpResponse(ITEMS)
+
+
+@mock.patch('blog.sync.http.backoff_delay', mock.Mock(return_value=0))
+class TestIterPages(SimpleTestCase):
+
+    def list_pages(self, **kwargs):
+        with HttpEngine(max_retries=2) as engine:
+            return list(iter_pages(engine, 'https://example.com/posts', page_size=3, **kwargs))
+
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get', side_effect=paginated_get)
+    def test_paginated(self, mock_get: mock.Mock):
+        pages = self.list_pages()
+
+        self.assertEqual(pages, [ITEMS[0:3], ITEMS[3:6], ITEMS[6:7]])
+        self.assertEqual(mock_get.call_count, 3)
+        mock_get.assert_called_with('https://example.com/posts', params={'_start': 6, '_limit': 3})
+
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get', side_effect=unpaginated_get)
+    def test_pagination_not_supported(self, mock_get: mock.Mock):
+        pages = self.list_pages()
+
+        self.assertEqual(pages, [ITEMS[0:3], ITEMS[3:6], ITEMS[6:7]])
+        mock_get.assert_called_once()
+
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get')
+    def test_retried(self, mock_get: mock.Mock):
+        # A throttled page is retried, instead of being taken for the (short) last page
+        mock_get.side_effect = [
+            FakeHttpResponse(ITEMS[0:3]),
+            FakeHttpResponse({}, status=503),
+            FakeHttpResponse({}, status=429),
+            FakeHttpResponse(ITEMS[3:6]),
+            FakeHttpResponse([]),
+        ]
+
+        self.assertEqual(self.list_pages(), [ITEMS[0:3], ITEMS[3:6]])
+        self.assertEqual(mock_get.call_count, 5)
+
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get')
+    def test_errors(self, mock_get: mock.Mock):
+        for response, message in (
+                (FakeHttpResponse({}, status=404), 'got response.status=404'),
+                (FakeHttpResponse({'items': ITEMS}), 'got a dict instead of a list of items'),
+        ):
+            with self.subTest(message):
+                mock_get.reset_mock()
+                mock_get.side_effect = [FakeHttpResponse(ITEMS[0:3]), response]
+                with self.assertRaisesMessage(FetchError, message):
+                    self.list_pages()
+                # Not retried
+                self.assertEqual(mock_get.call_count, 2)
+
+        mock_get.side_effect = [FakeHttpResponse({}, status=503)] * 3
+        with self.assertRaisesMessage(Exception, 'got response.status=503'):
+            self.list_pages()
+
+    @mock.patch('blog.sync.fetch.aiohttp.ClientSession.get', side_effect=unpaginated_get)
+    def test_fetch_max_id(self, mock_get: mock.Mock):
+        with HttpEngine() as engine:
+            self.assertEqual(fetch_max_id(engine, 'https://example.com/posts'), 7)
+        mock_get.assert_called_once_with(
+            'https://example.com/posts', params={'_sort': 'id', '_order': 'desc', '_limit': 1}
+        )
@@ -0,0 +1,101 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from blog.sync.http import HttpEngine, RequestStats, TransientError
+from blog.sync.ratelimit import AdaptiveRateLimiter
+
+
+class TestHttpEngine(SimpleTestCase):
+
+    def test_in_flight_limit(self):
+        in_flight = 0
+        max_in_flight = 0
+
+        async def fake_request(session, item_id):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return item_id
+
+        async def send_all(engine):
+            futures = [await engine.submit(fake_request, item_id) for item_id in range(20)]
+            called = [engine.call(fake_request, item_id) for item_id in range(20, 30)]
+            return await asyncio.gather(*futures, *called)
+
+        with HttpEngine(concurrency=4, rate_limiter=AdaptiveRateLimiter(rate=1000)) as engine:
+            results = engine.run(send_all(engine))
+            # The same session is shared between runs
+            session = engine.session
+            engine.run(send_all(engine))
+            self.assertIs(engine.session, session)
+
+        self.assertEqual(results, list(range(30)))
+        self.assertEqual(max_in_flight, 4)
+        self.assertEqual(engine.stats.count, 60)
+
+    def test_backpressure(self):
+        release = None
+
+        async def fake_request(session):
+            await release.wait()
+
+        async def produce(engine):
+            nonlocal release
+            release = asyncio.Event()
+            # 2 requests are taken by the workers, and 2 more fill the queue
+            for _ in range(4):
+                await engine.submit(fake_request)
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(engine.submit(fake_request), timeout=0.05)
+            release.set()
+
+        with HttpEngine(concurrency=2, queue_size=2) as engine:
+            engine.run(produce(engine))
+
+    def test_errors(self):
+        async def failing_request(session):
+            raise ValueError()
+
+        with HttpEngine(concurrency=2) as engine:
+            with self.assertRaises(ValueError):
+                engine.run(engine.call(failing_request))
+
+        self.assertEqual(engine.stats.errors, 1)
+        self.assertEqual(engine.stats.error_counts, {'ValueError': 1})
+
+
+class TestRequestStats(SimpleTestCase):
+
+    def test_percentile(self):
+        stats = RequestStats()
+        stats.latencies = [i / 1000 for i in range(100, 0, -1)]
+
+        self.assertEqual(stats.percentile(50), 0.05)
+        self.assertEqual(stats.percentile(99), 0.099)
+        self.assertEqual(stats.percentile(100), 0.1)
+
+    def test_histogram(self):
+        stats = RequestStats()
+        stats.latencies = [0.005, 0.01, 0.02, 0.3, 20]
+
+        histogram = stats.histogram()
+
+        self.assertEqual(histogram['<=10ms'], 2)
+        self.assertEqual(histogram['<=25ms'], 1)
+        self.assertEqual(histogram['<=500ms'], 1)
+        self.assertEqual(histogram['>10000ms'], 1)
+        self.assertEqual(sum(histogram.values()), 5)
+
+    def test_merge(self):
+        stats, other = RequestStats(), RequestStats()
+        stats.latencies, other.latencies = [0.1], [0.2, 0.3]
+        other.add_error(TransientError('Throttled', status=429))
+
+        stats.merge(other)
+
+        self.assertEqual(stats.count, 3)
+        self.assertEqual(stats.errors, 1)
+        self.assertEqual(stats.error_counts, {'HTTP 429': 1})
@@ -0,0 +1,74 @@
+from django.test import SimpleTestCase, TestCase
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.models.outbox import OutboxEntry
+from blog.sync.ingest import CopyWriter, PageProgress, copy_value
+
+POSTS_DATA = [
+    {'userId': 1, 'id': 1, 'title': 'Title\tOne', 'body': 'Body\nwith a \\ backslash\r\n'},
+    {'userId': 2, 'id': 2, 'title': 'Title Two', 'body': ''},
+    {'userId': 3, 'id': 3, 'title': 'Title Three', 'body': 'Body Three'},
+]
+
+COMMENT_DATA = {'postId': 1, 'id': 1, 'name': 'Name One', 'email': 'email@one.com', 'body': 'Body One'}
+
+
+class TestCopyWriter(TestCase):
+
+    def test_copy_value(self):
+        self.assertEqual(copy_value(None), '\\N')
+        self.assertEqual(copy_value(12), '12')
+        self.assertEqual(copy_value('a\tb\nc\\d'), 'a\\tb\\nc\\\\d')
+
+    def test_write_rows(self):
+        with CopyWriter(Post, batch_size=2) as writer:
+            writer.write_rows(Post.external_row(data) for data in POSTS_DATA)
+            # A full batch is written right away
+            self.assertEqual(Post.objects.count(), 2)
+
+        self.assertEqual(writer.count, 3)
+        for data in POSTS_DATA:
+            post = Post.objects.get(id=data['id'])
+            self.assertEqual((post.user_id, post.title, post.body), (data['userId'], data['title'], data['body']))
+            self.assertEqual(post.fingerprint, Post.from_external(data).fingerprint)
+            self.assertTrue(post.is_synced)
+
+        # Imported rows already exist in the external API
+        self.assertFalse(OutboxEntry.objects.exists())
+
+    def test_write_rows_ignore_conflicts(self):
+        with CopyWriter(Post) as writer:
+            writer.write_rows(Post.external_row(data) for data in POSTS_DATA[:2])
+
+        changed_data = {**POSTS_DATA[1], 'title': 'Changed'}
+        with CopyWriter(Post, ignore_conflicts=True) as writer:
+            writer.write_rows(Post.external_row(data) for data in (changed_data, POSTS_DATA[2]))
+
+        # Only the new row is inserted, the existing one is kept
+        self.assertEqual(writer.count, 1)
+        self.assertEqual(Post.objects.count(), 3)
+        self.assertEqual(Post.objects.get(id=2).title, 'Title Two')
+
+    def test_external_row(self):
+        self.assertEqual(
+            Comment.external_row(COMMENT_DATA, post_id=2)[-1],
+            Comment.from_external(COMMENT_DATA, post_id=2).fingerprint,
+        )
+
+
+class TestPageProgress(SimpleTestCase):
+
+    def test_done(self):
+        progress = PageProgress(10, page_size=10)
+        progress.done(30)
+        progress.done(20)
+        self.assertEqual(progress.next_start, 10)
+
+        progress.done(10)
+        self.assertEqual(progress.next_start, 40)
+
+        # Pages before the next one were already written
+        progress.done(0)
+        progress.done(50)
+        self.assertEqual(progress.next_start, 40)
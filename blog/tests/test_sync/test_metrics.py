@@ -0,0 +1,65 @@
+import logging
+import pickle
+
+from django.test import SimpleTestCase
+
+from blog.sync.metrics import LogSampler, SyncMetrics
+
+
+class TestSyncMetrics(SimpleTestCase):
+
+    def test_phases(self):
+        metrics = SyncMetrics()
+        with metrics.phase('db'):
+            pass
+        items = list(metrics.timed('diff', iter([1, 2, 3])))
+
+        self.assertEqual(items, [1, 2, 3])
+        phases = metrics.to_dict()['phases']
+        self.assertEqual(list(phases), ['fetch', 'decode', 'db', 'diff', 'dispatch'])
+        self.assertGreater(phases['diff'], 0)
+        self.assertEqual(phases['fetch'], 0)
+
+    def test_changes(self):
+        metrics = SyncMetrics()
+        metrics.add_change('post', 'create', {'title': 'Title'})
+        metrics.add_change('post', 'delete')
+        metrics.add_failed_change('post', 'delete')
+
+        # Metrics are sent back from the worker processes
+        other = pickle.loads(pickle.dumps(metrics))
+        metrics.merge(other)
+
+        self.assertEqual(
+            metrics.to_dict()['changes'],
+            {
+                'post': {
+                    'create': {'count': 2, 'bytes': 2 * len('{"title": "Title"}'), 'failed': 0},
+                    'delete': {'count': 2, 'bytes': 0, 'failed': 2},
+                },
+            },
+        )
+        self.assertEqual(metrics.plan(), 'post: 2 creates (0.0 KiB), 2 deletes (0.0 KiB)')
+
+
+class TestLogSampler(SimpleTestCase):
+
+    def test_sampling(self):
+        logger = logging.getLogger('blog.tests.sampled')
+        sampler = LogSampler(logger, first=2, every=3)
+
+        with self.assertLogs(logger, level=logging.WARNING) as logs:
+            for index in range(8):
+                sampler.warning('failed', f'Request {index} failed')
+            sampler.warning('other', 'Other request failed')
+
+        self.assertEqual(
+            [record.getMessage() for record in logs.records],
+            [
+                'Request 0 failed',
+                'Request 1 failed',
+                'Request 4 failed (2 similar messages skipped, 5 in total)',
+                'Request 7 failed (2 similar messages skipped, 8 in total)',
+                'Other request failed',
+            ],
+        )
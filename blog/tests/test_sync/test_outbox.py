@@ -0,0 +1,79 @@
+from django.test import TestCase
+
+from blog.models.post import Post
+from blog.models.outbox import OutboxEntry
+from blog.sync.outbox import (
+    acknowledge,
+    coalesce_operations,
+    outbox_snapshot,
+    pending_batches,
+    record_failures,
+    requeue_dead_letters,
+)
+
+
+class TestCoalesceOperations(TestCase):
+
+    def test_coalesce_operations(self):
+        self.assertEqual(coalesce_operations(['create']), 'create')
+        self.assertEqual(coalesce_operations(['create', 'update', 'update']), 'create')
+        self.assertIsNone(coalesce_operations(['create', 'update', 'delete']))
+        self.assertEqual(coalesce_operations(['update', 'update']), 'update')
+        self.assertEqual(coalesce_operations(['update', 'delete']), 'delete')
+        self.assertEqual(coalesce_operations(['delete', 'create']), 'update')
+        self.assertIsNone(coalesce_operations([]))
+
+
+class TestPendingBatches(TestCase):
+
+    def test_pending_batches(self):
+        entries = [
+            OutboxEntry.objects.create(model_name='post', object_id=object_id, operation=operation)
+            for object_id, operation in [(3, 'update'), (1, 'create'), (2, 'update'), (1, 'update'), (3, 'delete')]
+        ]
+
+        up_to = outbox_snapshot()
+        # Recorded after the snapshot, so it is left for the next run
+        OutboxEntry.objects.create(model_name='post', object_id=2, operation='delete')
+
+        batches = list(pending_batches(Post, up_to=up_to, batch_size=2))
+        self.assertEqual(batches, [
+            ({1: 'create', 2: 'update'}, {1: [entries[1].id, entries[3].id], 2: [entries[2].id]}),
+            ({3: 'delete'}, {3: [entries[0].id, entries[4].id]}),
+        ])
+
+    def test_acknowledge(self):
+        entry = OutboxEntry.objects.create(model_name='post', object_id=1, operation='update')
+        up_to = outbox_snapshot()
+        [(operations, entry_ids_by_id)] = pending_batches(Post, up_to=up_to)
+
+        # Committed after the entries were read, with a lower ID than the snapshot
+        late_entry = OutboxEntry.objects.create(id=entry.id - 1, model_name='post', object_id=1, operation='delete')
+
+        acknowledge(entry_ids_by_id[1])
+        self.assertEqual(list(OutboxEntry.objects.values_list('id', flat=True)), [late_entry.id])
+        self.assertEqual([operations for operations, entry_ids in pending_batches(Post, up_to=up_to)], [{1: 'delete'}])
+
+
+class TestRecordFailures(TestCase):
+
+    def test_record_failures(self):
+        entries = [
+            OutboxEntry.objects.create(model_name='post', object_id=object_id, operation='update')
+            for object_id in (1, 2)
+        ]
+        up_to = outbox_snapshot()
+
+        self.assertEqual(record_failures({1: [entries[0].id]}, max_attempts=2), [])
+        self.assertEqual(record_failures({1: [entries[0].id], 2: [entries[1].id]}, max_attempts=2), [1])
+
+        # The dead letters are not retried anymore
+        self.assertEqual([operations for operations, entry_ids in pending_batches(Post, up_to=up_to)], [{2: 'update'}])
+        self.assertEqual(
+            list(OutboxEntry.objects.order_by('object_id').values_list('object_id', 'attempts')), [(1, 2), (2, 1)]
+        )
+
+        self.assertEqual(requeue_dead_letters(), 1)
+        self.assertEqual(
+            [operations for operations, entry_ids in pending_batches(Post, up_to=up_to)], [{1: 'update', 2: 'update'}]
+        )
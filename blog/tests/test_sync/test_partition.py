@@ -0,0 +1,37 @@
+import argparse
+
+from django.test import SimpleTestCase
+
+from blog.sync.partition import IdRange, parse_partition, partition_ranges, split_id_range
+
+
+class TestIdRange(SimpleTestCase):
+
+    def test_contains(self):
+        self.assertIn(3, IdRange(3, 5))
+        self.assertIn(5, IdRange(3, 5))
+        self.assertNotIn(6, IdRange(3, 5))
+        self.assertIn(10 ** 9, IdRange(3))
+
+    def test_filters(self):
+        self.assertEqual(IdRange(3, 5).lookups('object_id'), {'object_id__gte': 3, 'object_id__lte': 5})
+        self.assertEqual(IdRange(3).params(), {'id_gte': 3})
+
+
+class TestPartitions(SimpleTestCase):
+
+    def test_parse_partition(self):
+        self.assertEqual(parse_partition('2/3'), (2, 3))
+        for value in ('0/3', '4/3', '2', 'a/b'):
+            with self.assertRaises(argparse.ArgumentTypeError):
+                parse_partition(value)
+
+    def test_split_id_range(self):
+        self.assertEqual(split_id_range(10, 3), [IdRange(1, 4), IdRange(5, 8), IdRange(9)])
+        # Fewer IDs than ranges
+        self.assertEqual(split_id_range(0, 2), [IdRange(1, 1), IdRange(2)])
+
+    def test_partition_ranges(self):
+        # Two hosts with two workers each
+        self.assertEqual(partition_ranges(100, (1, 2), workers=2), [IdRange(1, 25), IdRange(26, 50)])
+        self.assertEqual(partition_ranges(100, (2, 2), workers=2), [IdRange(51, 75), IdRange(76)])
@@ -0,0 +1,74 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from blog.sync.http import HttpEngine
+from blog.sync.pipeline import FetchPipeline, gather_all
+
+
+class TestFetchPipeline(SimpleTestCase):
+
+    def test_items(self):
+        async def produce(put):
+            for item in range(10):
+                await put(item)
+
+        with HttpEngine() as engine:
+            pipeline = FetchPipeline(engine, produce, queue_size=2)
+            self.assertEqual(list(pipeline), list(range(10)))
+
+    def test_producer_error(self):
+        async def produce(put):
+            await put(1)
+            raise ValueError('Fetch failed')
+
+        with HttpEngine() as engine:
+            items = []
+            with self.assertRaisesMessage(ValueError, 'Fetch failed'):
+                for item in FetchPipeline(engine, produce):
+                    items.append(item)
+
+        self.assertEqual(items, [1])
+
+    def test_consumer_error(self):
+        cancelled = False
+
+        async def produce(put):
+            nonlocal cancelled
+            try:
+                for item in range(1000):
+                    await put(item)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        with HttpEngine() as engine:
+            with self.assertRaisesMessage(ValueError, 'Write failed'):
+                for item in FetchPipeline(engine, produce, queue_size=2):
+                    raise ValueError('Write failed')
+
+            # The engine can still be used afterwards
+            self.assertEqual(engine.run(asyncio.sleep(0, result=1)), 1)
+
+        self.assertTrue(cancelled)
+
+
+class TestGatherAll(SimpleTestCase):
+
+    def test_cancel_on_failure(self):
+        cancelled = False
+
+        async def slow():
+            nonlocal cancelled
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled = True
+                raise
+
+        async def failing():
+            raise ValueError()
+
+        with self.assertRaises(ValueError):
+            asyncio.run(gather_all(slow(), failing()))
+        self.assertTrue(cancelled)
@@ -0,0 +1,107 @@
+from unittest import mock
+import asyncio
+import time
+
+import aiohttp
+from django.test import SimpleTestCase
+
+from blog.sync.http import HttpEngine, TransientError, gather_outcomes
+from blog.sync.ratelimit import AdaptiveRateLimiter, parse_retry_after
+
+
+class TestAdaptiveRateLimiter(SimpleTestCase):
+
+    def test_aimd(self):
+        rate_limiter = AdaptiveRateLimiter(rate=10, min_rate=1, max_rate=20)
+
+        rate_limiter.on_success()
+        self.assertAlmostEqual(rate_limiter.rate, 10.1)
+
+        rate_limiter.on_throttled()
+        self.assertAlmostEqual(rate_limiter.rate, 5.05)
+
+        for _ in range(10):
+            rate_limiter.on_throttled()
+        self.assertEqual(rate_limiter.rate, 1)
+
+    def test_one_decrease_per_congestion_event(self):
+        rate_limiter = AdaptiveRateLimiter(rate=50)
+        sent_at = time.monotonic()
+
+        # A burst of in-flight requests, which were all sent at the previous rate
+        for _ in range(32):
+            rate_limiter.on_throttled(sent_at=sent_at)
+        self.assertEqual(rate_limiter.rate, 25)
+
+        # A request which is sent after the decrease
+        rate_limiter.on_throttled(sent_at=time.monotonic())
+        self.assertEqual(rate_limiter.rate, 12.5)
+
+    def test_retry_after_pauses_requests(self):
+        rate_limiter = AdaptiveRateLimiter(rate=1000)
+        rate_limiter.on_throttled(retry_after=0.2)
+
+        async def acquire():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(rate_limiter.acquire(), timeout=0.1)
+            await asyncio.wait_for(rate_limiter.acquire(), timeout=0.2)
+
+        asyncio.run(acquire())
+
+
+class TestParseRetryAfter(SimpleTestCase):
+
+    def test_parse_retry_after(self):
+        self.assertEqual(parse_retry_after('120'), 120)
+        self.assertEqual(parse_retry_after('Wed, 21 Oct 2015 07:28:00 GMT'), 0)
+        self.assertIsNone(parse_retry_after(None))
+        self.assertIsNone(parse_retry_after('soon'))
+
+
+class TestHttpEngineRetries(SimpleTestCase):
+
+    @mock.patch('blog.sync.http.backoff_delay', return_value=0)
+    def test_retries(self, mock_backoff_delay: mock.Mock):
+        attempts = 0
+
+        async def flaky_request(session):
+            nonlocal attempts
+            attempts += 1
+            if attempts < 3:
+                raise TransientError('Throttled')
+            return True
+
+        with HttpEngine(max_retries=5) as engine:
+            self.assertTrue(engine.run(engine.call(flaky_request)))
+
+        self.assertEqual(attempts, 3)
+        self.assertEqual(engine.stats.retries, 2)
+
+    @mock.patch('blog.sync.http.backoff_delay', return_value=0)
+    def test_gives_up(self, mock_backoff_delay: mock.Mock):
+        async def failing_request(session):
+            raise TransientError('Throttled')
+
+        with HttpEngine(max_retries=2) as engine:
+            with self.assertRaises(TransientError):
+                engine.run(engine.call(failing_request))
+
+        self.assertEqual(engine.stats.errors, 3)
+
+    def test_concurrent_throttles(self):
+        async def throttled_request(session):
+            await asyncio.sleep(0.05)
+            raise TransientError('Throttled', status=429)
+
+        async def failing_request(session):
+            await asyncio.sleep(0.05)
+            raise aiohttp.ClientConnectionError('Connection reset')
+
+        for request_function, expected_rate in ((throttled_request, 25), (failing_request, 50)):
+            with self.subTest(request_function.__name__):
+                with HttpEngine(max_retries=0, rate_limiter=AdaptiveRateLimiter(rate=50)) as engine:
+                    outcomes = engine.run(gather_outcomes(engine.call(request_function) for _ in range(32)))
+
+                self.assertEqual(outcomes, [False] * 32)
+                # Decreased once for the whole burst, and not at all for connection errors
+                self.assertEqual(engine.rate_limiter.rate, expected_rate)
@@ -0,0 +1,100 @@
+import gzip
+import io
+import json
+import tempfile
+
+from django.db import connection
+from django.test import TestCase
+
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.sync.snapshot import (
+    SnapshotError,
+    deferred_indexes,
+    import_snapshot,
+    open_snapshot,
+    read_snapshot,
+    write_snapshot,
+)
+
+
+class TestSnapshot(TestCase):
+
+    def create_items(self):
+        post = Post.objects.create(user_id=1, title='Title', body='Body\nwith a second line')
+        Comment.objects.create(post=post, name='Name', email='email@example.com', body='Comment body')
+        return post
+
+    def test_write_read(self):
+        post = self.create_items()
+        snapshot_file = io.StringIO()
+
+        counts = write_snapshot(snapshot_file, chunk_size=1)
+
+        self.assertEqual(counts, {'post': 1, 'comment': 1})
+        snapshot_file.seek(0)
+        self.assertEqual(
+            list(read_snapshot(snapshot_file)),
+            [
+                (Post, {'id': post.id, 'userId': 1, 'title': 'Title', 'body': 'Body\nwith a second line'}),
+                (
+                    Comment,
+                    {
+                        'id': post.comment_set.get().id,
+                        'postId': post.id,
+                        'name': 'Name',
+                        'email': 'email@example.com',
+                        'body': 'Comment body',
+                    },
+                ),
+            ],
+        )
+
+    def test_read_invalid(self):
+        for content, message in (
+            ('', 'Not a blog snapshot'),
+            ('{"format": "other"}\n', 'Not a blog snapshot'),
+            ('{"format": "blog-snapshot", "version": 99}\n', 'Unsupported snapshot version 99'),
+        ):
+            with self.subTest(content), self.assertRaisesMessage(SnapshotError, message):
+                list(read_snapshot(io.StringIO(content)))
+
+    def test_import(self):
+        post = self.create_items()
+        snapshot_file = io.StringIO()
+        write_snapshot(snapshot_file)
+        Post.objects.all().delete()
+
+        snapshot_file.seek(0)
+        self.assertEqual(import_snapshot(snapshot_file, batch_size=1), {'post': 1, 'comment': 1})
+
+        self.assertEqual(Post.objects.get().title, post.title)
+        self.assertEqual(Comment.objects.get().post_id, post.id)
+        # Imported items are in sync with the external API
+        self.assertFalse(Post.objects.unsynced().exists())
+        self.assertFalse(Comment.objects.unsynced().exists())
+
+    def test_deferred_indexes(self):
+        def index_names():
+            with connection.cursor() as cursor:
+                return {
+                    name for name, in_table in connection.introspection.get_constraints(
+                        cursor, Comment._meta.db_table
+                    ).items() if in_table['index']
+                }
+
+        before = index_names()
+        with deferred_indexes([Comment]):
+            # Only the primary key (which is not a plain index) is left
+            self.assertEqual(index_names(), set())
+
+        self.assertEqual(index_names(), before)
+
+
+    def test_open_snapshot(self):
+        # Snapshots are gzip compressed newline delimited JSON, which can be read by other tools as well
+        with tempfile.NamedTemporaryFile(suffix='.ndjson.gz') as temporary_file:
+            with open_snapshot(temporary_file.name, 'wt') as snapshot_file:
+                write_snapshot(snapshot_file)
+            with gzip.open(temporary_file.name, 'rt') as snapshot_file:
+                self.assertEqual(json.loads(snapshot_file.readline())['format'], 'blog-snapshot')
@@ -0,0 +1,159 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+
+from blog.management.commands import bootstrap_blog
+from blog.models.checkpoint import ImportCheckpoint
+from blog.models.post import Post
+from blog.models.comment import Comment
+from blog.testing.upstream import FakeCollection, FakeUpstream, external_api_settings, make_post, serve_in_thread
+
+
+class TestFakeCollection(SimpleTestCase):
+
+    def test_list(self):
+        collection = FakeCollection(10, make_post)
+        collection.delete(3)
+        collection.delete(4)
+        collection.create({'title': 'Created'})
+
+        def ids(**kwargs):
+            return [item['id'] for item in collection.list(**kwargs)]
+
+        self.assertEqual(ids(start=0, limit=3), [1, 2, 5])
+        self.assertEqual(ids(start=3, limit=3), [6, 7, 8])
+        self.assertEqual(ids(start=6, limit=3), [9, 10, 11])
+        self.assertEqual(ids(start=9, limit=3), [])
+        self.assertEqual(ids(low=2, high=6), [2, 5, 6])
+        self.assertEqual(ids(low=4, start=1, limit=2), [6, 7])
+        self.assertEqual(ids(limit=2, descending=True), [11, 10])
+
+    def test_update_delete(self):
+        collection = FakeCollection(10, make_post)
+
+        self.assertEqual(collection.update(2, {'title': 'Updated'})['title'], 'Updated')
+        self.assertEqual(collection.get(2)['title'], 'Updated')
+        self.assertTrue(collection.delete(2))
+        self.assertIsNone(collection.get(2))
+        self.assertFalse(collection.delete(2))
+        self.assertIsNone(collection.update(2, {'title': 'Updated'}))
+
+
+class TestCommandsWithFakeUpstream(TransactionTestCase):
+    """
+    Runs the commands against the fake external API, over real HTTP.
+    """
+
+    def test_bootstrap_and_synchronize(self):
+        upstream = FakeUpstream(posts=25, comments_per_post=3)
+        with serve_in_thread(upstream) as base_url, override_settings(**external_api_settings(base_url)):
+            call_command('bootstrap_blog', page_size=10, stdout=StringIO())
+
+            self.assertEqual(Post.objects.count(), 25)
+            self.assertEqual(Comment.objects.count(), 75)
+            self.assertEqual(
+                list(Comment.objects.filter(post_id=2).values_list('id', flat=True).order_by('id')), [4, 5, 6]
+            )
+
+            post = Post.objects.get(id=1)
+            post.title = 'Updated title'
+            post.save()
+            Comment.objects.filter(id=75).delete()
+            call_command('synchronize', stdout=StringIO())
+
+            self.assertEqual(upstream.collections['posts'].get(1)['title'], 'Updated title')
+            self.assertIsNone(upstream.collections['comments'].get(75))
+
+            # Nothing is left to push
+            call_command('synchronize', full=True, stdout=StringIO())
+            self.assertEqual(upstream.request_counts['PATCH /{collection}/{item_id}'], 1)
+            self.assertEqual(upstream.request_counts['DELETE /{collection}/{item_id}'], 1)
+
+    def test_bootstrap_comments_sources(self):
+        upstream = FakeUpstream(posts=25, comments_per_post=3)
+        with serve_in_thread(upstream) as base_url, override_settings(**external_api_settings(base_url)):
+            for comments_source, expected_requests in (('per-post', 25), ('bulk', 0)):
+                with self.subTest(comments_source):
+                    Post.objects.all().delete()
+                    upstream.request_counts.clear()
+                    stdout = StringIO()
+                    call_command(
+                        'bootstrap_blog', page_size=10, comments_source=comments_source, fetchers=2, stdout=stdout
+                    )
+
+                    self.assertIn(f'from the {comments_source} listing', stdout.getvalue())
+                    self.assertEqual(Comment.objects.count(), 75)
+                    self.assertEqual(Comment.objects.filter(post_id=25).count(), 3)
+                    self.assertEqual(
+                        upstream.request_counts.get('GET /posts/{item_id}/comments', 0), expected_requests
+                    )
+
+    def test_bootstrap_resume(self):
+        upstream = FakeUpstream(posts=25, comments_per_post=3)
+        write_chunk = bootstrap_blog.Command.write_chunk
+
+        def interrupted_write_chunk(command, *args):
+            # Interrupted (e.g. by a restart) after 2 chunks are committed
+            if interrupted_write_chunk.calls == 2:
+                raise KeyboardInterrupt
+            interrupted_write_chunk.calls += 1
+            return write_chunk(command, *args)
+
+        with serve_in_thread(upstream) as base_url, override_settings(**external_api_settings(base_url)):
+            for comments_source in ('per-post', 'bulk'):
+                with self.subTest(comments_source):
+                    Post.objects.all().delete()
+                    interrupted_write_chunk.calls = 0
+                    options = {'page_size': 10, 'commit_size': 10, 'fetchers': 1, 'stdout': StringIO()}
+                    with patch.object(bootstrap_blog.Command, 'write_chunk', interrupted_write_chunk):
+                        with self.assertRaises(KeyboardInterrupt):
+                            call_command('bootstrap_blog', comments_source=comments_source, **options)
+
+                    checkpoint = ImportCheckpoint.objects.get()
+                    self.assertFalse(checkpoint.finished)
+                    self.assertEqual(checkpoint.last_post_id, Post.objects.order_by('id').last().id)
+                    self.assertLess(Post.objects.count() + Comment.objects.count(), 100)
+
+                    with self.assertRaisesMessage(CommandError, 'use --resume'):
+                        call_command('bootstrap_blog', **options)
+
+                    stdout = StringIO()
+                    call_command('bootstrap_blog', resume=True, **{**options, 'stdout': stdout})
+                    self.assertIn(f'Resuming the import after post {checkpoint.last_post_id}', stdout.getvalue())
+                    self.assertEqual(Post.objects.count(), 25)
+                    self.assertEqual(Comment.objects.count(), 75)
+                    self.assertTrue(ImportCheckpoint.objects.get().finished)
+
+                    # Sequences are reset once the import is finished
+                    self.assertEqual(Post.objects.create(user_id=1, title='Title', body='Body').id, 26)
+
+                    with self.assertRaisesMessage(CommandError, 'no interrupted import'):
+                        call_command('bootstrap_blog', resume=True, **options)
+
+    @patch('blog.sync.http.backoff_delay', return_value=0)
+    def test_flaky_listings(self, mock_backoff_delay):
+        # Failed pages of the listings are retried, rather than taken for the end of the collections
+        upstream = FakeUpstream(posts=25, comments_per_post=3, error_rate=0.15, seed=1)
+        with serve_in_thread(upstream) as base_url, override_settings(**external_api_settings(base_url)):
+            options = {'page_size': 5, 'max_retries': 10, 'rate': 1000, 'max_rate': 1000}
+            call_command('bootstrap_blog', comments_source='bulk', stdout=StringIO(), **options)
+            self.assertEqual(Post.objects.count(), 25)
+            self.assertEqual(Comment.objects.count(), 75)
+
+            stdout = StringIO()
+            call_command('synchronize', full=True, dry_run=True, stdout=stdout, **options)
+
+        self.assertIn('Plan (dry run):\nNothing to push', stdout.getvalue())
+
+    def test_errors(self):
+        upstream = FakeUpstream(posts=1, error_rate=1.0)
+        with serve_in_thread(upstream) as base_url, override_settings(**external_api_settings(base_url)):
+            post = Post.objects.create(user_id=1, title='Title', body='Body')
+            stdout = StringIO()
+            call_command('synchronize', max_retries=1, stdout=stdout)
+
+        self.assertIn('errors: 2', stdout.getvalue())
+        self.assertFalse(Post.objects.get(id=post.id).is_synced)
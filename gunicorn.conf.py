@@ -0,0 +1,37 @@
+"""
+Gunicorn configuration (read from the working directory), which runs the ASGI application with uvicorn workers:
+
+    gunicorn stroer_challenge.asgi:application
+
+Each worker is an event loop, which serves many connections at once, so a worker per CPU is enough. Every
+setting can be overridden with an environment variable (or on the command line).
+"""
+import multiprocessing
+import os
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'uvicorn.workers.UvicornWorker')
+ASYNC_WORKERS = worker_class != 'sync'
+
+# A worker per CPU for event loops, and `2 * CPUs + 1` (as recommended by gunicorn) for sync workers, which
+# serve one request at a time (e.g. `GUNICORN_WORKER_CLASS=sync` with `stroer_challenge.wsgi:application`)
+workers = int(os.environ.get(
+    'WEB_CONCURRENCY', multiprocessing.cpu_count() if ASYNC_WORKERS else multiprocessing.cpu_count() * 2 + 1
+))
+
+# Connections waiting to be accepted
+backlog = int(os.environ.get('GUNICORN_BACKLOG', 2048))
+
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+
+# Django and the application are loaded once by the master, and the workers share its memory copy-on-write
+preload_app = True
+
+
+def pre_fork(server, worker):
+    # The workers must not share a DB connection which the master opened while loading the application
+    from django.db import connections
+    connections.close_all()
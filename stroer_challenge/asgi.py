@@ -9,8 +9,13 @@ https://docs.djangoproject.com/en/4.2/howto/deployment/asgi/
 
 import os
 
+from django.conf import settings
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'stroer_challenge.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from blog.middleware import ConcurrencyLimitMiddleware  # noqa: E402 (once Django is set up)
+
+application = ConcurrencyLimitMiddleware(django_application, settings.ASGI_CONCURRENCY)
@@ -27,17 +27,28 @@ DEBUG = True
 
 ALLOWED_HOSTS = []
 REST_FRAMEWORK = {
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
+    'DEFAULT_PAGINATION_CLASS': 'blog.api.pagination.BlogPagination',
     'PAGE_SIZE': 100,
+    'DEFAULT_RENDERER_CLASSES': [
+        'blog.api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
         'rest_framework.authentication.SessionAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'blog.api.authentication.CachedJWTAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
 }
 
+SIMPLE_JWT = {
+    'TOKEN_OBTAIN_SERIALIZER': 'blog.api.authentication.TokenObtainPairSerializer',
+}
+
+# How long the users of tokens are cached (see `blog.api.authentication.CachedJWTAuthentication`)
+JWT_USER_CACHE_TIMEOUT = int(os.environ.get('JWT_USER_CACHE_TIMEOUT', 60))
+
 
 # Application definition
 
@@ -48,6 +59,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt',
     'drf_yasg',
@@ -57,7 +69,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
-    'whitenoise.middleware.WhiteNoiseMiddleware',
+    'blog.middleware.AsyncWhiteNoiseMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
@@ -107,6 +119,11 @@ DATABASES = {
     }
 }
 
+# The number of requests which each ASGI worker serves at once (see `blog.middleware.ConcurrencyLimitMiddleware`).
+# Each of them has a DB connection of its own, so the workers times this must stay below the `max_connections` of
+# the DB (or of a connection pooler in front of it).
+ASGI_CONCURRENCY = int(os.environ.get('ASGI_CONCURRENCY', 20))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
@@ -150,6 +167,9 @@ STATIC_ROOT = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
-POSTS_URL = 'https://jsonplaceholder.typicode.com/posts'
-COMMENTS_URL = 'https://jsonplaceholder.typicode.com/comments'
-COMMENTS_BY_POST_URL = 'https://jsonplaceholder.typicode.com/posts/{}/comments'
+# e.g. the local stand-in, served by `python manage.py fake_upstream`
+EXTERNAL_API_URL = os.environ.get('EXTERNAL_API_URL', 'https://jsonplaceholder.typicode.com').rstrip('/')
+
+POSTS_URL = f'{EXTERNAL_API_URL}/posts'
+COMMENTS_URL = f'{EXTERNAL_API_URL}/comments'
+COMMENTS_BY_POST_URL = EXTERNAL_API_URL + '/posts/{}/comments'